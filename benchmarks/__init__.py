@@ -0,0 +1,6 @@
+"""Benchmarks of the interpreter.
+
+Each module is a script run from the root of the repository, for example
+`python benchmarks/frontend.py`; `generate` also makes the synthetic
+programs the others can share.
+"""
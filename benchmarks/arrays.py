@@ -0,0 +1,98 @@
+"""Times building and summing a sequence as a linked list and as an array,
+on every engine.
+
+The linked list is built like examples/linkedlist.lox, walking the whole
+list on every append, while the array is grown with `push`.
+
+Usage: python benchmarks/arrays.py [--size N] [--repeat N]
+"""
+
+import argparse
+import contextlib
+import io
+import pathlib
+import sys
+import time
+
+SRC = pathlib.Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from parser import Parser  # noqa: E402
+
+from closure_compiler import ClosureInterpreter  # noqa: E402
+from interpreter import Interpreter  # noqa: E402
+from resolver import Resolver  # noqa: E402
+from scanner import RegexScanner  # noqa: E402
+from transpiler import PythonInterpreter  # noqa: E402
+from vm import VM  # noqa: E402
+
+PROGRAMS = {
+    "linked-list": """
+        class Node {
+            init(val) {
+                this.val = val;
+                this.next = nil;
+            }
+        }
+        fun append(head, val) {
+            var temp = head;
+            while (temp.next != nil) temp = temp.next;
+            temp.next = Node(val);
+        }
+        var head = Node(0);
+        for (var i = 1; i < SIZE; i = i + 1) append(head, i);
+        var total = 0;
+        while (head != nil) {
+            total = total + head.val;
+            head = head.next;
+        }
+        print total;
+    """,
+    "array": """
+        var xs = array(0);
+        for (var i = 0; i < SIZE; i = i + 1) push(xs, i);
+        var total = 0;
+        for (var i = 0; i < len(xs); i = i + 1) total = total + xs[i];
+        print total;
+    """,
+}
+
+ENGINES = {
+    "tree": Interpreter,
+    "closure": ClosureInterpreter,
+    "vm": VM,
+    "python": PythonInterpreter,
+}
+
+
+def run(source: str, engine: type) -> tuple[float, str]:
+    interpreter = engine()
+    statements = Parser(RegexScanner(source).scan_tokens()).parse()
+    Resolver().resolve_stmts(statements)
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        interpreter.interpret(statements)
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main(args: list[str]) -> None:
+    arg_parser = argparse.ArgumentParser(prog="arrays")
+    arg_parser.add_argument("--size", type=int, default=1000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    options = arg_parser.parse_args(args)
+
+    for name, program in PROGRAMS.items():
+        source = program.replace("SIZE", str(options.size))
+        for engine_name, engine in ENGINES.items():
+            times, outputs = zip(
+                *(run(source, engine) for _ in range(options.repeat))
+            )
+            print(
+                f"{name:<12} {engine_name:<8} {min(times) * 1000:9.1f} ms  "
+                f"total {outputs[0].strip()}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,82 @@
+"""Times call-heavy Lox programs on the tree-walking and closure engines.
+
+Usage: python benchmarks/calls.py [--repeat N]
+"""
+
+import argparse
+import contextlib
+import io
+import pathlib
+import sys
+import time
+
+SRC = pathlib.Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from parser import Parser  # noqa: E402
+
+from closure_compiler import ClosureInterpreter  # noqa: E402
+from interpreter import Interpreter  # noqa: E402
+from resolver import Resolver  # noqa: E402
+from scanner import Scanner  # noqa: E402
+
+PROGRAMS = {
+    # examples/fibonacci.lox, on a larger input.
+    "fibonacci": """
+        fun fib(n){
+            if (n < 2) {
+                return n;
+            }
+            return fib(n-1) + fib(n-2);
+        }
+        print fib(20);
+    """,
+    # Returns from inside nested loops and blocks.
+    "early-return": """
+        fun find(n) {
+            for (var i = 0; i < 20; i = i + 1) {
+                for (var j = 0; j < 20; j = j + 1) {
+                    if (i * j == n) { return i; }
+                }
+            }
+            return nil;
+        }
+        for (var k = 0; k < 300; k = k + 1) find(k);
+    """,
+    "methods": """
+        class Counter {
+            init() { this.n = 0; }
+            inc() { this.n = this.n + 1; return this.n; }
+        }
+        var c = Counter();
+        for (var i = 0; i < 20000; i = i + 1) c.inc();
+        print c.n;
+    """,
+}
+
+ENGINES = {"tree": Interpreter, "closure": ClosureInterpreter}
+
+
+def run(source: str, engine: type) -> float:
+    interpreter = engine()
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    Resolver().resolve_stmts(statements)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.interpret(statements)
+    return time.perf_counter() - start
+
+
+def main(args: list[str]) -> None:
+    arg_parser = argparse.ArgumentParser(prog="calls")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    options = arg_parser.parse_args(args)
+
+    for name, source in PROGRAMS.items():
+        for engine_name, engine in ENGINES.items():
+            best = min(run(source, engine) for _ in range(options.repeat))
+            print(f"{name:<14} {engine_name:<8} {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
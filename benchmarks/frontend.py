@@ -0,0 +1,167 @@
+"""Measures the throughput and memory of the scanner, parser and resolver.
+
+A synthetic program of every shape in `generate.SHAPES` is run through each
+stage of the front end, which is timed on its own --repeat times, keeping
+the best run. Each stage is then run once more under tracemalloc to find
+its peak memory.
+
+Results can be saved as JSON with --json, and compared with --compare to
+results saved earlier: any throughput more than --threshold percent lower,
+or peak memory more than --threshold percent higher, is reported as a
+regression and makes the benchmark exit with status 1.
+
+Usage: python benchmarks/frontend.py [--size KB] [--repeat N]
+           [--shape SHAPE ...] [--json FILE] [--compare FILE]
+           [--threshold PERCENT]
+"""
+
+import argparse
+import json
+import pathlib
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT))
+
+from parser import Parser  # noqa: E402
+
+from benchmarks.generate import DEFAULT_DEPTH, SHAPES, generate  # noqa: E402
+from error_handler import ErrorHandler  # noqa: E402
+from optimizer import Census  # noqa: E402
+from resolver import Resolver  # noqa: E402
+from scanner import RegexScanner  # noqa: E402
+
+# Metrics where higher is better; all others are better lower.
+THROUGHPUTS = ("tokens_per_s", "nodes_per_s")
+# Changes in peak memory smaller than this are noise from the allocator,
+# however large they are relative to a small peak.
+MIN_PEAK_CHANGE = 4096
+
+
+def measure(stage: Callable[[], object], repeat: int) -> dict[str, float]:
+    """Returns the best time of `repeat` runs of `stage`, and the peak
+    memory it allocates."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    stage()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def run_shape(shape: str, size: int, repeat: int) -> dict[str, dict]:
+    source = generate(shape, size, DEFAULT_DEPTH)
+    tokens = RegexScanner(source).scan_tokens()
+    statements = Parser(tokens).parse()
+    if ErrorHandler.had_error:
+        sys.exit(f"generated {shape} program has a syntax error")
+    nodes = Census().count(statements).nodes
+
+    scan = measure(lambda: RegexScanner(source).scan_tokens(), repeat)
+    scan["tokens_per_s"] = len(tokens) / scan["seconds"]
+    parse = measure(lambda: Parser(tokens).parse(), repeat)
+    parse["nodes_per_s"] = nodes / parse["seconds"]
+    resolve = measure(lambda: Resolver().resolve_stmts(statements), repeat)
+    resolve["nodes_per_s"] = nodes / resolve["seconds"]
+
+    return {
+        "source": {"bytes": len(source), "tokens": len(tokens), "nodes": nodes},
+        "scan": scan,
+        "parse": parse,
+        "resolve": resolve,
+    }
+
+
+def print_results(results: dict[str, dict]) -> None:
+    print(
+        f"{'shape':<10} {'stage':<8} {'ms':>9} {'throughput':>20} "
+        f"{'peak KB':>10}"
+    )
+    for shape, stages in results.items():
+        for stage in ("scan", "parse", "resolve"):
+            metrics = stages[stage]
+            unit = "tokens_per_s" if stage == "scan" else "nodes_per_s"
+            print(
+                f"{shape:<10} {stage:<8} {metrics['seconds'] * 1000:9.1f} "
+                f"{metrics[unit]:>13,.0f} {unit[:-6]}/s "
+                f"{metrics['peak_bytes'] / 1000:10.0f}"
+            )
+
+
+def compare(
+    results: dict[str, dict], baseline: dict[str, dict], threshold: float
+) -> bool:
+    """Prints how each metric changed from `baseline`, returning whether
+    any of them regressed by more than `threshold` percent."""
+    regressed = False
+    for shape, stages in results.items():
+        if shape not in baseline:
+            continue
+        for stage in ("scan", "parse", "resolve"):
+            for metric, value in stages[stage].items():
+                if metric == "seconds":
+                    continue
+                old = baseline[shape][stage][metric]
+                change = (value - old) / (old or 1) * 100
+                worse = -change if metric in THROUGHPUTS else change
+                if metric == "peak_bytes" and value - old < MIN_PEAK_CHANGE:
+                    worse = 0
+                flag = ""
+                if worse > threshold:
+                    flag = "  REGRESSION"
+                    regressed = True
+                print(
+                    f"{shape:<10} {stage:<8} {metric:<13} {old:>15,.0f} -> "
+                    f"{value:>15,.0f} {change:+7.1f}%{flag}"
+                )
+    return regressed
+
+
+def main(args: list[str]) -> None:
+    arg_parser = argparse.ArgumentParser(prog="frontend")
+    arg_parser.add_argument("--size", type=float, default=500.0)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument(
+        "--shape", choices=SHAPES, nargs="+", default=list(SHAPES)
+    )
+    arg_parser.add_argument("--json", type=pathlib.Path)
+    arg_parser.add_argument("--compare", type=pathlib.Path)
+    arg_parser.add_argument("--threshold", type=float, default=10.0)
+    options = arg_parser.parse_args(args)
+
+    # Deep nesting takes more frames than the default limit allows.
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10_000))
+
+    size = int(options.size * 1000)
+    results = {
+        shape: run_shape(shape, size, options.repeat) for shape in options.shape
+    }
+    print_results(results)
+
+    if options.json is not None:
+        report = {
+            "python": platform.python_version(),
+            "size": size,
+            "results": results,
+        }
+        options.json.write_text(json.dumps(report, indent=2) + "\n")
+
+    if options.compare is not None:
+        baseline = json.loads(options.compare.read_text())
+        print(f"\ncompared with {options.compare}:")
+        if compare(results, baseline["results"], options.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,114 @@
+"""Generates synthetic Lox programs of a given size and shape.
+
+Programs are made by repeating a unit of code, numbered so its names don't
+clash, until they reach --size kilobytes. Each shape stresses a different
+part of the front end:
+
+    functions  many small functions, with the calls running them
+    nesting    blocks, conditions and groupings nested --depth deep
+    strings    long string literals
+    classes    one long chain of subclasses calling their superclass
+    mixed      all of the above in turn
+
+Usage: python benchmarks/generate.py [--shape SHAPE] [--size KB] [--depth N]
+"""
+
+import argparse
+import sys
+from typing import Callable, Iterator
+
+DEFAULT_DEPTH = 30
+
+
+def functions(n: int, depth: int) -> str:
+    return (
+        f"fun f{n}(a, b) {{\n"
+        f"    var c = a + b * {n};\n"
+        "    if (c > 10 or a == b) return c - 1;\n"
+        "    return -c;\n"
+        "}\n"
+        f"print f{n}({n}, 2);\n"
+    )
+
+
+def nesting(n: int, depth: int) -> str:
+    lines = [f"var n{n} = 0;\n"]
+    for level in range(depth):
+        indent = "    " * level
+        lines.append(f"{indent}if (n{n} < {level}) {{\n")
+    group = "(" * depth + "1" + " + 1)" * depth
+    lines.append("    " * depth + f"n{n} = n{n} + {group};\n")
+    for level in reversed(range(depth)):
+        lines.append("    " * level + "}\n")
+    return "".join(lines)
+
+
+def strings(n: int, depth: int) -> str:
+    text = " ".join(f"word{n}x{i}" for i in range(100))
+    return f'var s{n} = "{text}";\nprint s{n} + "{n}";\n'
+
+
+def classes(n: int, depth: int) -> str:
+    if n == 0:
+        return (
+            "class C0 {\n"
+            "    init(x) { this.v0 = x; }\n"
+            "    m0() { return this.v0; }\n"
+            "}\n"
+        )
+    return (
+        f"class C{n} < C{n - 1} {{\n"
+        f"    init(x) {{ super.init(x); this.v{n} = x + {n}; }}\n"
+        f"    m{n}() {{ return this.v{n} + super.m{n - 1}(); }}\n"
+        "}\n"
+    )
+
+
+def mixed(n: int, depth: int) -> str:
+    unit = (functions, nesting, strings, classes)[n % 4]
+    return unit(n // 4, depth)
+
+
+SHAPES: dict[str, Callable[[int, int], str]] = {
+    "functions": functions,
+    "nesting": nesting,
+    "strings": strings,
+    "classes": classes,
+    "mixed": mixed,
+}
+
+
+def units(shape: str, depth: int) -> Iterator[str]:
+    unit = SHAPES[shape]
+    n = 0
+    while True:
+        yield unit(n, depth)
+        n += 1
+
+
+def generate(shape: str, size: int, depth: int = DEFAULT_DEPTH) -> str:
+    """Returns a program of the shape, at least `size` characters long."""
+    parts = []
+    length = 0
+    for part in units(shape, depth):
+        if length >= size:
+            break
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)
+
+
+def main(args: list[str]) -> None:
+    arg_parser = argparse.ArgumentParser(prog="generate")
+    arg_parser.add_argument("--shape", choices=SHAPES, default="mixed")
+    arg_parser.add_argument("--size", type=float, default=100.0)
+    arg_parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH)
+    options = arg_parser.parse_args(args)
+
+    sys.stdout.write(
+        generate(options.shape, int(options.size * 1000), options.depth)
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,64 @@
+"""Measures how long a document takes to update after small edits.
+
+The document is built by repeating the programs in examples/ --copies
+times. Edits made at random lines either change a line in place, as when
+typing, or insert one; both are timed against parsing the whole document
+again.
+
+Usage: python benchmarks/incremental.py [--copies N] [--edits N]
+"""
+
+import argparse
+import pathlib
+import random
+import statistics
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from incremental import Document  # noqa: E402
+
+
+def change_line(document: Document, line: int) -> None:
+    document.edit(line, line + 1, document.lines[line] + " ")
+
+
+def insert_line(document: Document, line: int) -> None:
+    document.edit(line, line, "print 1;")
+
+
+EDITS = {"change": change_line, "insert": insert_line}
+
+
+def main(args: list[str]) -> None:
+    arg_parser = argparse.ArgumentParser(prog="incremental")
+    arg_parser.add_argument("--copies", type=int, default=100)
+    arg_parser.add_argument("--edits", type=int, default=200)
+    options = arg_parser.parse_args(args)
+
+    examples = "\n".join(
+        path.read_text() for path in sorted(ROOT.glob("examples/*.lox"))
+    )
+    source = "\n".join([examples] * options.copies)
+
+    start = time.perf_counter()
+    document = Document(source)
+    full = time.perf_counter() - start
+    print(f"{len(document.lines)} lines, {len(document.segments)} segments")
+    print(f"{'full':<8} {full * 1000:9.3f} ms")
+
+    rng = random.Random(0)
+    for name, edit in EDITS.items():
+        times = []
+        for _ in range(options.edits):
+            line = rng.randrange(len(document.lines))
+            start = time.perf_counter()
+            edit(document, line)
+            times.append(time.perf_counter() - start)
+        print(f"{name:<8} {statistics.median(times) * 1000:9.3f} ms median")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
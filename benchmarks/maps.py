@@ -0,0 +1,80 @@
+"""Times counting how often each key occurs, looking the counts up with a
+linear search through a linked list and with a map, on every engine.
+
+Usage: python benchmarks/maps.py [--size N] [--keys N] [--repeat N]
+"""
+
+import argparse
+import pathlib
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.arrays import ENGINES, run  # noqa: E402
+
+PROGRAMS = {
+    "linked-list": """
+        class Count {
+            init(key, next) {
+                this.key = key;
+                this.n = 0;
+                this.next = next;
+            }
+        }
+        fun find(count, key) {
+            while (count != nil) {
+                if (count.key == key) return count;
+                count = count.next;
+            }
+            return nil;
+        }
+        var counts = nil;
+        for (var i = 0; i < SIZE; i = i + 1) {
+            var key = i % KEYS;
+            var count = find(counts, key);
+            if (count == nil) count = counts = Count(key, counts);
+            count.n = count.n + 1;
+        }
+        var distinct = 0;
+        while (counts != nil) {
+            distinct = distinct + 1;
+            counts = counts.next;
+        }
+        print distinct;
+    """,
+    "map": """
+        var counts = map();
+        for (var i = 0; i < SIZE; i = i + 1) {
+            var key = i % KEYS;
+            set(counts, key, (get(counts, key) or 0) + 1);
+        }
+        print size(counts);
+    """,
+}
+
+
+def main(args: list[str]) -> None:
+    arg_parser = argparse.ArgumentParser(prog="maps")
+    arg_parser.add_argument("--size", type=int, default=5000)
+    arg_parser.add_argument("--keys", type=int, default=500)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    options = arg_parser.parse_args(args)
+
+    for name, program in PROGRAMS.items():
+        source = program.replace("SIZE", str(options.size)).replace(
+            "KEYS", str(options.keys)
+        )
+        for engine_name, engine in ENGINES.items():
+            times, outputs = zip(
+                *(run(source, engine) for _ in range(options.repeat))
+            )
+            print(
+                f"{name:<12} {engine_name:<8} {min(times) * 1000:9.1f} ms  "
+                f"keys {outputs[0].strip()}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,72 @@
+"""Reports the memory taken by tokens and syntax tree nodes.
+
+A synthetic program is built by repeating a template using every kind of
+statement and expression --copies times; it is scanned and parsed while
+tracemalloc measures the memory allocated for the tokens and the tree.
+
+Usage: python benchmarks/memory.py [--copies N]
+"""
+
+import argparse
+import pathlib
+import sys
+import tracemalloc
+
+SRC = pathlib.Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+from parser import Parser  # noqa: E402
+
+from optimizer import Census  # noqa: E402
+from scanner import RegexScanner  # noqa: E402
+
+TEMPLATE = """
+class Shape{n} < Base {
+    init(width, height) {
+        this.width = width;
+        this.height = height;
+    }
+    area() { return this.width * this.height; }
+    describe() { return "shape " + super.describe(); }
+}
+fun total{n}(shapes, count) {
+    var sum = 0;
+    for (var i = 0; i < count; i = i + 1) {
+        if (!(i % 2 == 0) or i > 10) sum = sum + shapes.area();
+        else sum = sum - -1;
+    }
+    while (sum >= 100) sum = sum / 2;
+    return sum;
+}
+print total{n}(Shape{n}(3, 4), 20) != nil;
+"""
+
+
+def main(args: list[str]) -> None:
+    arg_parser = argparse.ArgumentParser(prog="memory")
+    arg_parser.add_argument("--copies", type=int, default=5000)
+    options = arg_parser.parse_args(args)
+
+    source = "".join(
+        TEMPLATE.replace("{n}", str(n)) for n in range(options.copies)
+    )
+
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    tokens = RegexScanner(source).scan_tokens()
+    scanned = tracemalloc.get_traced_memory()[0]
+    statements = Parser(tokens).parse()
+    parsed = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    nodes = Census().count(statements).nodes
+    print(f"{len(source) / 1_000_000:.1f} MB of source")
+    print(
+        f"{len(tokens):>9} tokens {(scanned - start) / len(tokens):8.1f} "
+        "bytes per token"
+    )
+    print(f"{nodes:>9} nodes  {(parsed - scanned) / nodes:8.1f} bytes per node")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
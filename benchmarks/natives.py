@@ -0,0 +1,69 @@
+"""Times calls to native functions on every engine, and compares their cost
+with that of calling the Python function behind the native directly.
+
+The cost of a call is the time of a loop calling `abs` less that of the
+same loop adding up its argument instead, divided by the number of calls.
+
+Usage: python benchmarks/natives.py [--calls N] [--repeat N]
+"""
+
+import argparse
+import pathlib
+import sys
+import timeit
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.arrays import ENGINES, run  # noqa: E402
+from native_functions import built_ins  # noqa: E402
+
+PROGRAMS = {
+    "loop": """
+        var total = 0;
+        var x = -1.5;
+        for (var i = 0; i < CALLS; i = i + 8) {
+            total = total + x + x + x + x + x + x + x + x;
+        }
+        print total;
+    """,
+    "calls": """
+        var total = 0;
+        var x = -1.5;
+        for (var i = 0; i < CALLS; i = i + 8) {
+            total = total + abs(x) + abs(x) + abs(x) + abs(x) + abs(x)
+                + abs(x) + abs(x) + abs(x);
+        }
+        print total;
+    """,
+}
+
+
+def main(args: list[str]) -> None:
+    arg_parser = argparse.ArgumentParser(prog="natives")
+    arg_parser.add_argument("--calls", type=int, default=200_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    options = arg_parser.parse_args(args)
+
+    function = built_ins["abs"].function
+    seconds = min(
+        timeit.repeat(
+            lambda: function(-1.5), number=options.calls, repeat=options.repeat
+        )
+    )
+    print(f"function {seconds / options.calls * 1e9:7.0f} ns per call")
+
+    for engine_name, engine in ENGINES.items():
+        times = {}
+        for name, program in PROGRAMS.items():
+            source = program.replace("CALLS", str(options.calls))
+            times[name] = min(
+                run(source, engine)[0] for _ in range(options.repeat)
+            )
+        per_call = (times["calls"] - times["loop"]) / options.calls
+        print(f"{engine_name:<8} {per_call * 1e9:7.0f} ns per call")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,89 @@
+"""Measures the throughput of the parser, and checks that deeply nested
+expressions parse.
+
+The source is built by repeating the programs in examples/ until it is at
+least --size megabytes long, and scanned once before the parser is timed.
+Expressions of each shape in NESTED are then nested --depth levels deep,
+and parsed under the default recursion limit.
+
+Usage: python benchmarks/parsing.py [--size MB] [--repeat N] [--depth N]
+"""
+
+import argparse
+import pathlib
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from parser import Parser  # noqa: E402
+
+from error_handler import ErrorHandler  # noqa: E402
+from scanner import RegexScanner  # noqa: E402
+
+# Opening and closing halves of expressions, nested around a literal.
+NESTED = {
+    "grouping": ("(", ")"),
+    "unary": ("-", ""),
+    "call": ("f(", ")"),
+    "binary": ("1 + (", ")"),
+    "assignment": ("a = ", ""),
+}
+
+
+def make_source(size: int) -> str:
+    examples = "\n".join(
+        path.read_text() for path in sorted(ROOT.glob("examples/*.lox"))
+    )
+    return examples * (size // len(examples) + 1)
+
+
+def run(tokens: list) -> float:
+    start = time.perf_counter()
+    Parser(tokens).parse()
+    return time.perf_counter() - start
+
+
+def nests(shape: str, depth: int) -> bool:
+    """Tells if an expression nested `depth` levels deep parses."""
+    opening, closing = NESTED[shape]
+    source = f"print {opening * depth}1{closing * depth};"
+    tokens = RegexScanner(source).scan_tokens()
+    try:
+        Parser(tokens).parse()
+    except RecursionError:
+        return False
+    return not ErrorHandler.had_error
+
+
+def main(args: list[str]) -> None:
+    arg_parser = argparse.ArgumentParser(prog="parsing")
+    arg_parser.add_argument("--size", type=float, default=2.0)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--depth", type=int, default=200)
+    options = arg_parser.parse_args(args)
+
+    source = make_source(int(options.size * 1_000_000))
+    megabytes = len(source.encode()) / 1_000_000
+    tokens = RegexScanner(source).scan_tokens()
+    print(f"{megabytes:.1f} MB, {len(tokens)} tokens")
+
+    best = min(run(tokens) for _ in range(options.repeat))
+    print(
+        f"parse  {best * 1000:8.1f} ms {megabytes / best:8.2f} MB/s "
+        f"{len(tokens) / best / 1_000_000:6.2f} Mtokens/s"
+    )
+
+    failed = False
+    for shape in NESTED:
+        ok = nests(shape, options.depth)
+        failed |= not ok
+        result = "ok" if ok else "FAILED"
+        print(f"{shape:<10} nested {options.depth} deep: {result}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
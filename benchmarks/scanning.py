@@ -0,0 +1,52 @@
+"""Measures the throughput of the scanners on a large Lox source.
+
+The source is built by repeating the programs in examples/ until it is
+at least --size megabytes long.
+
+Usage: python benchmarks/scanning.py [--size MB] [--repeat N]
+"""
+
+import argparse
+import pathlib
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from scanner import RegexScanner, Scanner  # noqa: E402
+
+SCANNERS = {"char": Scanner, "regex": RegexScanner}
+
+
+def make_source(size: int) -> str:
+    examples = "\n".join(
+        path.read_text() for path in sorted(ROOT.glob("examples/*.lox"))
+    )
+    return examples * (size // len(examples) + 1)
+
+
+def run(source: str, scanner: type) -> float:
+    start = time.perf_counter()
+    scanner(source).scan_tokens()
+    return time.perf_counter() - start
+
+
+def main(args: list[str]) -> None:
+    arg_parser = argparse.ArgumentParser(prog="scanning")
+    arg_parser.add_argument("--size", type=float, default=2.0)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    options = arg_parser.parse_args(args)
+
+    source = make_source(int(options.size * 1_000_000))
+    megabytes = len(source.encode()) / 1_000_000
+    tokens = len(RegexScanner(source).scan_tokens())
+    print(f"{megabytes:.1f} MB, {tokens} tokens")
+
+    for name, scanner in SCANNERS.items():
+        best = min(run(source, scanner) for _ in range(options.repeat))
+        print(f"{name:<6} {best * 1000:8.1f} ms {megabytes / best:8.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
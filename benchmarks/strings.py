@@ -0,0 +1,53 @@
+"""Times building a long string a piece at a time, on every engine, with
+ropes and with plain string concatenation.
+
+Concatenation is made plain by raising `rope.MIN_LENGTH` beyond the length
+of any string, which is how strings were built before ropes.
+
+Usage: python benchmarks/strings.py [--pieces N] [--repeat N]
+"""
+
+import argparse
+import pathlib
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT))
+
+import rope  # noqa: E402
+from benchmarks.arrays import ENGINES, run  # noqa: E402
+
+PROGRAM = """
+    var report = "";
+    for (var i = 0; i < PIECES; i = i + 1) {
+        report = report + "line of the report, number ";
+        report = report + "#\\n";
+    }
+    print len(report);
+"""
+
+
+def main(args: list[str]) -> None:
+    arg_parser = argparse.ArgumentParser(prog="strings")
+    arg_parser.add_argument("--pieces", type=int, default=20000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    options = arg_parser.parse_args(args)
+
+    source = PROGRAM.replace("PIECES", str(options.pieces))
+    min_length = rope.MIN_LENGTH
+    for name, length in (("plain", sys.maxsize), ("ropes", min_length)):
+        rope.MIN_LENGTH = length
+        for engine_name, engine in ENGINES.items():
+            times, outputs = zip(
+                *(run(source, engine) for _ in range(options.repeat))
+            )
+            print(
+                f"{name:<6} {engine_name:<8} {min(times) * 1000:9.1f} ms  "
+                f"length {outputs[0].strip()}"
+            )
+    rope.MIN_LENGTH = min_length
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,65 @@
+"""Times the statistics of a sequence of numbers computed by Lox loops over
+an array, and by the vector natives, on every engine.
+
+Usage: python benchmarks/vectors.py [--size N] [--repeat N]
+"""
+
+import argparse
+import pathlib
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT))
+
+import vector  # noqa: E402
+from benchmarks.arrays import ENGINES, run  # noqa: E402
+
+PROGRAMS = {
+    "loops": """
+        var xs = array(SIZE);
+        for (var i = 0; i < SIZE; i = i + 1) xs[i] = i * 0.5;
+        var total = 0;
+        var squares = 0;
+        var largest = xs[0];
+        for (var i = 0; i < SIZE; i = i + 1) {
+            var x = xs[i] * 2;
+            total = total + x;
+            squares = squares + x * x;
+            if (x > largest) largest = x;
+        }
+        print total / SIZE;
+        print squares;
+        print largest;
+    """,
+    "vectors": """
+        var xs = vrange(0, SIZE * 0.5, 0.5);
+        var doubled = vscale(xs, 2);
+        print vmean(doubled);
+        print vdot(doubled, doubled);
+        print vmax(doubled);
+    """,
+}
+
+
+def main(args: list[str]) -> None:
+    arg_parser = argparse.ArgumentParser(prog="vectors")
+    arg_parser.add_argument("--size", type=int, default=100_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    options = arg_parser.parse_args(args)
+
+    print("numpy:", "yes" if vector.numpy is not None else "no")
+    for name, program in PROGRAMS.items():
+        source = program.replace("SIZE", str(options.size))
+        for engine_name, engine in ENGINES.items():
+            times, outputs = zip(
+                *(run(source, engine) for _ in range(options.repeat))
+            )
+            print(
+                f"{name:<8} {engine_name:<8} {min(times) * 1000:9.1f} ms  "
+                + " ".join(outputs[0].split())
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,172 @@
+from array import array
+from enum import IntEnum
+
+__all__ = "OpCode", "Chunk", "FunctionProto"
+
+
+class OpCode(IntEnum):
+    CONSTANT = 0
+    NIL = 1
+    TRUE = 2
+    FALSE = 3
+    POP = 4
+    GET_LOCAL = 5
+    SET_LOCAL = 6
+    GET_GLOBAL = 7
+    DEFINE_GLOBAL = 8
+    SET_GLOBAL = 9
+    GET_UPVALUE = 10
+    SET_UPVALUE = 11
+    GET_PROPERTY = 12
+    SET_PROPERTY = 13
+    GET_SUPER = 14
+    EQUAL = 15
+    NOT_EQUAL = 16
+    GREATER = 17
+    GREATER_EQUAL = 18
+    LESS = 19
+    LESS_EQUAL = 20
+    ADD = 21
+    SUBTRACT = 22
+    MULTIPLY = 23
+    DIVIDE = 24
+    MODULO = 25
+    NOT = 26
+    NEGATE = 27
+    PRINT = 28
+    JUMP = 29
+    JUMP_IF_FALSE = 30
+    JUMP_IF_TRUE = 31
+    POP_JUMP_IF_FALSE = 32
+    LOOP = 33
+    CALL = 34
+    INVOKE = 35
+    SUPER_INVOKE = 36
+    CLOSURE = 37
+    CLOSE_UPVALUE = 38
+    RETURN = 39
+    CLASS = 40
+    INHERIT = 41
+    METHOD = 42
+    TAIL_CALL = 43
+    GET_INDEX = 44
+    SET_INDEX = 45
+
+
+# Number of operand units following each opcode, CLOSURE excluded as its
+# length depends on the upvalue count of the function it creates.
+OPERANDS = {
+    OpCode.CONSTANT: 1,
+    OpCode.GET_LOCAL: 1,
+    OpCode.SET_LOCAL: 1,
+    OpCode.GET_GLOBAL: 1,
+    OpCode.DEFINE_GLOBAL: 1,
+    OpCode.SET_GLOBAL: 1,
+    OpCode.GET_UPVALUE: 1,
+    OpCode.SET_UPVALUE: 1,
+    OpCode.GET_PROPERTY: 1,
+    OpCode.SET_PROPERTY: 1,
+    OpCode.GET_SUPER: 1,
+    OpCode.JUMP: 1,
+    OpCode.JUMP_IF_FALSE: 1,
+    OpCode.JUMP_IF_TRUE: 1,
+    OpCode.POP_JUMP_IF_FALSE: 1,
+    OpCode.LOOP: 1,
+    OpCode.CALL: 1,
+    OpCode.TAIL_CALL: 1,
+    OpCode.INVOKE: 2,
+    OpCode.SUPER_INVOKE: 2,
+    OpCode.CLASS: 1,
+    OpCode.METHOD: 1,
+}
+
+
+class Chunk:
+    """A compiled unit of bytecode.
+
+    Opcodes and their operands share one 16-bit code unit each in `code`,
+    `lines` holds the source line of every unit and `constants` the values
+    referenced by index from the code.
+    """
+
+    __slots__ = "code", "lines", "constants", "_constant_index"
+
+    def __init__(self) -> None:
+        self.code = array("H")
+        self.lines = array("I")
+        self.constants: list = []
+        self._constant_index: dict = {}
+
+    def write(self, unit: int, line: int) -> None:
+        self.code.append(unit)
+        self.lines.append(line)
+
+    def add_constant(self, value) -> int:
+        # Numbers and strings are deduplicated; repr keeps -0.0 apart from 0.0
+        if isinstance(value, (float, str)):
+            key = (type(value), repr(value))
+            index = self._constant_index.get(key)
+            if index is None:
+                index = self._constant_index[key] = len(self.constants)
+                self.constants.append(value)
+            return index
+
+        self.constants.append(value)
+        return len(self.constants) - 1
+
+    def disassemble(self, name: str) -> str:
+        lines = [f"== {name} =="]
+        offset = 0
+        while offset < len(self.code):
+            op = OpCode(self.code[offset])
+            width = OPERANDS.get(op, 0)
+            operands = list(self.code[offset + 1 : offset + 1 + width])
+            text = f"{offset:04} {self.lines[offset]:4} {op.name:<18}"
+            if op in (
+                OpCode.CONSTANT,
+                OpCode.GET_GLOBAL,
+                OpCode.DEFINE_GLOBAL,
+                OpCode.SET_GLOBAL,
+                OpCode.GET_PROPERTY,
+                OpCode.SET_PROPERTY,
+                OpCode.GET_SUPER,
+                OpCode.CLASS,
+                OpCode.METHOD,
+                OpCode.INVOKE,
+                OpCode.SUPER_INVOKE,
+            ):
+                text += f" {operands[0]:4} '{self.constants[operands[0]]}'"
+                operands = operands[1:]
+            elif op is OpCode.CLOSURE:
+                function = self.constants[self.code[offset + 1]]
+                width = 1 + 2 * function.upvalue_count
+                operands = list(self.code[offset + 1 : offset + 1 + width])
+                text += f" {operands[0]:4} {function}"
+                operands = operands[1:]
+            if operands:
+                text += " " + " ".join(map(str, operands))
+            lines.append(text)
+            offset += 1 + width
+
+        for constant in self.constants:
+            if isinstance(constant, FunctionProto):
+                lines.append(constant.chunk.disassemble(str(constant)))
+
+        return "\n".join(lines)
+
+
+class FunctionProto:
+    """A compiled function: its bytecode plus what is needed to call it."""
+
+    __slots__ = "name", "arity", "upvalue_count", "chunk"
+
+    def __init__(self, name: str, arity: int = 0) -> None:
+        self.name = name
+        self.arity = arity
+        self.upvalue_count = 0
+        self.chunk = Chunk()
+
+    def __str__(self) -> str:
+        if not self.name:
+            return "<script>"
+        return f"<fn {self.name}>"
@@ -0,0 +1,553 @@
+import operator
+from typing import TYPE_CHECKING, Callable
+
+import expr as ex
+import inline_cache
+import stmt as st
+from environment import Environment, LocalEnvironment
+from error_handler import ErrorHandler, RuntimeErr
+from interpreter import Interpreter
+from lox_array import ArrayError, get_item, set_item
+from lox_callable import LoxCallable
+from lox_class import LoxClass
+from lox_function import RETURN, LoxFunction, TailCall
+from lox_instance import LoxInstance
+from native_functions import NativeFunction, error_message
+from rope import STRINGS, concat
+from tokens import TokenType
+
+if TYPE_CHECKING:
+    import interpreter
+    from tokens import Token
+
+Env = Environment | LocalEnvironment
+ExprFn = Callable[[Env], object]
+# Statements return `RETURN` when they ran a `return`.
+StmtFn = Callable[[Env], object]
+
+ARITHMETIC = {
+    TokenType.MINUS: operator.sub,
+    TokenType.STAR: operator.mul,
+    TokenType.GREATER: operator.gt,
+    TokenType.GREATER_EQUAL: operator.ge,
+    TokenType.LESS: operator.lt,
+    TokenType.LESS_EQUAL: operator.le,
+}
+
+
+class CompiledFunction(LoxFunction):
+    __slots__ = ("body",)
+
+    def __init__(
+        self,
+        declaration: st.Function,
+        closure: Env,
+        is_init: bool,
+        body: list[StmtFn],
+    ) -> None:
+        super().__init__(declaration, closure, is_init)
+        self.body = body
+
+    def bind(self, instance: LoxInstance):
+        env = LocalEnvironment(self.closure, [instance])
+        return CompiledFunction(self.declaration, env, self.is_init, self.body)
+
+    def call(
+        self, interpreter: "interpreter.Interpreter", args: list
+    ) -> object:
+        function = self
+        while True:
+            env = LocalEnvironment(function.closure, args)
+            for stmt in function.body:
+                if stmt(env) is RETURN:
+                    break
+            else:
+                if function.is_init:
+                    return function.closure.values[0]
+                return None
+
+            if function.is_init:
+                return function.closure.values[0]
+
+            val = interpreter.return_value
+            if type(val) is not TailCall:
+                return val
+            function, args = val.function, val.args
+
+
+class ClosureCompiler(ex.Visitor, st.Visitor):
+    """Compiles resolved trees into nested closures taking an environment.
+
+    Every node is visited once; operators, resolved depths and constants
+    are captured in the closures so running them needs no further dispatch.
+    """
+
+    def __init__(self, interpreter: "ClosureInterpreter") -> None:
+        self.interpreter = interpreter
+        self.globals_ = interpreter.globals_
+        self.scope_depth = 0
+
+    def compile_expr(self, expr: ex.Expr) -> ExprFn:
+        return expr.accept(self)
+
+    def compile_stmt(self, stmt: st.Stmt) -> StmtFn:
+        return stmt.accept(self)
+
+    def compile_stmts(self, stmts: list[st.Stmt]) -> list[StmtFn]:
+        return [self.compile_stmt(stmt) for stmt in stmts]
+
+    def compile_scope(self, stmts: list[st.Stmt]) -> list[StmtFn]:
+        self.scope_depth += 1
+        body = self.compile_stmts(stmts)
+        self.scope_depth -= 1
+        return body
+
+    def compile_lookup(
+        self, token: "Token", expr: ex.Variable | ex.This
+    ) -> ExprFn:
+        if expr.depth is None:
+            globals_ = self.globals_
+            return lambda env: globals_.get(token)
+
+        distance, slot = expr.depth, expr.slot
+        if distance == 0:
+            return lambda env: env.values[slot]
+        if distance == 1:
+            return lambda env: env.enclosing.values[slot]
+        return lambda env: env.ancestor(distance).values[slot]
+
+    def compile_definition(
+        self, name: str, value: ExprFn
+    ) -> Callable[[Env], None]:
+        if self.scope_depth == 0:
+
+            def define_global(env):
+                env.values[name] = value(env)
+
+            return define_global
+
+        def define_local(env):
+            env.values.append(value(env))
+
+        return define_local
+
+    def compile_function(
+        self, stmt: st.Function, is_init: bool = False
+    ) -> Callable[[Env], CompiledFunction]:
+        body = self.compile_scope(stmt.body)
+        return lambda env: CompiledFunction(stmt, env, is_init, body)
+
+    def visit_block_stmt(self, stmt: st.Block):
+        body = self.compile_scope(stmt.statements)
+
+        def block(env):
+            env = LocalEnvironment(env)
+            for s in body:
+                if s(env) is RETURN:
+                    return RETURN
+
+        return block
+
+    def visit_class_stmt(self, stmt: st.Class):
+        name = stmt.name.lexeme
+        superclass_expr = stmt.superclass
+        get_superclass = None
+        if superclass_expr is not None:
+            get_superclass = self.compile_expr(superclass_expr)
+        methods = {}
+        for method in stmt.methods:
+            method_name = method.name.lexeme
+            methods[method_name] = self.compile_function(
+                method, method_name == "init"
+            )
+
+        def klass(env):
+            superclass = None
+            if get_superclass is not None:
+                superclass = get_superclass(env)
+                if not isinstance(superclass, LoxClass):
+                    raise RuntimeErr(
+                        "Superclass must be a class",
+                        token=superclass_expr.name,
+                    )
+
+            method_env = env
+            if superclass is not None:
+                method_env = LocalEnvironment(env, [superclass])
+
+            env.define(
+                name,
+                LoxClass(
+                    name,
+                    superclass,
+                    {
+                        method_name: make(method_env)
+                        for method_name, make in methods.items()
+                    },
+                ),
+            )
+
+        return klass
+
+    def visit_expression_stmt(self, stmt: st.Expression):
+        return self.compile_expr(stmt.expression)
+
+    def visit_function_stmt(self, stmt: st.Function):
+        return self.compile_definition(
+            stmt.name.lexeme, self.compile_function(stmt)
+        )
+
+    def visit_if_stmt(self, stmt: st.If):
+        condition = self.compile_expr(stmt.condition)
+        then_branch = self.compile_stmt(stmt.then_branch)
+        if stmt.else_branch is None:
+
+            def if_(env):
+                cond = condition(env)
+                if cond is not None and cond is not False:
+                    return then_branch(env)
+
+            return if_
+
+        else_branch = self.compile_stmt(stmt.else_branch)
+
+        def if_else(env):
+            cond = condition(env)
+            if cond is not None and cond is not False:
+                return then_branch(env)
+            return else_branch(env)
+
+        return if_else
+
+    def visit_print_stmt(self, stmt: st.Print):
+        expression = self.compile_expr(stmt.expression)
+        stringfy = self.interpreter.stringfy
+        return lambda env: print(stringfy(expression(env)))
+
+    def visit_return_stmt(self, stmt: st.Return):
+        interpreter = self.interpreter
+        if stmt.val is None:
+
+            def return_nil(env):
+                interpreter.return_value = None
+                return RETURN
+
+            return return_nil
+
+        val = self.compile_expr(stmt.val)
+
+        def return_(env):
+            interpreter.return_value = val(env)
+            return RETURN
+
+        return return_
+
+    def visit_var_stmt(self, stmt: st.Var):
+        initializer = self.visit_literal_expr(ex.Literal(None))
+        if stmt.initializer is not None:
+            initializer = self.compile_expr(stmt.initializer)
+        return self.compile_definition(stmt.name.lexeme, initializer)
+
+    def visit_while_stmt(self, stmt: st.While):
+        condition = self.compile_expr(stmt.condition)
+        body = self.compile_stmt(stmt.body)
+
+        def while_(env):
+            cond = condition(env)
+            while cond is not None and cond is not False:
+                if body(env) is RETURN:
+                    return RETURN
+                cond = condition(env)
+
+        return while_
+
+    def visit_assign_expr(self, expr: ex.Assign):
+        value = self.compile_expr(expr.value)
+        name = expr.name
+        if expr.depth is None:
+            globals_ = self.globals_
+
+            def assign_global(env):
+                val = value(env)
+                globals_.assign(name, val)
+                return val
+
+            return assign_global
+
+        distance, slot = expr.depth, expr.slot
+        if distance == 0:
+
+            def assign_local(env):
+                val = env.values[slot] = value(env)
+                return val
+
+            return assign_local
+
+        def assign(env):
+            val = env.ancestor(distance).values[slot] = value(env)
+            return val
+
+        return assign
+
+    def visit_binary_expr(self, expr: ex.Binary):
+        left = self.compile_expr(expr.left)
+        right = self.compile_expr(expr.right)
+        op = expr.operator
+
+        match op.type:
+            case TokenType.PLUS:
+
+                def add(env):
+                    a = left(env)
+                    b = right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a + b
+                    if isinstance(a, STRINGS) and isinstance(b, STRINGS):
+                        return concat(a, b)
+                    raise RuntimeErr(
+                        "Operands must be two numbers or two strings.",
+                        token=op,
+                    )
+
+                return add
+
+            case TokenType.SLASH | TokenType.MOD:
+                fn = operator.truediv
+                msg = "Division by zero."
+                if op.type == TokenType.MOD:
+                    fn = operator.mod
+                    msg = "Modulo by zero."
+
+                def divide(env):
+                    a = left(env)
+                    b = right(env)
+                    if not (isinstance(a, float) and isinstance(b, float)):
+                        raise RuntimeErr("Operands must be numbers.", token=op)
+                    try:
+                        return fn(a, b)
+                    except ZeroDivisionError:
+                        raise RuntimeErr(msg, token=op)
+
+                return divide
+
+            case TokenType.EQUAL_EQUAL:
+                return lambda env: left(env) == right(env)
+
+            case TokenType.BANG_EQUAL:
+                return lambda env: left(env) != right(env)
+
+        fn = ARITHMETIC[op.type]
+
+        def arithmetic(env):
+            a = left(env)
+            b = right(env)
+            if isinstance(a, float) and isinstance(b, float):
+                return fn(a, b)
+            raise RuntimeErr("Operands must be numbers.", token=op)
+
+        return arithmetic
+
+    def visit_call_expr(self, expr: ex.Call):
+        callee = self.compile_expr(expr.callee)
+        args = [self.compile_expr(arg) for arg in expr.args]
+        count = len(args)
+        paren = expr.paren
+        interpreter = self.interpreter
+
+        tail = expr.tail
+
+        def call(env):
+            function = callee(env)
+            values = [arg(env) for arg in args]
+            if function.__class__ is NativeFunction:
+                try:
+                    return function.invoke(values)
+                except Exception as e:
+                    raise RuntimeErr(error_message(e), token=paren)
+
+            try:
+                arity = function.arity()
+            except AttributeError:
+                # Checked only here, as `isinstance` with an ABC is slow.
+                if isinstance(function, LoxCallable):
+                    raise
+                raise RuntimeErr(
+                    "Can only call functions and classes.", token=paren
+                )
+            if count != arity:
+                raise RuntimeErr(
+                    f"Expected {arity} arguments got {count}.",
+                    token=paren,
+                )
+            if tail and isinstance(function, CompiledFunction):
+                return TailCall(function, values)
+
+            if interpreter.call_depth == interpreter.max_call_depth:
+                raise RuntimeErr("Stack overflow.", token=paren)
+            interpreter.call_depth += 1
+            try:
+                return function.call(interpreter, values)
+            except RuntimeErr:
+                raise
+            except RecursionError:
+                raise RuntimeErr("Stack overflow.", token=paren)
+            except Exception as e:
+                raise RuntimeErr(error_message(e), token=paren)
+            finally:
+                interpreter.call_depth -= 1
+
+        return call
+
+    def visit_get_expr(self, expr: ex.Get):
+        obj = self.compile_expr(expr.obj)
+        name = expr.name
+
+        def get(env):
+            instance = obj(env)
+            if isinstance(instance, LoxInstance):
+                return instance.get(name, expr)
+            raise RuntimeErr("Only instances have properties.", token=name)
+
+        return get
+
+    def visit_grouping_expr(self, expr: ex.Grouping):
+        return self.compile_expr(expr.expression)
+
+    def visit_index_expr(self, expr: ex.Index):
+        obj = self.compile_expr(expr.obj)
+        index = self.compile_expr(expr.index)
+        bracket = expr.bracket
+
+        def get_index(env):
+            array = obj(env)
+            position = index(env)
+            try:
+                return get_item(array, position)
+            except ArrayError as e:
+                raise RuntimeErr(e.args[0], token=bracket)
+
+        return get_index
+
+    def visit_literal_expr(self, expr: ex.Literal):
+        value = expr.value
+        return lambda env: value
+
+    def visit_set_expr(self, expr: ex.Set):
+        obj = self.compile_expr(expr.obj)
+        value = self.compile_expr(expr.value)
+        name = expr.name
+
+        def set_(env):
+            instance = obj(env)
+            if not isinstance(instance, LoxInstance):
+                raise RuntimeErr("Only instances have properties.", token=name)
+            val = value(env)
+            instance.set(name.lexeme, val, expr)
+            return val
+
+        return set_
+
+    def visit_setindex_expr(self, expr: ex.SetIndex):
+        obj = self.compile_expr(expr.obj)
+        index = self.compile_expr(expr.index)
+        value = self.compile_expr(expr.value)
+        bracket = expr.bracket
+
+        def set_index(env):
+            array = obj(env)
+            position = index(env)
+            val = value(env)
+            try:
+                return set_item(array, position, val)
+            except ArrayError as e:
+                raise RuntimeErr(e.args[0], token=bracket)
+
+        return set_index
+
+    def visit_super_expr(self, expr: ex.Super):
+        distance = expr.depth
+        method = expr.method
+
+        def super_(env):
+            superclass = env.ancestor(distance).values[0]
+            obj = env.ancestor(distance - 1).values[0]
+            if superclass is expr.cache_key:
+                found = expr.cache_value
+            else:
+                found = inline_cache.lookup(
+                    expr,
+                    superclass,
+                    method.lexeme,
+                    inline_cache.find_method,
+                )
+            if found is None:
+                raise RuntimeErr(
+                    "Undefined property '" + method.lexeme + "'.",
+                    token=method,
+                )
+            return found.bind(obj)
+
+        return super_
+
+    def visit_this_expr(self, expr: ex.This):
+        return self.compile_lookup(expr.keyword, expr)
+
+    def visit_logical_expr(self, expr: ex.Logical):
+        left = self.compile_expr(expr.left)
+        right = self.compile_expr(expr.right)
+
+        if expr.operator.type == TokenType.AND:
+
+            def and_(env):
+                val = left(env)
+                if val is None or val is False:
+                    return val
+                return right(env)
+
+            return and_
+
+        def or_(env):
+            val = left(env)
+            if val is not None and val is not False:
+                return val
+            return right(env)
+
+        return or_
+
+    def visit_unary_expr(self, expr: ex.Unary):
+        right = self.compile_expr(expr.right)
+        op = expr.operator
+
+        if op.type == TokenType.BANG:
+
+            def not_(env):
+                val = right(env)
+                return val is None or val is False
+
+            return not_
+
+        def negate(env):
+            val = right(env)
+            if isinstance(val, float):
+                return -val
+            raise RuntimeErr("Operand must be a number.", token=op)
+
+        return negate
+
+    def visit_variable_expr(self, expr: ex.Variable):
+        return self.compile_lookup(expr.name, expr)
+
+
+class ClosureInterpreter(Interpreter):
+    """Runs programs by compiling them with `ClosureCompiler` first."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.compiler = ClosureCompiler(self)
+
+    def interpret(self, statements: list[st.Stmt]):
+        try:
+            for stmt in self.compiler.compile_stmts(statements):
+                stmt(self.globals_)
+        except RuntimeErr as error:
+            ErrorHandler.runtime_error(error)
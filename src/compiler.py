@@ -0,0 +1,400 @@
+import expr as ex
+import stmt as st
+from bytecode import FunctionProto, OpCode
+from error_handler import ErrorHandler
+from lox_function import FunctionType
+from tokens import TokenType
+
+MAX_UNIT = 0xFFFF
+
+BINARY_OPS = {
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.STAR: OpCode.MULTIPLY,
+    TokenType.SLASH: OpCode.DIVIDE,
+    TokenType.MOD: OpCode.MODULO,
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+}
+
+
+class Local:
+    __slots__ = "name", "depth", "is_captured"
+
+    def __init__(self, name: str, depth: int) -> None:
+        self.name = name
+        self.depth = depth
+        self.is_captured = False
+
+
+class FunctionState:
+    """Book-keeping for the function currently being compiled."""
+
+    def __init__(
+        self,
+        enclosing: "FunctionState | None",
+        function: FunctionProto,
+        type: FunctionType,
+    ) -> None:
+        self.enclosing = enclosing
+        self.function = function
+        self.type = type
+        self.scope_depth = 0
+        self.upvalues: list[tuple[int, bool]] = []
+
+        # Slot zero holds the receiver in methods and the callee otherwise.
+        slot_zero = ""
+        if type in (FunctionType.METHOD, FunctionType.INITIALIZER):
+            slot_zero = "this"
+        self.locals = [Local(slot_zero, 0)]
+
+
+class Compiler(ex.Visitor, st.Visitor):
+    """Lowers a resolved syntax tree into bytecode for the `VM`.
+
+    Variables the `Resolver` left without a depth refer to globals,
+    everything else is found in the locals or upvalues of the enclosing
+    functions.
+    """
+
+    def __init__(self) -> None:
+        self.state: FunctionState
+        self.line = 0
+
+    def compile(self, statements: list[st.Stmt]) -> FunctionProto:
+        self.state = FunctionState(None, FunctionProto(""), FunctionType.NONE)
+        for stmt in statements:
+            stmt.accept(self)
+        self.emit_return()
+        return self.state.function
+
+    def emit(self, *units: int) -> None:
+        chunk = self.state.function.chunk
+        for unit in units:
+            chunk.write(unit, self.line)
+
+    def emit_jump(self, op: OpCode) -> int:
+        self.emit(op, MAX_UNIT)
+        return len(self.state.function.chunk.code) - 1
+
+    def patch_jump(self, offset: int) -> None:
+        code = self.state.function.chunk.code
+        jump = len(code) - offset - 1
+        if jump > MAX_UNIT:
+            ErrorHandler.error(self.line, "Too much code to jump over.")
+        code[offset] = jump & MAX_UNIT
+
+    def emit_loop(self, start: int) -> None:
+        self.emit(OpCode.LOOP)
+        offset = len(self.state.function.chunk.code) - start + 1
+        if offset > MAX_UNIT:
+            ErrorHandler.error(self.line, "Loop body too large.")
+        self.emit(offset & MAX_UNIT)
+
+    def emit_return(self) -> None:
+        if self.state.type == FunctionType.INITIALIZER:
+            self.emit(OpCode.GET_LOCAL, 0)
+        else:
+            self.emit(OpCode.NIL)
+        self.emit(OpCode.RETURN)
+
+    def make_constant(self, value) -> int:
+        index = self.state.function.chunk.add_constant(value)
+        if index > MAX_UNIT:
+            ErrorHandler.error(self.line, "Too many constants in one chunk.")
+            return 0
+        return index
+
+    def begin_scope(self) -> None:
+        self.state.scope_depth += 1
+
+    def end_scope(self) -> None:
+        state = self.state
+        state.scope_depth -= 1
+        locals_ = state.locals
+        while locals_ and locals_[-1].depth > state.scope_depth:
+            if locals_.pop().is_captured:
+                self.emit(OpCode.CLOSE_UPVALUE)
+            else:
+                self.emit(OpCode.POP)
+
+    def declare_variable(self, name: str) -> None:
+        if self.state.scope_depth > 0:
+            self.state.locals.append(Local(name, self.state.scope_depth))
+
+    def define_variable(self, name: str) -> None:
+        if self.state.scope_depth == 0:
+            self.emit(OpCode.DEFINE_GLOBAL, self.make_constant(name))
+
+    @staticmethod
+    def resolve_local(state: FunctionState, name: str) -> int | None:
+        for i in range(len(state.locals) - 1, -1, -1):
+            if state.locals[i].name == name:
+                return i
+        return None
+
+    def resolve_upvalue(self, state: FunctionState, name: str) -> int | None:
+        if state.enclosing is None:
+            return None
+
+        local = self.resolve_local(state.enclosing, name)
+        if local is not None:
+            state.enclosing.locals[local].is_captured = True
+            return self.add_upvalue(state, local, True)
+
+        upvalue = self.resolve_upvalue(state.enclosing, name)
+        if upvalue is not None:
+            return self.add_upvalue(state, upvalue, False)
+
+        return None
+
+    @staticmethod
+    def add_upvalue(state: FunctionState, index: int, is_local: bool) -> int:
+        upvalue = (index, is_local)
+        if upvalue in state.upvalues:
+            return state.upvalues.index(upvalue)
+        state.upvalues.append(upvalue)
+        state.function.upvalue_count = len(state.upvalues)
+        return len(state.upvalues) - 1
+
+    def named_variable(self, name: str, is_global: bool, assign: bool):
+        if not is_global:
+            slot = self.resolve_local(self.state, name)
+            if slot is not None:
+                self.emit(
+                    OpCode.SET_LOCAL if assign else OpCode.GET_LOCAL, slot
+                )
+                return
+
+            slot = self.resolve_upvalue(self.state, name)
+            if slot is not None:
+                op = OpCode.SET_UPVALUE if assign else OpCode.GET_UPVALUE
+                self.emit(op, slot)
+                return
+
+        op = OpCode.SET_GLOBAL if assign else OpCode.GET_GLOBAL
+        self.emit(op, self.make_constant(name))
+
+    def function(self, stmt: st.Function, type: FunctionType) -> None:
+        self.line = stmt.name.line
+        function = FunctionProto(stmt.name.lexeme, len(stmt.params))
+        self.state = FunctionState(self.state, function, type)
+        self.begin_scope()
+        for param in stmt.params:
+            self.declare_variable(param.lexeme)
+        for body_stmt in stmt.body:
+            body_stmt.accept(self)
+        self.emit_return()
+
+        state = self.state
+        self.state = state.enclosing
+        self.line = stmt.name.line
+        self.emit(OpCode.CLOSURE, self.make_constant(function))
+        for index, is_local in state.upvalues:
+            self.emit(int(is_local), index)
+
+    def visit_block_stmt(self, stmt: st.Block):
+        self.begin_scope()
+        for inner in stmt.statements:
+            inner.accept(self)
+        self.end_scope()
+
+    def visit_class_stmt(self, stmt: st.Class):
+        name = stmt.name.lexeme
+        is_global = self.state.scope_depth == 0
+        self.line = stmt.name.line
+        self.declare_variable(name)
+        self.emit(OpCode.CLASS, self.make_constant(name))
+        self.define_variable(name)
+
+        if stmt.superclass is not None:
+            stmt.superclass.accept(self)
+            self.begin_scope()
+            self.declare_variable("super")
+            self.named_variable(name, is_global, assign=False)
+            self.line = stmt.superclass.name.line
+            self.emit(OpCode.INHERIT)
+
+        self.named_variable(name, is_global, assign=False)
+        for method in stmt.methods:
+            type = FunctionType.METHOD
+            if method.name.lexeme == "init":
+                type = FunctionType.INITIALIZER
+            self.function(method, type)
+            self.emit(OpCode.METHOD, self.make_constant(method.name.lexeme))
+        self.emit(OpCode.POP)
+
+        if stmt.superclass is not None:
+            self.end_scope()
+
+    def visit_expression_stmt(self, stmt: st.Expression):
+        stmt.expression.accept(self)
+        self.emit(OpCode.POP)
+
+    def visit_function_stmt(self, stmt: st.Function):
+        self.declare_variable(stmt.name.lexeme)
+        self.function(stmt, FunctionType.FUNCTION)
+        self.define_variable(stmt.name.lexeme)
+
+    def visit_if_stmt(self, stmt: st.If):
+        stmt.condition.accept(self)
+        then_jump = self.emit_jump(OpCode.POP_JUMP_IF_FALSE)
+        stmt.then_branch.accept(self)
+
+        if stmt.else_branch is None:
+            self.patch_jump(then_jump)
+            return
+
+        else_jump = self.emit_jump(OpCode.JUMP)
+        self.patch_jump(then_jump)
+        stmt.else_branch.accept(self)
+        self.patch_jump(else_jump)
+
+    def visit_print_stmt(self, stmt: st.Print):
+        stmt.expression.accept(self)
+        self.emit(OpCode.PRINT)
+
+    def visit_return_stmt(self, stmt: st.Return):
+        self.line = stmt.keyword.line
+        if stmt.val is None:
+            self.emit_return()
+            return
+
+        stmt.val.accept(self)
+        self.emit(OpCode.RETURN)
+
+    def visit_var_stmt(self, stmt: st.Var):
+        if stmt.initializer is None:
+            self.emit(OpCode.NIL)
+        else:
+            stmt.initializer.accept(self)
+        self.line = stmt.name.line
+        self.declare_variable(stmt.name.lexeme)
+        self.define_variable(stmt.name.lexeme)
+
+    def visit_while_stmt(self, stmt: st.While):
+        start = len(self.state.function.chunk.code)
+        stmt.condition.accept(self)
+        exit_jump = self.emit_jump(OpCode.POP_JUMP_IF_FALSE)
+        stmt.body.accept(self)
+        self.emit_loop(start)
+        self.patch_jump(exit_jump)
+
+    def visit_assign_expr(self, expr: ex.Assign):
+        expr.value.accept(self)
+        self.line = expr.name.line
+        is_global = expr.depth is None
+        self.named_variable(expr.name.lexeme, is_global, assign=True)
+
+    def visit_binary_expr(self, expr: ex.Binary):
+        expr.left.accept(self)
+        expr.right.accept(self)
+        self.line = expr.operator.line
+        self.emit(BINARY_OPS[expr.operator.type])
+
+    def visit_call_expr(self, expr: ex.Call):
+        callee = expr.callee
+        if expr.tail and not isinstance(callee, ex.Super):
+            # Tail calls give their frame to the callee, which takes a
+            # plain callee on the stack, bound methods included.
+            callee.accept(self)
+            op = OpCode.TAIL_CALL
+        elif isinstance(callee, ex.Get):
+            callee.obj.accept(self)
+            name = self.make_constant(callee.name.lexeme)
+            op = OpCode.INVOKE
+        elif isinstance(callee, ex.Super):
+            self.named_variable("this", False, assign=False)
+            name = self.make_constant(callee.method.lexeme)
+            op = OpCode.SUPER_INVOKE
+        else:
+            callee.accept(self)
+            op = OpCode.CALL
+
+        for arg in expr.args:
+            arg.accept(self)
+
+        if op == OpCode.SUPER_INVOKE:
+            self.named_variable("super", False, assign=False)
+
+        self.line = expr.paren.line
+        if op in (OpCode.CALL, OpCode.TAIL_CALL):
+            self.emit(op, len(expr.args))
+        else:
+            self.emit(op, name, len(expr.args))
+
+    def visit_get_expr(self, expr: ex.Get):
+        expr.obj.accept(self)
+        self.line = expr.name.line
+        self.emit(OpCode.GET_PROPERTY, self.make_constant(expr.name.lexeme))
+
+    def visit_grouping_expr(self, expr: ex.Grouping):
+        expr.expression.accept(self)
+
+    def visit_index_expr(self, expr: ex.Index):
+        expr.obj.accept(self)
+        expr.index.accept(self)
+        self.line = expr.bracket.line
+        self.emit(OpCode.GET_INDEX)
+
+    def visit_literal_expr(self, expr: ex.Literal):
+        if expr.value is None:
+            self.emit(OpCode.NIL)
+        elif expr.value is True:
+            self.emit(OpCode.TRUE)
+        elif expr.value is False:
+            self.emit(OpCode.FALSE)
+        else:
+            self.emit(OpCode.CONSTANT, self.make_constant(expr.value))
+
+    def visit_set_expr(self, expr: ex.Set):
+        expr.obj.accept(self)
+        expr.value.accept(self)
+        self.line = expr.name.line
+        self.emit(OpCode.SET_PROPERTY, self.make_constant(expr.name.lexeme))
+
+    def visit_setindex_expr(self, expr: ex.SetIndex):
+        expr.obj.accept(self)
+        expr.index.accept(self)
+        expr.value.accept(self)
+        self.line = expr.bracket.line
+        self.emit(OpCode.SET_INDEX)
+
+    def visit_super_expr(self, expr: ex.Super):
+        self.line = expr.keyword.line
+        self.named_variable("this", False, assign=False)
+        self.named_variable("super", False, assign=False)
+        self.line = expr.method.line
+        self.emit(OpCode.GET_SUPER, self.make_constant(expr.method.lexeme))
+
+    def visit_this_expr(self, expr: ex.This):
+        self.line = expr.keyword.line
+        self.named_variable("this", False, assign=False)
+
+    def visit_logical_expr(self, expr: ex.Logical):
+        expr.left.accept(self)
+        self.line = expr.operator.line
+        if expr.operator.type == TokenType.AND:
+            jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+        else:
+            jump = self.emit_jump(OpCode.JUMP_IF_TRUE)
+        self.emit(OpCode.POP)
+        expr.right.accept(self)
+        self.patch_jump(jump)
+
+    def visit_unary_expr(self, expr: ex.Unary):
+        expr.right.accept(self)
+        self.line = expr.operator.line
+        if expr.operator.type == TokenType.MINUS:
+            self.emit(OpCode.NEGATE)
+        else:
+            self.emit(OpCode.NOT)
+
+    def visit_variable_expr(self, expr: ex.Variable):
+        self.line = expr.name.line
+        is_global = expr.depth is None
+        self.named_variable(expr.name.lexeme, is_global, assign=False)
@@ -3,6 +3,8 @@ from tokens import Token
 
 
 class Environment:
+    __slots__ = "enclosing", "values"
+
     def __init__(self, enclosing: "Environment | None" = None) -> None:
         self.enclosing: Environment | None = enclosing
         self.values: dict[str, object] = {}
@@ -10,14 +12,6 @@ class Environment:
     def define(self, name: str, val):
         self.values[name] = val
 
-    def ancestor(self, distance: int):
-        env = self
-        for _ in range(distance):
-            if env.enclosing is None:
-                break
-            env = env.enclosing
-        return env
-
     def get(self, name: Token):
         if name.lexeme in self.values:
             return self.values[name.lexeme]
@@ -27,9 +21,6 @@ class Environment:
 
         raise RuntimeErr(f"Undefined variable '{name.lexeme}'.", token=name)
 
-    def get_at(self, distance: int, name: str):
-        return self.ancestor(distance).values.get(name)
-
     def assign(self, name: Token, val):
         if name.lexeme in self.values:
             self.values[name.lexeme] = val
@@ -40,5 +31,37 @@ class Environment:
 
         raise RuntimeErr(f"Undefined variable '{name.lexeme}'.", token=name)
 
-    def assign_at(self, distance: int, name: Token, val):
-        self.ancestor(distance).values[name.lexeme] = val
+
+class LocalEnvironment:
+    """Environment of a block, call or bound method.
+
+    The resolver numbers the variables of every local scope in declaration
+    order, so values live in a list indexed by those slots instead of a
+    dict keyed by name.
+    """
+
+    __slots__ = "enclosing", "values"
+
+    def __init__(
+        self,
+        enclosing: "LocalEnvironment | Environment",
+        values: list | None = None,
+    ) -> None:
+        self.enclosing = enclosing
+        self.values: list = [] if values is None else values
+
+    def define(self, name: str, val):
+        # Declarations run in slot order, the name is only kept for globals.
+        self.values.append(val)
+
+    def ancestor(self, distance: int):
+        env = self
+        for _ in range(distance):
+            env = env.enclosing
+        return env
+
+    def get_at(self, distance: int, slot: int):
+        return self.ancestor(distance).values[slot]
+
+    def assign_at(self, distance: int, slot: int, val):
+        self.ancestor(distance).values[slot] = val
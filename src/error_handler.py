@@ -1,4 +1,6 @@
+import contextlib
 import sys
+from typing import Iterator
 
 from tokens import Token, TokenType
 
@@ -6,6 +8,20 @@ from tokens import Token, TokenType
 class ErrorHandler:
     had_error: bool = False
     had_runtime_error: bool = False
+    # Errors as (line, where, message) while `collect` is running.
+    collected: list[tuple[int, str, str]] | None = None
+
+    @classmethod
+    @contextlib.contextmanager
+    def collect(cls) -> Iterator[list[tuple[int, str, str]]]:
+        """Gathers the errors reported in the block instead of printing
+        them."""
+        outer = cls.collected
+        cls.collected = []
+        try:
+            yield cls.collected
+        finally:
+            cls.collected = outer
 
     @classmethod
     def runtime_error(cls, error: "RuntimeErr"):
@@ -23,8 +39,16 @@ class ErrorHandler:
             cls.report(where, "", msg)
 
     @classmethod
-    def report(cls, line: int, where: str, msg: str) -> None:
-        print(f"[Line {line}] Error {where}: {msg}", file=sys.stderr)
+    def report(
+        cls, line: int, where: str, msg: str, path: str | None = None
+    ) -> None:
+        if cls.collected is not None:
+            cls.collected.append((line, where, msg))
+            return
+        prefix = "" if path is None else f"{path}: "
+        if line:
+            prefix += f"[Line {line}] "
+        print(f"{prefix}Error {where}: {msg}", file=sys.stderr)
         cls.had_error = True
 
 
@@ -32,11 +56,6 @@ class ParseErr(RuntimeError):
     pass
 
 
-class Return(RuntimeError):
-    def __init__(self, val) -> None:
-        self.val = val
-
-
 class RuntimeErr(RuntimeError):
     def __init__(self, *args: object, token) -> None:
         super().__init__(*args)
@@ -27,6 +27,10 @@ class Visitor(ABC, Generic[V]):
     def visit_grouping_expr(self, expr: "Grouping") -> V:
         ...
 
+    @abstractmethod
+    def visit_index_expr(self, expr: "Index") -> V:
+        ...
+
     @abstractmethod
     def visit_literal_expr(self, expr: "Literal") -> V:
         ...
@@ -39,6 +43,10 @@ class Visitor(ABC, Generic[V]):
     def visit_set_expr(self, expr: "Set") -> V:
         ...
 
+    @abstractmethod
+    def visit_setindex_expr(self, expr: "SetIndex") -> V:
+        ...
+
     @abstractmethod
     def visit_super_expr(self, expr: "Super") -> V:
         ...
@@ -57,50 +65,69 @@ class Visitor(ABC, Generic[V]):
 
 
 class Expr(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def accept(self, visitor: Visitor[V]) -> V:
         ...
 
 
 class Assign(Expr):
+    __slots__ = "name", "value", "depth", "slot"
+
     def __init__(self, name: Token, value: Expr):
         self.name: Token = name
         self.value: Expr = value
+        self.depth = None
+        self.slot = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_assign_expr(self)
 
 
 class Binary(Expr):
+    __slots__ = "left", "operator", "right", "deopts"
+
     def __init__(self, left: Expr, operator: Token, right: Expr):
         self.left: Expr = left
         self.operator: Token = operator
         self.right: Expr = right
+        self.deopts = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_binary_expr(self)
 
 
 class Call(Expr):
+    __slots__ = "callee", "paren", "args", "tail"
+
     def __init__(self, callee: Expr, paren: Token, args: list[Expr]):
         self.callee: Expr = callee
         self.paren: Token = paren
         self.args: list[Expr] = args
+        self.tail = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_call_expr(self)
 
 
 class Get(Expr):
+    __slots__ = "obj", "name", "cache_key", "cache_value", "cache_entries"
+
     def __init__(self, obj: Expr, name: Token):
         self.obj: Expr = obj
         self.name: Token = name
+        self.cache_key = None
+        self.cache_value = None
+        self.cache_entries = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_get_expr(self)
 
 
 class Grouping(Expr):
+    __slots__ = ("expression",)
+
     def __init__(self, expression: Expr):
         self.expression: Expr = expression
 
@@ -108,7 +135,21 @@ class Grouping(Expr):
         return visitor.visit_grouping_expr(self)
 
 
+class Index(Expr):
+    __slots__ = "obj", "bracket", "index"
+
+    def __init__(self, obj: Expr, bracket: Token, index: Expr):
+        self.obj: Expr = obj
+        self.bracket: Token = bracket
+        self.index: Expr = index
+
+    def accept(self, visitor: Visitor):
+        return visitor.visit_index_expr(self)
+
+
 class Literal(Expr):
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -117,6 +158,8 @@ class Literal(Expr):
 
 
 class Logical(Expr):
+    __slots__ = "left", "operator", "right"
+
     def __init__(self, left: Expr, operator: Token, right: Expr):
         self.left: Expr = left
         self.operator: Token = operator
@@ -127,44 +170,95 @@ class Logical(Expr):
 
 
 class Set(Expr):
+    __slots__ = (
+        "obj",
+        "name",
+        "value",
+        "cache_key",
+        "cache_value",
+        "cache_entries",
+    )
+
     def __init__(self, obj: Expr, name: Token, value: Expr):
         self.obj: Expr = obj
         self.name: Token = name
         self.value: Expr = value
+        self.cache_key = None
+        self.cache_value = None
+        self.cache_entries = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_set_expr(self)
 
 
+class SetIndex(Expr):
+    __slots__ = "obj", "bracket", "index", "value"
+
+    def __init__(self, obj: Expr, bracket: Token, index: Expr, value: Expr):
+        self.obj: Expr = obj
+        self.bracket: Token = bracket
+        self.index: Expr = index
+        self.value: Expr = value
+
+    def accept(self, visitor: Visitor):
+        return visitor.visit_setindex_expr(self)
+
+
 class Super(Expr):
+    __slots__ = (
+        "keyword",
+        "method",
+        "depth",
+        "slot",
+        "cache_key",
+        "cache_value",
+        "cache_entries",
+    )
+
     def __init__(self, keyword: Token, method: Token):
         self.keyword: Token = keyword
         self.method: Token = method
+        self.depth = None
+        self.slot = None
+        self.cache_key = None
+        self.cache_value = None
+        self.cache_entries = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_super_expr(self)
 
 
 class This(Expr):
+    __slots__ = "keyword", "depth", "slot"
+
     def __init__(self, keyword: Token):
         self.keyword: Token = keyword
+        self.depth = None
+        self.slot = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_this_expr(self)
 
 
 class Unary(Expr):
+    __slots__ = "operator", "right", "deopts"
+
     def __init__(self, operator: Token, right: Expr):
         self.operator: Token = operator
         self.right: Expr = right
+        self.deopts = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_unary_expr(self)
 
 
 class Variable(Expr):
+    __slots__ = "name", "depth", "slot"
+
     def __init__(self, name: Token):
         self.name: Token = name
+        self.depth = None
+        self.slot = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_variable_expr(self)
@@ -0,0 +1,231 @@
+"""Incremental front end for sessions and documents that get edited.
+
+A `Document` keeps its source split into segments: runs of whole lines
+holding one top-level declaration, or several when they share a line. Each
+segment keeps its tokens, its statements, resolved in place, and the errors
+found in it. An edit replaces a range of lines, and only the segments it
+touches are scanned, parsed and resolved again; those after it are reused
+as they are, their lines shifted if the edit added or removed some.
+
+Top-level declarations parse independently of each other, except that a
+declaration left unfinished (an unclosed block or string) runs into the
+ones after it, and an `else` continues the `if` statement before it. Both
+leave a syntax error next to the border of the lines parsed again, which
+then grows a segment at a time until the error is settled. Globals aren't
+resolved, so resolving a segment never depends on another one.
+"""
+
+import bisect
+from parser import Parser
+
+import stmt as st
+from error_handler import ErrorHandler
+from resolver import Resolver
+from scanner import RegexScanner
+from tokens import Token, TokenType
+
+# Errors as they are passed to `ErrorHandler.report`: line, where, message.
+Diagnostic = tuple[int, str, str]
+
+
+def first_line(token: Token) -> int:
+    """Returns the line a token starts on, counting lines from 0."""
+    if token.type == TokenType.STRING:
+        # Strings can span lines, and their tokens hold the last one.
+        return token.line - 1 - token.lexeme.count("\n")
+    return token.line - 1
+
+
+class Segment:
+    __slots__ = (
+        "start",
+        "end",
+        "moved",
+        "_tokens",
+        "_statements",
+        "_errors",
+    )
+
+    def __init__(self, start: int, end: int) -> None:
+        # Lines, counting from 0, with `end` past the last one.
+        self.start = start
+        self.end = end
+        # Lines the tokens and errors have yet to be moved by.
+        self.moved = 0
+        self._tokens: list[Token] = []
+        self._statements: list[st.Stmt | None] = []
+        self._errors: list[Diagnostic] = []
+
+    @property
+    def tokens(self) -> list[Token]:
+        self.settle()
+        return self._tokens
+
+    @property
+    def statements(self) -> list[st.Stmt | None]:
+        """Returns the top-level declarations, `None` for those with a
+        syntax error."""
+        self.settle()
+        return self._statements
+
+    @property
+    def errors(self) -> list[Diagnostic]:
+        self.settle()
+        return self._errors
+
+    def fails_first(self) -> bool:
+        return bool(self.statements) and self.statements[0] is None
+
+    def fails_last(self) -> bool:
+        if self.statements and self.statements[-1] is None:
+            return True
+        # An unterminated string takes in the lines up to the end, where
+        # the scanner reports it.
+        return any(
+            line == self.end and where == "" for line, where, _ in self.errors
+        )
+
+    def is_incomplete(self) -> bool:
+        """Tells if the segment only fails because its source ends too
+        early."""
+        return any(where == " at end" for _, where, _ in self.errors)
+
+    def resolve(self, statements: list[st.Stmt]) -> None:
+        with ErrorHandler.collect() as errors:
+            Resolver().resolve_stmts(statements)
+        self._errors += errors
+
+    def shift(self, lines: int) -> None:
+        self.start += lines
+        self.end += lines
+        # Most segments are shifted many times before they are looked at
+        # again, so their contents are only moved once they are.
+        self.moved += lines
+
+    def settle(self) -> None:
+        if not self.moved:
+            return
+        # Tokens are shared with the statements, which report runtime
+        # errors on their lines.
+        for token in self._tokens:
+            token.line += self.moved
+        self._errors = [
+            (line + self.moved, where, msg) for line, where, msg in self._errors
+        ]
+        self.moved = 0
+
+
+class Document:
+    def __init__(self, source: str = "") -> None:
+        self.lines: list[str] = []
+        self.segments: list[Segment] = []
+        self.edit(0, 0, source)
+
+    @property
+    def source(self) -> str:
+        return "\n".join(self.lines)
+
+    @property
+    def statements(self) -> list[st.Stmt]:
+        """Returns the statements of the whole document, which can only be
+        run if it has no errors."""
+        return [
+            statement
+            for segment in self.segments
+            for statement in segment.statements
+            if statement is not None
+        ]
+
+    @property
+    def errors(self) -> list[Diagnostic]:
+        return [error for segment in self.segments for error in segment.errors]
+
+    def edit(self, start: int, end: int, text: str) -> list[Segment]:
+        """Replaces lines `start` to `end` (excluded) with the lines of
+        `text`, returning the segments that were parsed again."""
+        lines = text.splitlines()
+        shift = len(lines) - (end - start)
+        self.lines[start:end] = lines
+
+        # Segments touched by the edit, from `first` to `last` (excluded).
+        first = bisect.bisect_right(self.segments, start, key=lambda s: s.end)
+        last = bisect.bisect_left(self.segments, end, key=lambda s: s.start)
+        if first < last:
+            start = self.segments[first].start
+            end = self.segments[last - 1].end
+
+        while True:
+            segments = self.parse(start, end + shift)
+            head = segments[0] if segments else None
+            tail = segments[-1] if segments else None
+            if first > 0 and (
+                head is not None
+                and head.fails_first()
+                or self.segments[first - 1].fails_last()
+            ):
+                first -= 1
+                start = self.segments[first].start
+            elif last < len(self.segments) and (
+                tail is not None
+                and tail.fails_last()
+                or self.segments[last].fails_first()
+            ):
+                end = self.segments[last].end
+                last += 1
+            else:
+                break
+
+        if shift:
+            for segment in self.segments[last:]:
+                segment.shift(shift)
+        self.segments[first:last] = segments
+        return segments
+
+    def parse(self, start: int, end: int) -> list[Segment]:
+        """Scans, parses and resolves lines `start` to `end` (excluded)
+        into segments covering all of them."""
+        if start == end:
+            return []
+
+        with ErrorHandler.collect() as errors:
+            scanner = RegexScanner("\n".join(self.lines[start:end]))
+            scanner.line = start + 1
+            tokens = scanner.scan_tokens()
+
+            segments: list[Segment] = []
+            # Declarations parsed without errors, by segment.
+            valid: list[list[st.Stmt]] = []
+            parser = Parser(tokens)
+            while not parser.is_at_end():
+                line = first_line(parser.peek())
+                reported = len(errors)
+                statement = parser.declaration()
+                if not segments or line >= segments[-1].end:
+                    # Lines before the declaration go with it.
+                    begin = segments[-1].end if segments else start
+                    segments.append(Segment(begin, line + 1))
+                    valid.append([])
+                segment = segments[-1]
+                segment.statements.append(statement)
+                segment.end = max(segment.end, parser.previous().line)
+                if len(errors) == reported:
+                    valid[-1].append(statement)
+
+        if segments:
+            segments[-1].end = end
+        else:
+            segments.append(Segment(start, end))
+
+        # Each token and error goes to the first segment ending after its
+        # line.
+        ends = [segment.end for segment in segments]
+        for token in tokens[:-1]:
+            index = bisect.bisect_right(ends, first_line(token))
+            segments[index].tokens.append(token)
+        for error in errors:
+            index = bisect.bisect_right(ends, error[0] - 1)
+            segments[min(index, len(segments) - 1)].errors.append(error)
+
+        for segment, statements in zip(segments, valid):
+            segment.resolve(statements)
+        return segments
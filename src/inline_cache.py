@@ -0,0 +1,63 @@
+"""Inline caches for the lookups done at `Get`, `Set` and `Super` sites.
+
+Every site remembers the last key it looked something up for in its
+`cache_key`/`cache_value` fields, so engines check `key is
+site.cache_key` before calling `lookup` here. Keys are the `Shape` of
+an instance, or the `LoxClass` itself when there is no shape to go by.
+Sites that see a few keys also keep them in `cache_entries`; after
+`POLYMORPHIC_LIMIT` keys the site is megamorphic and stops caching new
+ones.
+
+Shapes never change once created and neither do the methods of a class,
+while redefining a class creates a new `LoxClass` with new shapes, so
+cached entries never go stale: a redefined class simply misses on its new
+identity.
+"""
+
+from typing import TYPE_CHECKING, Callable, TypeVar
+
+if TYPE_CHECKING:
+    import expr as ex
+    from lox_class import LoxClass
+    from lox_function import LoxFunction
+
+K = TypeVar("K")
+T = TypeVar("T")
+
+POLYMORPHIC_LIMIT = 4
+MEGAMORPHIC = "megamorphic"
+
+
+def lookup(
+    site: "ex.Get | ex.Set | ex.Super",
+    key: K,
+    name: str,
+    resolve: Callable[[K, str], T],
+) -> T:
+    """Resolves `name` for `key` at a site whose monomorphic entry
+    missed, caching the result."""
+    entries = site.cache_entries
+    if entries is MEGAMORPHIC:
+        return resolve(key, name)
+
+    if entries is not None and key in entries:
+        value = entries[key]
+    else:
+        value = resolve(key, name)
+        if site.cache_key is not None:
+            if entries is None:
+                entries = site.cache_entries = {
+                    site.cache_key: site.cache_value
+                }
+            if len(entries) == POLYMORPHIC_LIMIT:
+                site.cache_entries = MEGAMORPHIC
+                return value
+            entries[key] = value
+
+    site.cache_key = key
+    site.cache_value = value
+    return value
+
+
+def find_method(klass: "LoxClass", name: str) -> "LoxFunction | None":
+    return klass.find_method(name)
@@ -1,12 +1,22 @@
+from parser import Parser
+
 import expr as ex
-import native_functions
+import inline_cache
+import quickening
 import stmt as st
-from environment import Environment
-from error_handler import ErrorHandler, Return, RuntimeErr
+from environment import Environment, LocalEnvironment
+from error_handler import ErrorHandler, ParseErr, RuntimeErr
+from lox_array import ArrayError, LoxArray, get_item, set_item
+from lox_callable import LoxCallable
 from lox_class import LoxClass
-from lox_function import LoxFunction
+from lox_function import MAX_CALL_DEPTH, RETURN, LoxFunction, TailCall
 from lox_instance import LoxInstance
+from lox_map import LoxMap
+from native_functions import NativeFunction, built_ins, error_message
+from resolver import Resolver
+from rope import STRINGS, concat
 from tokens import TokenType
+from vector import Vector
 
 
 class Interpreter(ex.Visitor, st.Visitor):
@@ -15,10 +25,14 @@ class Interpreter(ex.Visitor, st.Visitor):
     def __init__(self) -> None:
         self.env = self.globals_
         self._define_built_ins()
-        self.locals: dict[ex.Expr, int] = {}
+        # Value of the last `return` executed, read by the function call
+        # its `RETURN` completion propagates to.
+        self.return_value = None
+        self.call_depth = 0
+        self.max_call_depth = MAX_CALL_DEPTH
 
     def _define_built_ins(self):
-        for name, func in native_functions.built_ins.items():
+        for name, func in built_ins.items():
             self.globals_.define(name, func)
 
     def interpret(self, statements: list[st.Stmt]):
@@ -32,23 +46,45 @@ class Interpreter(ex.Visitor, st.Visitor):
         return expr.accept(self)
 
     def execute(self, stmt: st.Stmt):
-        stmt.accept(self)
-
-    def resolve(self, expr: ex.Expr, depth: int):
-        self.locals[expr] = depth
+        """Runs a statement, returning `RETURN` if it ran a `return`."""
+        return stmt.accept(self)
+
+    def load_body(self, function: st.Function) -> None:
+        """Parses and resolves the body of a function declared lazily, on
+        its first call."""
+        lazy = function.lazy
+        with ErrorHandler.collect() as errors:
+            try:
+                body = Parser(lazy.tokens, lazy=True).block()
+            except ParseErr:
+                pass
+            if not errors:
+                Resolver().resolve_lazy_function(function, body)
+
+        if errors:
+            for error in errors:
+                ErrorHandler.report(*error)
+            # Left to fail the same way on the next call.
+            function.body = []
+            function.lazy = lazy
+            raise RuntimeErr(
+                f"Can't call '{function.name.lexeme}', its body has errors.",
+                token=function.name,
+            )
 
     def execute_block(self, statements, environment):
         previous = self.env
         try:
             self.env = environment
             for stmt in statements:
-                self.execute(stmt)
+                if stmt.accept(self) is RETURN:
+                    return RETURN
         finally:
             self.env = previous
+        return None
 
     def visit_block_stmt(self, stmt: st.Block):
-        self.execute_block(stmt.statements, Environment(self.env))
-        return None
+        return self.execute_block(stmt.statements, LocalEnvironment(self.env))
 
     def visit_class_stmt(self, stmt: st.Class):
         superclass = None
@@ -59,22 +95,17 @@ class Interpreter(ex.Visitor, st.Visitor):
                     "Superclass must be a class", token=stmt.superclass.name
                 )
 
-        self.env.define(stmt.name.lexeme, None)
-
+        method_env = self.env
         if superclass is not None:
-            self.env = Environment(self.env)
-            self.env.define("super", superclass)
+            method_env = LocalEnvironment(self.env, [superclass])
 
         methods = {}
         for method in stmt.methods:
             name = method.name.lexeme
-            methods[name] = LoxFunction(method, self.env, name == "init")
+            methods[name] = LoxFunction(method, method_env, name == "init")
 
         klass = LoxClass(stmt.name.lexeme, superclass, methods)
-        if superclass is not None and self.env.enclosing is not None:
-            self.env = self.env.enclosing
-
-        self.env.assign(stmt.name, klass)
+        self.env.define(stmt.name.lexeme, klass)
         return None
 
     def visit_expression_stmt(self, stmt: st.Expression):
@@ -90,9 +121,9 @@ class Interpreter(ex.Visitor, st.Visitor):
         condition = self.evaluate(stmt.condition)
 
         if self.truthy(condition):
-            self.execute(stmt.then_branch)
+            return self.execute(stmt.then_branch)
         elif stmt.else_branch is not None:
-            self.execute(stmt.else_branch)
+            return self.execute(stmt.else_branch)
         return None
 
     def visit_print_stmt(self, stmt: st.Print):
@@ -104,7 +135,8 @@ class Interpreter(ex.Visitor, st.Visitor):
         if stmt.val is not None:
             val = self.evaluate(stmt.val)
 
-        raise Return(val)
+        self.return_value = val
+        return RETURN
 
     def visit_var_stmt(self, stmt: st.Var):
         val = None
@@ -116,14 +148,14 @@ class Interpreter(ex.Visitor, st.Visitor):
 
     def visit_while_stmt(self, stmt: st.While):
         while self.truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.body)
+            if self.execute(stmt.body) is RETURN:
+                return RETURN
         return None
 
     def visit_assign_expr(self, expr: ex.Assign):
         val = self.evaluate(expr.value)
-        distance = self.locals.get(expr)
-        if distance is not None:
-            self.env.assign_at(distance, expr.name, val)
+        if expr.depth is not None:
+            self.env.assign_at(expr.depth, expr.slot, val)
         else:
             self.globals_.assign(expr.name, val)
 
@@ -132,40 +164,45 @@ class Interpreter(ex.Visitor, st.Visitor):
     def visit_binary_expr(self, expr: ex.Binary):
         left = self.evaluate(expr.left)
         right = self.evaluate(expr.right)
+        quickening.specialise_binary(expr, left, right)
+        return self.binary(expr, left, right)
 
+    def binary(self, expr: ex.Binary, left, right):
         match expr.operator.type:
             case TokenType.PLUS:
-                self.check_numstr_ops(TokenType.PLUS, left, right)
-                return left + right
+                self.check_numstr_ops(expr.operator, left, right)
+                if left.__class__ is float:
+                    return left + right
+                return concat(left, right)
             case TokenType.MINUS:
-                self.check_number_ops(TokenType.MINUS, left, right)
+                self.check_number_ops(expr.operator, left, right)
                 return left - right
             case TokenType.STAR:
-                self.check_number_ops(TokenType.STAR, left, right)
+                self.check_number_ops(expr.operator, left, right)
                 return left * right
             case TokenType.SLASH:
-                self.check_number_ops(TokenType.SLASH, left, right)
+                self.check_number_ops(expr.operator, left, right)
                 try:
                     return left / right
                 except ZeroDivisionError:
                     raise RuntimeErr("Division by zero.", token=expr.operator)
             case TokenType.MOD:
-                self.check_number_ops(TokenType.MOD, left, right)
+                self.check_number_ops(expr.operator, left, right)
                 try:
                     return left % right
                 except ZeroDivisionError:
                     raise RuntimeErr("Modulo by zero.", token=expr.operator)
             case TokenType.GREATER:
-                self.check_number_ops(TokenType.GREATER, left, right)
+                self.check_number_ops(expr.operator, left, right)
                 return left > right
             case TokenType.GREATER_EQUAL:
-                self.check_number_ops(TokenType.GREATER_EQUAL, left, right)
+                self.check_number_ops(expr.operator, left, right)
                 return left >= right
             case TokenType.LESS:
-                self.check_number_ops(TokenType.LESS, left, right)
+                self.check_number_ops(expr.operator, left, right)
                 return left < right
             case TokenType.LESS_EQUAL:
-                self.check_number_ops(TokenType.LESS_EQUAL, left, right)
+                self.check_number_ops(expr.operator, left, right)
                 return left <= right
             case TokenType.EQUAL_EQUAL:
                 return left == right
@@ -174,29 +211,91 @@ class Interpreter(ex.Visitor, st.Visitor):
 
         return None  # Unreachable
 
+    def visit_float_binary_expr(self, expr: quickening.FloatBinary):
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        if type(left) is float and type(right) is float:
+            return expr.op(left, right)
+        quickening.despecialise(expr)
+        return self.binary(expr, left, right)
+
+    def visit_float_division_expr(self, expr: quickening.FloatDivision):
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        if type(left) is float and type(right) is float and right:
+            return expr.op(left, right)
+        quickening.despecialise(expr)
+        return self.binary(expr, left, right)
+
+    def visit_string_concat_expr(self, expr: quickening.StringConcat):
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        if type(left) in STRINGS and type(right) in STRINGS:
+            return concat(left, right)
+        quickening.despecialise(expr)
+        return self.binary(expr, left, right)
+
+    def visit_equality_expr(self, expr: quickening.Equality):
+        return expr.op(expr.left.accept(self), expr.right.accept(self))
+
     def visit_call_expr(self, expr: ex.Call):
         callee = self.evaluate(expr.callee)
         args = [self.evaluate(arg) for arg in expr.args]
-        if len(args) != callee.arity():
+        if callee.__class__ is NativeFunction:
+            try:
+                return callee.invoke(args)
+            except Exception as e:
+                raise RuntimeErr(error_message(e), token=expr.paren)
+
+        try:
+            arity = callee.arity()
+        except AttributeError:
+            # Checked only here, as `isinstance` with an ABC is slow.
+            if isinstance(callee, LoxCallable):
+                raise
+            raise RuntimeErr(
+                "Can only call functions and classes.", token=expr.paren
+            )
+        if len(args) != arity:
             raise RuntimeErr(
-                f"Expected {callee.arity()} arguments got {len(args)}.",
+                f"Expected {arity} arguments got {len(args)}.",
                 token=expr.paren,
             )
+        if expr.tail and isinstance(callee, LoxFunction):
+            return TailCall(callee, args)
+
+        if self.call_depth == self.max_call_depth:
+            raise RuntimeErr("Stack overflow.", token=expr.paren)
+        self.call_depth += 1
         try:
             return callee.call(self, args)
+        except RuntimeErr:
+            raise
+        except RecursionError:
+            raise RuntimeErr("Stack overflow.", token=expr.paren)
         except Exception as e:
-            raise RuntimeErr(e.args[0], token=expr.paren)
+            raise RuntimeErr(error_message(e), token=expr.paren)
+        finally:
+            self.call_depth -= 1
 
     def visit_get_expr(self, expr: ex.Get):
         obj = self.evaluate(expr.obj)
         if isinstance(obj, LoxInstance):
-            return obj.get(expr.name)
+            return obj.get(expr.name, expr)
 
         raise RuntimeErr("Only instances have properties.", token=expr.name)
 
     def visit_grouping_expr(self, expr: ex.Grouping):
         return self.evaluate(expr.expression)
 
+    def visit_index_expr(self, expr: ex.Index):
+        obj = self.evaluate(expr.obj)
+        index = self.evaluate(expr.index)
+        try:
+            return get_item(obj, index)
+        except ArrayError as e:
+            raise RuntimeErr(e.args[0], token=expr.bracket)
+
     def visit_literal_expr(self, expr: ex.Literal):
         return expr.value
 
@@ -207,18 +306,35 @@ class Interpreter(ex.Visitor, st.Visitor):
             raise RuntimeErr("Only instances have properties.", token=expr.name)
 
         val = self.evaluate(expr.value)
-        obj.set(expr.name, val)
+        obj.set(expr.name.lexeme, val, expr)
         return val
 
+    def visit_setindex_expr(self, expr: ex.SetIndex):
+        obj = self.evaluate(expr.obj)
+        index = self.evaluate(expr.index)
+        val = self.evaluate(expr.value)
+        try:
+            return set_item(obj, index, val)
+        except ArrayError as e:
+            raise RuntimeErr(e.args[0], token=expr.bracket)
+
     def visit_super_expr(self, expr: ex.Super):
-        distance = self.locals[expr]
-        superclass = self.env.get_at(distance, "super")
-        obj = self.env.get_at(distance - 1, "this")
+        distance = expr.depth
+        superclass = self.env.get_at(distance, 0)
+        obj = self.env.get_at(distance - 1, 0)
 
         assert isinstance(superclass, LoxClass)
         assert isinstance(obj, LoxInstance)
 
-        method = superclass.find_method(expr.method.lexeme)
+        if superclass is expr.cache_key:
+            method = expr.cache_value
+        else:
+            method = inline_cache.lookup(
+                expr,
+                superclass,
+                expr.method.lexeme,
+                inline_cache.find_method,
+            )
         if method is None:
             raise RuntimeErr(
                 "Undefined property '" + expr.method.lexeme + "'.",
@@ -240,23 +356,36 @@ class Interpreter(ex.Visitor, st.Visitor):
 
     def visit_unary_expr(self, expr: ex.Unary):
         right = self.evaluate(expr.right)
+        quickening.specialise_unary(expr, right)
+        return self.unary(expr, right)
 
+    def unary(self, expr: ex.Unary, right):
         match expr.operator.type:
             case TokenType.MINUS:
-                self.check_number_op(TokenType.MINUS, right)
+                self.check_number_op(expr.operator, right)
                 return -right
             case TokenType.BANG:
                 return not self.truthy(right)
 
         return None  # Unreachable
 
+    def visit_float_negate_expr(self, expr: quickening.FloatNegate):
+        right = expr.right.accept(self)
+        if type(right) is float:
+            return -right
+        quickening.despecialise(expr)
+        return self.unary(expr, right)
+
+    def visit_not_expr(self, expr: quickening.Not):
+        right = expr.right.accept(self)
+        return right is None or right is False
+
     def visit_variable_expr(self, expr: ex.Variable):
         return self.lookup_variable(expr.name, expr)
 
-    def lookup_variable(self, name, expr: ex.Expr):
-        distance = self.locals.get(expr)
-        if distance is not None:
-            return self.env.get_at(distance, name.lexeme)
+    def lookup_variable(self, name, expr: ex.Variable | ex.This):
+        if expr.depth is not None:
+            return self.env.get_at(expr.depth, expr.slot)
         else:
             return self.globals_.get(name)
 
@@ -270,6 +399,8 @@ class Interpreter(ex.Visitor, st.Visitor):
             return "nil"
         if isinstance(val, float) and val.is_integer():
             return str(int(val))
+        if isinstance(val, (LoxArray, LoxMap, Vector)):
+            return val.to_string(Interpreter.stringfy)
         return str(val)
 
     @staticmethod
@@ -288,7 +419,7 @@ class Interpreter(ex.Visitor, st.Visitor):
     def check_numstr_ops(operator, left, right):
         if isinstance(left, float) and isinstance(right, float):
             return
-        if isinstance(left, str) and isinstance(right, str):
+        if isinstance(left, STRINGS) and isinstance(right, STRINGS):
             return
         raise RuntimeErr(
             "Operands must be two numbers or two strings.", token=operator
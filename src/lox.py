@@ -1,39 +1,148 @@
+import argparse
+import functools
+import mmap
+import os
 import pathlib
 import sys
+import threading
 from parser import Parser
+from typing import Callable, Iterable
 
-from error_handler import ErrorHandler
+import program_cache
+import project
+import stmt as st
+from closure_compiler import ClosureInterpreter
+from error_handler import ErrorHandler, ParseErr
+from incremental import Document
 from interpreter import Interpreter
+from lox_function import MAX_CALL_DEPTH
+from optimizer import Optimizer
 from resolver import Resolver
-from scanner import Scanner
+from scanner import RegexScanner, Scanner, read_chunks
+from tokens import TokenType
+from transpiler import PythonInterpreter
+from vm import VM
+
+ENGINES = {
+    "tree": Interpreter,
+    "closure": ClosureInterpreter,
+    "vm": VM,
+    "python": PythonInterpreter,
+}
+
+SCANNERS = {"regex": RegexScanner, "char": Scanner}
+
+# Python frames a Lox call can take up in the tree-walking interpreter.
+PYTHON_FRAMES_PER_CALL = 50
+# C stack a Python frame can take up, in bytes. Frames of Python code called
+# from C, as by `pickle` or when making instances, take up to about 800.
+C_STACK_PER_FRAME = 1024
 
 interpreter = Interpreter()
+optimization_level = 0
+scanner_type = RegexScanner
+streaming = False
+lazy_bodies = False
+cache_dir: pathlib.Path | None = None
 
 
-def run(content: str) -> None:
-    scanner = Scanner(content)
+def parse(content: str) -> list[st.Stmt] | None:
+    """Scans, parses and resolves a program, returning `None` if it has a
+    syntax error."""
+    scanner = scanner_type(content)
     tokens = scanner.scan_tokens()
 
-    parser = Parser(tokens)
+    parser = Parser(tokens, lazy=lazy_bodies)
     statements = parser.parse(can_be_expr=True)
 
     # Stop if there was a syntax error.
     if ErrorHandler.had_error:
-        return
+        return None
 
     # TODO: check if there is problem between env and global
-    resolver = Resolver(interpreter)
+    resolver = Resolver()
     resolver.resolve_stmts(statements)
 
     if ErrorHandler.had_error:
-        return
+        return None
+
+    return statements
+
+
+def run(content: str, cache_dir: pathlib.Path | None = None) -> None:
+    program = None
+    if cache_dir is not None:
+        digest = program_cache.source_hash(content)
+        program = program_cache.load(cache_dir, digest, lazy_bodies)
+
+    if program is None:
+        program = parse(content)
+        if program is None:
+            return
+        if cache_dir is not None:
+            program_cache.store(cache_dir, digest, program, lazy_bodies)
+
+    execute(program)
+
+
+def execute(statements: list[st.Stmt]) -> None:
+    """Runs resolved statements, optimizing them first if asked to."""
+    if optimization_level > 0:
+        optimizer = Optimizer(optimization_level)
+        statements = optimizer.optimize(statements)
+        print(f"Optimizer removed {optimizer.removed} nodes.", file=sys.stderr)
 
     interpreter.interpret(statements)
 
 
+def run_stream(chunks: Iterable[str]) -> None:
+    """Runs each top-level declaration as soon as it is parsed, scanning
+    the source a chunk at a time."""
+    removed = 0
+    parser = Parser(RegexScanner(chunks).iter_tokens(), lazy=lazy_bodies)
+    for statement in parser.declarations():
+        # Past a syntax error, declarations are only parsed to report
+        # their own errors.
+        if ErrorHandler.had_error:
+            continue
+
+        Resolver().resolve_stmts([statement])
+        if ErrorHandler.had_error:
+            continue
+
+        statements = [statement]
+        if optimization_level > 0:
+            optimizer = Optimizer(optimization_level)
+            statements = optimizer.optimize(statements)
+            removed += optimizer.removed
+
+        interpreter.interpret(statements)
+        if ErrorHandler.had_runtime_error:
+            break
+
+    if optimization_level > 0:
+        print(f"Optimizer removed {removed} nodes.", file=sys.stderr)
+
+
+def stream_file(path: pathlib.Path) -> None:
+    if str(path) == "-":
+        run_stream(read_chunks(sys.stdin))
+        return
+
+    with path.open(mode="rb") as f:
+        # Empty files can't be mapped.
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            run_stream(read_chunks(source))
+
+
 def run_file(path: pathlib.Path) -> None:
-    with path.open(mode="r") as f:
-        run(f.read())
+    if streaming:
+        stream_file(path)
+    else:
+        with path.open(mode="r") as f:
+            run(f.read(), cache_dir)
 
     if ErrorHandler.had_error:
         exit(65)
@@ -42,22 +151,221 @@ def run_file(path: pathlib.Path) -> None:
         exit(70)
 
 
+def check_scripts(paths: list[pathlib.Path], jobs: int | None) -> None:
+    """Scans, parses and resolves scripts without running them, reporting
+    the errors of all of them."""
+    scripts = project.find_scripts(paths)
+    failed = 0
+    # Trees arriving from the workers are unpickled, then dropped or cached.
+    with program_cache.gc_paused():
+        for checked in project.check(scripts, jobs):
+            for error in checked.errors:
+                ErrorHandler.report(*error, path=str(checked.path))
+            if checked.statements is None:
+                failed += 1
+            elif cache_dir is not None:
+                program_cache.store(
+                    cache_dir, checked.source_hash, checked.statements
+                )
+
+    print(
+        f"Checked {len(scripts)} scripts, {failed} with errors.",
+        file=sys.stderr,
+    )
+    if failed:
+        exit(65)
+
+
 def run_prompt() -> None:
-    while line := input("> "):
-        run(line)
+    # Inputs are added to the session as they are read, so only the lines
+    # of the current one are parsed again as it grows.
+    session = Document()
+    start = 0  # First line of the current input.
+    while line := input("... " if start < len(session.lines) else "> "):
+        end = len(session.lines)
+        session.edit(end, end, line)
+        segments = [s for s in session.segments if s.end > start]
+        errors = [error for segment in segments for error in segment.errors]
+
+        if segments[0].start < start:
+            # Declarations run as soon as they are complete, so they can't
+            # be continued, like an `if` by an `else` on the next input.
+            ErrorHandler.error(start + 1, "Expect a new declaration.")
+            session.edit(start, len(session.lines), "")
+        elif not errors:
+            for segment in segments:
+                execute(segment.statements)
+        elif statements := parse_expression(session.lines[start:]):
+            # Expressions are printed, and don't stay in the session.
+            execute(statements)
+            session.edit(start, len(session.lines), "")
+        elif any(segment.is_incomplete() for segment in segments):
+            # Read the rest of the declaration.
+            continue
+        else:
+            for error in errors:
+                ErrorHandler.report(*error)
+            session.edit(start, len(session.lines), "")
+
+        start = len(session.lines)
         ErrorHandler.had_error = False
 
 
+def parse_expression(lines: list[str]) -> list[st.Stmt] | None:
+    """Parses a prompt input as an expression to print, returning `None`
+    if it isn't one."""
+    with ErrorHandler.collect() as errors:
+        tokens = scanner_type("\n".join(lines)).scan_tokens()
+        if len(tokens) < 2 or tokens[-2].type in (
+            TokenType.SEMICOLON,
+            TokenType.RIGHT_BRACE,
+        ):
+            return None
+        try:
+            statements = Parser(tokens).parse(can_be_expr=True)
+        except ParseErr:
+            return None
+        if not errors:
+            Resolver().resolve_stmts(statements)
+    if errors:
+        return None
+    return statements
+
+
 def main(args: list[str]) -> None:
-    if len(args) > 1:
-        print("Too many arguments")
-        exit(64)
+    arg_parser = argparse.ArgumentParser(prog="lox")
+    arg_parser.add_argument("script", nargs="?", type=pathlib.Path)
+    arg_parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="tree",
+        help="execution engine (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--scanner",
+        choices=SCANNERS,
+        default="regex",
+        help="scan with one regular expression or a character at a time "
+        "(default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="run each declaration of the script as soon as it is parsed, "
+        "reading it incrementally ('-' reads standard input)",
+    )
+    arg_parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="parse and resolve function bodies when they are first called, "
+        "reporting most errors in a body only then, if ever; --check always "
+        "parses them (tree engine only)",
+    )
+    arg_parser.add_argument(
+        "--check",
+        nargs="+",
+        type=pathlib.Path,
+        metavar="PATH",
+        help="scan, parse and resolve scripts, and the scripts in "
+        "directories, in parallel without running them",
+    )
+    arg_parser.add_argument(
+        "--jobs",
+        type=int,
+        help="processes checking scripts at once (default: one per core)",
+    )
+    arg_parser.add_argument(
+        "--cache-dir",
+        type=pathlib.Path,
+        help="directory caching scripts once parsed and resolved, reused "
+        "until they change",
+    )
+    arg_parser.add_argument(
+        "-O",
+        dest="optimization_level",
+        type=int,
+        choices=range(3),
+        default=0,
+        help="optimization level: 1 folds constants and removes dead "
+        "branches, 2 also propagates constant locals (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=MAX_CALL_DEPTH,
+        help="number of nested calls before a stack overflow "
+        "(default: %(default)s)",
+    )
+    options = arg_parser.parse_args(args)
+    if options.lazy and options.engine != "tree":
+        arg_parser.error("--lazy requires --engine tree")
+    if options.check and options.script is not None:
+        arg_parser.error("--check takes the scripts to check")
+    if options.max_depth < 1:
+        arg_parser.error("argument --max-depth: must be at least 1")
 
-    elif len(args) == 1:
-        run_file(pathlib.Path(args[0]))
+    global interpreter, optimization_level, scanner_type, streaming
+    global cache_dir, lazy_bodies
+    interpreter = ENGINES[options.engine]()
+    optimization_level = options.optimization_level
+    scanner_type = SCANNERS[options.scanner]
+    streaming = options.stream
+    cache_dir = options.cache_dir
+    lazy_bodies = options.lazy
+    interpreter.max_call_depth = options.max_depth
+    recursion_limit = max(
+        sys.getrecursionlimit(), options.max_depth * PYTHON_FRAMES_PER_CALL
+    )
 
+    if options.check:
+        action = functools.partial(check_scripts, options.check, options.jobs)
+    elif options.script is not None:
+        action = functools.partial(run_file, options.script)
     else:
-        run_prompt()
+        action = run_prompt
+
+    try:
+        sys.setrecursionlimit(recursion_limit)
+        # The main thread's stack only holds a fraction of that many
+        # frames, and overflowing it crashes Python instead of raising
+        # RecursionError.
+        wait = start_with_stack(action, recursion_limit * C_STACK_PER_FRAME)
+    except (OverflowError, ValueError, RuntimeError):
+        arg_parser.error(
+            f"argument --max-depth: {options.max_depth} calls need a larger "
+            "stack than a thread can have"
+        )
+    wait()
+
+
+def start_with_stack(
+    action: Callable[[], None], stack_size: int
+) -> Callable[[], None]:
+    """Starts running `action` on a thread with a stack of `stack_size`
+    bytes, returning a function that waits for it to end and raises what
+    it raised, `SystemExit` included, in the calling thread."""
+    raised: list[BaseException] = []
+
+    def target() -> None:
+        try:
+            action()
+        except BaseException as e:
+            raised.append(e)
+
+    threading.stack_size(stack_size)
+    try:
+        # A daemon, so that interrupting the wait below ends the program.
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+    finally:
+        threading.stack_size(0)
+
+    def wait() -> None:
+        thread.join()
+        if raised:
+            raise raised[0]
+
+    return wait
 
 
 if __name__ == "__main__":
@@ -0,0 +1,72 @@
+from array import array
+from typing import Iterator
+
+from lox_container import LoxContainer
+from vector import Vector
+
+# Longest array `array(size)` can make. Each element takes a pointer, and
+# once set usually an object of its own, so arrays are kept far shorter than
+# vectors, which hold unboxed numbers.
+MAX_ARRAY_LENGTH = 2**24
+
+
+class ArrayError(Exception):
+    """Raised by array operations with the message of the runtime error to
+    report, which each engine raises at the token or line it knows."""
+
+
+class LoxArray(LoxContainer):
+    """Array value, a growable list of Lox values.
+
+    Arrays are objects like instances: assigning one shares it, and `==`
+    tells whether two arrays are the same one rather than comparing their
+    elements.
+    """
+
+    __slots__ = ("elements",)
+
+    OPEN = "["
+    CLOSE = "]"
+
+    def __init__(self, elements: list) -> None:
+        self.elements = elements
+
+    def parts(self) -> Iterator[tuple[str, object]]:
+        separator = ""
+        for val in self.elements:
+            yield separator, val
+            separator = ", "
+
+
+def items(obj) -> list | array:
+    """Returns the elements of an array, or the numbers of a vector."""
+    cls = obj.__class__
+    if cls is LoxArray:
+        return obj.elements
+    if cls is Vector:
+        return obj.values
+    raise ArrayError("Only arrays can be indexed.")
+
+
+def position(index, length: int) -> int:
+    """Returns the element index `index` stands for, which must be a whole
+    number below `length`."""
+    if index.__class__ is not float or not index.is_integer():
+        raise ArrayError("Array index must be an integer.")
+    position = int(index)
+    if not 0 <= position < length:
+        raise ArrayError("Array index out of range.")
+    return position
+
+
+def get_item(obj, index):
+    elements = items(obj)
+    return elements[position(index, len(elements))]
+
+
+def set_item(obj, index, val):
+    elements = items(obj)
+    if obj.__class__ is Vector and val.__class__ is not float:
+        raise ArrayError("Vectors can only hold numbers.")
+    elements[position(index, len(elements))] = val
+    return val
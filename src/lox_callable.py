@@ -6,6 +6,8 @@ if TYPE_CHECKING:
 
 
 class LoxCallable(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def arity(self) -> int:
         ...
@@ -4,12 +4,16 @@ from typing import TYPE_CHECKING
 from lox_callable import LoxCallable
 from lox_function import LoxFunction
 from lox_instance import LoxInstance
+from shape import Shape
 
 if TYPE_CHECKING:
     import interpreter
 
 ClassType = Enum("ClassType", "NONE, CLASS, SUBCLASS")
 
+# Marks a class whose initializer has not been looked up yet.
+UNKNOWN = object()
+
 
 class LoxClass(LoxCallable):
     def __init__(
@@ -21,9 +25,23 @@ class LoxClass(LoxCallable):
         self.name = name
         self.superclass = superclass
         self.methods = methods
+        # Shape of instances without fields, the root of all their shapes.
+        self.shape = Shape(self)
+        self.init = UNKNOWN
+
+    def initializer(self):
+        """Returns the `init` method, looked up on the first call.
+
+        The VM adds methods to a class after making it, but always before
+        anything can call it.
+        """
+        init = self.init
+        if init is UNKNOWN:
+            init = self.init = self.find_method("init")
+        return init
 
     def arity(self) -> int:
-        initializer = self.find_method("init")
+        initializer = self.initializer()
         if initializer is not None:
             return initializer.arity()
         return 0
@@ -32,7 +50,7 @@ class LoxClass(LoxCallable):
         self, interpreter: "interpreter.Interpreter", args: list
     ) -> object:
         instance = LoxInstance(self)
-        initializer = self.find_method("init")
+        initializer = self.initializer()
         if initializer is not None:
             initializer.bind(instance).call(interpreter, args)
         return instance
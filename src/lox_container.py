@@ -0,0 +1,54 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Iterator
+
+
+class LoxContainer(ABC):
+    """Base of the values holding other Lox values, arrays and maps, which
+    are turned into strings by walking them with an explicit stack so that
+    deeply nested ones don't overflow Python's."""
+
+    __slots__ = ()
+
+    OPEN = ""
+    CLOSE = ""
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        _containers.add(cls)
+
+    @abstractmethod
+    def parts(self) -> Iterator[tuple[str, object]]:
+        """Yields the values held, each with the text that goes before it."""
+
+    def to_string(self, stringfy: Callable[[object], str]) -> str:
+        out = [self.OPEN]
+        # Containers holding themselves, directly or not, are shown as
+        # `[...]` or `{...}` where they repeat rather than looping forever.
+        printing = {self}
+        # Looked up rather than tested with `isinstance`, which is slow with
+        # abstract classes.
+        containers = _containers
+        stack = [(self, self.parts())]
+        while stack:
+            container, parts = stack[-1]
+            for text, val in parts:
+                out.append(text)
+                if val.__class__ not in containers:
+                    out.append(stringfy(val))
+                elif val in printing:
+                    out.append(f"{val.OPEN}...{val.CLOSE}")
+                else:
+                    # Carries on with `container` once `val` is done.
+                    printing.add(val)
+                    stack.append((val, val.parts()))
+                    out.append(val.OPEN)
+                    break
+            else:
+                stack.pop()
+                printing.discard(container)
+                out.append(container.CLOSE)
+        return "".join(out)
+
+
+# Subclasses of `LoxContainer`, added as they are declared.
+_containers: set[type[LoxContainer]] = set()
@@ -1,8 +1,7 @@
 from enum import Enum
 from typing import TYPE_CHECKING
 
-from environment import Environment
-from error_handler import Return
+from environment import Environment, LocalEnvironment
 from lox_callable import LoxCallable
 
 if TYPE_CHECKING:
@@ -12,12 +11,32 @@ if TYPE_CHECKING:
 
 FunctionType = Enum("FunctionType", "NONE, FUNCTION, INITIALIZER, METHOD")
 
+# Completion of a statement that ran a `return`, propagated by the blocks
+# and loops enclosing it up to the function call.
+RETURN = object()
+
+# Lox calls that can be in progress at once before "Stack overflow.".
+MAX_CALL_DEPTH = 10_000
+
+
+class TailCall:
+    """Call in tail position, returned in place of its result for the
+    function returning it to make once its own frame is gone."""
+
+    __slots__ = "function", "args"
+
+    def __init__(self, function: "LoxFunction", args: list) -> None:
+        self.function = function
+        self.args = args
+
 
 class LoxFunction(LoxCallable):
+    __slots__ = "declaration", "closure", "is_init"
+
     def __init__(
         self,
         declaration: "stmt.Function",
-        closure: Environment,
+        closure: Environment | LocalEnvironment,
         is_init: bool = False,
     ) -> None:
         self.declaration = declaration
@@ -28,27 +47,34 @@ class LoxFunction(LoxCallable):
         return len(self.declaration.params)
 
     def bind(self, instance: "lox_instance.LoxInstance"):
-        env = Environment(self.closure)
-        env.define("this", instance)
+        env = LocalEnvironment(self.closure, [instance])
         return LoxFunction(self.declaration, env, self.is_init)
 
     def call(
         self, interpreter: "interpreter.Interpreter", args: list
     ) -> object:
-        env = Environment(self.closure)
-        for param, arg in zip(self.declaration.params, args):
-            env.define(param.lexeme, arg)
-        try:
-            interpreter.execute_block(self.declaration.body, env)
-        except Return as e:
-            if self.is_init:
-                return self.closure.get_at(0, "this")
-            return e.val
-
-        if self.is_init:
-            return self.closure.get_at(0, "this")
-
-        return None
+        function = self
+        while True:
+            if function.declaration.lazy is not None:
+                interpreter.load_body(function.declaration)
+
+            # Parameters take the first slots, in the order the args are
+            # given.
+            env = LocalEnvironment(function.closure, args)
+            completion = interpreter.execute_block(
+                function.declaration.body, env
+            )
+
+            if function.is_init:
+                return function.closure.get_at(0, 0)
+
+            if completion is not RETURN:
+                return None
+
+            val = interpreter.return_value
+            if type(val) is not TailCall:
+                return val
+            function, args = val.function, val.args
 
     def __str__(self) -> str:
         return f"<fn {self.declaration.name.lexeme}>"
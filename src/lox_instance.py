@@ -1,24 +1,106 @@
+from typing import TYPE_CHECKING
+
+import inline_cache
 from error_handler import RuntimeErr
+from shape import Shape
 from tokens import Token
 
+if TYPE_CHECKING:
+    import expr as ex
+    from lox_class import LoxClass
+
 
 class LoxInstance:
-    def __init__(self, klass) -> None:
+    """Instance of a Lox class.
+
+    Fields are stored in `values` at the indices given by `shape`. An
+    instance that outgrows `shape.MAX_FIELDS` drops its shape and keeps its
+    fields in the `fields` dict instead.
+    """
+
+    __slots__ = "klass", "shape", "values", "fields"
+
+    def __init__(self, klass: "LoxClass") -> None:
         self.klass = klass
-        self.fields: dict[str, object] = {}
+        self.shape: Shape | None = klass.shape
+        self.values: list = []
+        self.fields: dict[str, object] | None = None
+
+    def get(self, name: Token, site: "ex.Get | None" = None):
+        shape = self.shape
+        if shape is None:
+            return self.get_from_dict(name, site)
+
+        if site is None:
+            found = shape.lookup(name.lexeme)
+        elif shape is site.cache_key:
+            found = site.cache_value
+        else:
+            found = inline_cache.lookup(site, shape, name.lexeme, Shape.lookup)
+
+        if found.__class__ is int:
+            return self.values[found]
+        if found is not None:
+            return found.bind(self)
 
-    def get(self, name: Token):
+        raise RuntimeErr(f"Undefined property '{name.lexeme}'.", token=name)
+
+    def get_from_dict(self, name: Token, site: "ex.Get | None"):
         if name.lexeme in self.fields:
             return self.fields[name.lexeme]
 
-        method = self.klass.find_method(name.lexeme)
+        klass = self.klass
+        if site is None:
+            method = klass.find_method(name.lexeme)
+        elif klass is site.cache_key:
+            method = site.cache_value
+        else:
+            method = inline_cache.lookup(
+                site, klass, name.lexeme, inline_cache.find_method
+            )
+
         if method is not None:
             return method.bind(self)
 
         raise RuntimeErr(f"Undefined property '{name.lexeme}'.", token=name)
 
-    def set(self, name: Token, val):
-        self.fields[name.lexeme] = val
+    def field(self, name: str, default=None):
+        """Returns the field `name`, or `default` if there is none."""
+        shape = self.shape
+        if shape is None:
+            return self.fields.get(name, default)
+
+        index = shape.slots.get(name)
+        if index is None:
+            return default
+        return self.values[index]
+
+    def set(self, name: str, val, site: "ex.Set | None" = None):
+        shape = self.shape
+        if shape is None:
+            self.fields[name] = val
+            return
+
+        if site is None:
+            found = shape.transition(name)
+        elif shape is site.cache_key:
+            found = site.cache_value
+        else:
+            found = inline_cache.lookup(site, shape, name, Shape.transition)
+
+        if found is None:
+            self.fields = dict(zip(shape.slots, self.values))
+            self.fields[name] = val
+            self.shape = None
+            self.values = []
+            return
+
+        index, next_shape = found
+        if next_shape is shape:
+            self.values[index] = val
+        else:
+            self.values.append(val)
+            self.shape = next_shape
 
     def __str__(self):
         return f"<{self.klass.name} instance>"
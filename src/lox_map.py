@@ -0,0 +1,96 @@
+from typing import Iterator
+
+from lox_container import LoxContainer
+from rope import Rope
+
+# Python takes `True` and `1.0` to be the same dict key, so booleans are
+# stored under these instead.
+TRUE_KEY = object()
+FALSE_KEY = object()
+
+# Marks a `MapIterator` that has run out of keys.
+DONE = object()
+
+
+class MapError(Exception):
+    """Raised by map operations with the message of the runtime error to
+    report."""
+
+
+def to_key(val):
+    """Returns the dict key of the Lox value `val`."""
+    cls = val.__class__
+    if cls is str or cls is float or val is None:
+        return val
+    if cls is bool:
+        return TRUE_KEY if val else FALSE_KEY
+    if cls is Rope:
+        return val.flatten()
+    raise MapError("Map keys must be strings, numbers, booleans or nil.")
+
+
+def from_key(key):
+    """Returns the Lox value stored under the dict key `key`."""
+    if key is TRUE_KEY:
+        return True
+    if key is FALSE_KEY:
+        return False
+    return key
+
+
+class LoxMap(LoxContainer):
+    """Map value, a dict from strings, numbers, booleans and nil to any Lox
+    value.
+
+    Like arrays, maps are objects compared by identity.
+    """
+
+    __slots__ = ("entries",)
+
+    OPEN = "{"
+    CLOSE = "}"
+
+    def __init__(self) -> None:
+        self.entries: dict = {}
+
+    def parts(self) -> Iterator[tuple[str, object]]:
+        separator = ""
+        for key, val in self.entries.items():
+            yield separator, from_key(key)
+            yield ": ", val
+            separator = ", "
+
+
+class MapIterator:
+    """Goes through the keys of a map without copying them, one key ahead
+    so it can tell whether there is another.
+
+    As with Python dicts, adding or removing keys while iterating is an
+    error, reported when the iterator next moves on.
+    """
+
+    __slots__ = "keys", "next_key"
+
+    def __init__(self, lox_map: LoxMap) -> None:
+        self.keys = iter(lox_map.entries)
+        self.next_key = DONE
+        self.advance()
+
+    def advance(self) -> None:
+        try:
+            self.next_key = next(self.keys, DONE)
+        except RuntimeError:
+            raise MapError("Map changed size during iteration.")
+
+    def has_next(self) -> bool:
+        return self.next_key is not DONE
+
+    def next(self):
+        key = self.next_key
+        if key is DONE:
+            raise MapError("No more keys to iterate over.")
+        self.advance()
+        return from_key(key)
+
+    def __str__(self) -> str:
+        return "<map iterator>"
@@ -1,60 +1,372 @@
 import math
 import time
+from array import array
+from typing import Callable
 
+import vector
+from lox_array import MAX_ARRAY_LENGTH, LoxArray
 from lox_callable import LoxCallable
+from lox_map import LoxMap, MapIterator, from_key, to_key
+from rope import STRINGS
 
-built_ins = {}
 
+class Param:
+    """Type of a native function parameter: the classes its arguments can
+    have, `None` for any value, and the error reported for other values."""
 
-def define(cls):
-    built_ins[cls.__name__.lower()] = cls()
-    return cls
+    __slots__ = "types", "message"
 
+    def __init__(self, types: tuple[type, ...] | None, message: str) -> None:
+        self.types = types
+        self.message = message
 
-@define
-class Clock(LoxCallable):
-    def arity(self) -> int:
-        return 0
 
-    def call(self, interpreter, args):
-        return time.time()
+ANY = Param(None, "")
+NUMBER = Param((float,), "Expect number argument.")
+STRING = Param(STRINGS, "Expect string argument.")
+ARRAY = Param((LoxArray,), "Expect array argument.")
+MAP = Param((LoxMap,), "Expect map argument.")
+ITERATOR = Param((MapIterator,), "Expect iterator argument.")
+VECTOR = Param((vector.Vector,), "Expect vector argument.")
 
-    def __str__(self) -> str:
-        return "<native clock fn>"
 
+class NativeFunction(LoxCallable):
+    """A Python function callable from Lox.
+
+    Every engine calls natives through `invoke`, which checks the arguments
+    itself and reports errors as plain exceptions, instead of going through
+    the arity check, call depth count and error handling of Lox functions.
+    """
+
+    __slots__ = "name", "function", "params", "rest", "invoke"
+
+    def __init__(
+        self,
+        name: str,
+        function: Callable,
+        params: tuple[Param, ...],
+        rest: Param | None,
+    ) -> None:
+        self.name = name
+        self.function = function
+        self.params = params
+        # Parameter taking any number of extra arguments, if there is one.
+        self.rest = rest
+        # Calls `function` with a list of arguments, once they are checked.
+        self.invoke: Callable[[list | tuple], object] = (
+            make_invoke(function, params) if rest is None else self.invoke_rest
+        )
 
-@define
-class Input(LoxCallable):
     def arity(self) -> int:
-        return 0
+        """Number of arguments taken, not counting those of `rest`."""
+        return len(self.params)
 
     def call(self, interpreter, args):
-        return input()
+        return self.invoke(args)
+
+    def invoke_rest(self, args: list | tuple):
+        arity = len(self.params)
+        if len(args) < arity:
+            raise Exception(
+                f"Expected at least {arity} arguments got {len(args)}."
+            )
+        params = self.params + (self.rest,) * (len(args) - arity)
+        for arg, param in zip(args, params):
+            if param.types is not None and arg.__class__ not in param.types:
+                raise Exception(param.message)
+        return self.function(*args)
 
     def __str__(self) -> str:
-        return "<native input fn>"
+        return f"<native {self.name} fn>"
 
 
-@define
-class Length(LoxCallable):
-    def arity(self) -> int:
-        return 1
+def error_message(error: Exception) -> str:
+    """Returns the message of the runtime error to report for an exception
+    raised by a native, which Python may raise without one."""
+    if isinstance(error, MemoryError):
+        return "Out of memory."
+    return str(error) or f"{type(error).__name__} in native function."
 
-    def call(self, interpreter, args):
-        if not isinstance(args[0], str):
-            raise Exception("Expect string argument.")
-        return len(args[0])
 
-    def __str__(self) -> str:
-        return "<native length fn>"
+def make_invoke(function: Callable, params: tuple[Param, ...]) -> Callable:
+    """Generates the `invoke` of a native without a `rest` parameter, which
+    makes only the checks its parameters need, unrolled."""
+    names = ", ".join(f"a{i}" for i in range(len(params)))
+    lines = [
+        "def invoke(args):",
+        f"    if len(args) != {len(params)}:",
+        "        raise Exception(",
+        f'            f"Expected {len(params)} arguments got {{len(args)}}."',
+        "        )",
+    ]
+    if params:
+        lines.append(f"    {names}, = args")
+    namespace = {"function": function}
+    for i, param in enumerate(params):
+        if param.types is None:
+            continue
+        namespace[f"m{i}"] = param.message
+        if len(param.types) == 1:
+            namespace[f"t{i}"] = param.types[0]
+            lines.append(f"    if a{i}.__class__ is not t{i}:")
+        else:
+            namespace[f"t{i}"] = param.types
+            lines.append(f"    if a{i}.__class__ not in t{i}:")
+        lines.append(f"        raise Exception(m{i})")
+    lines.append(f"    return function({names})")
+    exec("\n".join(lines), namespace)
+    return namespace["invoke"]
 
 
-@define
-class Floor(LoxCallable):
-    def arity(self) -> int:
-        return 1
+built_ins: dict[str, NativeFunction] = {}
 
-    def call(self, interpreter, args):
-        if not isinstance(args[0], int):
-            raise Exception("Expect number argument.")
-        return math.floor(args[0])
+
+def native(*params: Param, rest: Param | None = None):
+    """Registers the decorated function as the native named after it, less
+    any trailing underscore, taking arguments of the types of `params`."""
+
+    def define(function: Callable) -> Callable:
+        name = function.__name__.rstrip("_")
+        built_ins[name] = NativeFunction(name, function, params, rest)
+        return function
+
+    return define
+
+
+@native()
+def clock():
+    return time.time()
+
+
+@native()
+def input_():
+    return input()
+
+
+@native(STRING)
+def length(string):
+    return float(len(string))
+
+
+@native(NUMBER)
+def floor(x):
+    return float(math.floor(x)) if math.isfinite(x) else x
+
+
+@native(NUMBER)
+def ceil(x):
+    return float(math.ceil(x)) if math.isfinite(x) else x
+
+
+@native(NUMBER)
+def abs_(x):
+    return abs(x)
+
+
+@native(NUMBER)
+def sqrt(x):
+    if x < 0:
+        raise Exception("Can't take the square root of a negative number.")
+    return math.sqrt(x)
+
+
+@native(NUMBER, rest=NUMBER)
+def min_(*numbers):
+    return min(numbers)
+
+
+@native(NUMBER, rest=NUMBER)
+def max_(*numbers):
+    return max(numbers)
+
+
+def check_integer(val) -> int:
+    if not isinstance(val, float) or not val.is_integer():
+        raise Exception("Expect integer argument.")
+    return int(val)
+
+
+def check_length(val, kind: str, limit: int) -> int:
+    length = check_integer(val)
+    if length < 0:
+        raise Exception(f"{kind} size can't be negative.")
+    if length > limit:
+        raise Exception(f"{kind} size can't be more than {limit}.")
+    return length
+
+
+@native(ANY)
+def array_(size):
+    """Makes an array of `size` nils."""
+    size = check_length(size, "Array", MAX_ARRAY_LENGTH)
+    return LoxArray([None] * size)
+
+
+@native(ANY)
+def len_(val):
+    if isinstance(val, STRINGS):
+        return float(len(val))
+    if isinstance(val, vector.Vector):
+        return float(len(val.values))
+    if not isinstance(val, LoxArray):
+        raise Exception("Expect array argument.")
+    return float(len(val.elements))
+
+
+@native(ARRAY, ANY)
+def push(lox_array, val):
+    lox_array.elements.append(val)
+    return None
+
+
+@native(ARRAY)
+def pop(lox_array):
+    elements = lox_array.elements
+    if not elements:
+        raise Exception("Can't pop from an empty array.")
+    return elements.pop()
+
+
+@native(ARRAY, ANY, ANY)
+def slice_(lox_array, start, end):
+    """Copies the elements from `start` up to `end` into a new array, both
+    clamped to the array."""
+    elements = lox_array.elements
+    start = min(max(check_integer(start), 0), len(elements))
+    end = min(max(check_integer(end), start), len(elements))
+    return LoxArray(elements[start:end])
+
+
+@native(ARRAY, ANY)
+def fill(lox_array, val):
+    """Sets every element of an array to `val`, returning the array."""
+    lox_array.elements[:] = [val] * len(lox_array.elements)
+    return lox_array
+
+
+@native()
+def map_():
+    """Makes an empty map."""
+    return LoxMap()
+
+
+@native(MAP, ANY)
+def get(lox_map, key):
+    """Returns the value of `key` in a map, nil if it has none."""
+    return lox_map.entries.get(to_key(key))
+
+
+@native(MAP, ANY, ANY)
+def set_(lox_map, key, val):
+    lox_map.entries[to_key(key)] = val
+    return val
+
+
+@native(MAP, ANY)
+def has(lox_map, key):
+    return to_key(key) in lox_map.entries
+
+
+@native(MAP, ANY)
+def delete(lox_map, key):
+    """Removes `key` from a map, returning whether it was there."""
+    entries = lox_map.entries
+    key = to_key(key)
+    if key not in entries:
+        return False
+    del entries[key]
+    return True
+
+
+@native(MAP)
+def keys(lox_map):
+    """Returns the keys of a map as an array, in the order they were
+    added."""
+    return LoxArray(list(map(from_key, lox_map.entries)))
+
+
+@native(MAP)
+def size(lox_map):
+    return float(len(lox_map.entries))
+
+
+@native(MAP)
+def iter_(lox_map):
+    """Returns an iterator over the keys of a map, for `hasnext` and
+    `next`."""
+    return MapIterator(lox_map)
+
+
+@native(ITERATOR)
+def hasnext(iterator):
+    return iterator.has_next()
+
+
+@native(ITERATOR)
+def next_(iterator):
+    return iterator.next()
+
+
+@native(ANY)
+def vector_(val):
+    """Makes a vector of `size` zeros, or holding the numbers of an
+    array."""
+    if isinstance(val, LoxArray):
+        elements = val.elements
+        if not all(element.__class__ is float for element in elements):
+            raise Exception("Vectors can only hold numbers.")
+        return vector.Vector(array("d", elements))
+
+    size = check_length(val, "Vector", vector.MAX_LENGTH)
+    return vector.Vector(array("d", bytes(8 * size)))
+
+
+@native(NUMBER, NUMBER, NUMBER)
+def vrange(start, end, step):
+    return vector.arange(start, end, step)
+
+
+@native(VECTOR, VECTOR)
+def vadd(a, b):
+    return vector.add(a, b)
+
+
+@native(VECTOR, VECTOR)
+def vmul(a, b):
+    return vector.multiply(a, b)
+
+
+@native(VECTOR, NUMBER)
+def vscale(vec, factor):
+    return vector.scale(vec, factor)
+
+
+@native(VECTOR)
+def vsum(vec):
+    return vector.total(vec)
+
+
+@native(VECTOR)
+def vmin(vec):
+    return vector.minimum(vec)
+
+
+@native(VECTOR)
+def vmax(vec):
+    return vector.maximum(vec)
+
+
+@native(VECTOR)
+def vmean(vec):
+    return vector.mean(vec)
+
+
+@native(VECTOR, VECTOR)
+def vdot(a, b):
+    return vector.dot(a, b)
+
+
+@native(VECTOR)
+def vsort(vec):
+    """Returns a sorted copy of a vector."""
+    return vector.sort(vec)
@@ -0,0 +1,358 @@
+import expr as ex
+import stmt as st
+from interpreter import Interpreter
+from tokens import TokenType
+
+# Value of the locals that can't be replaced by a literal.
+NOT_CONSTANT = object()
+
+
+class Census(ex.Visitor, st.Visitor):
+    """Counts the nodes of a tree and collects the names it assigns to."""
+
+    def __init__(self) -> None:
+        self.nodes = 0
+        self.assigned: set[str] = set()
+
+    def count(self, stmts: list[st.Stmt]) -> "Census":
+        for stmt in stmts:
+            self.visit(stmt)
+        return self
+
+    def visit(self, node: ex.Expr | st.Stmt | None):
+        if node is not None:
+            self.nodes += 1
+            node.accept(self)
+
+    def visit_block_stmt(self, stmt: st.Block):
+        self.count(stmt.statements)
+
+    def visit_class_stmt(self, stmt: st.Class):
+        self.visit(stmt.superclass)
+        self.count(stmt.methods)
+
+    def visit_expression_stmt(self, stmt: st.Expression):
+        self.visit(stmt.expression)
+
+    def visit_function_stmt(self, stmt: st.Function):
+        if stmt.lazy is not None:
+            # Bodies not parsed yet can only be searched for names followed
+            # by `=`, which include every name they assign to.
+            tokens = stmt.lazy.tokens
+            for token, following in zip(tokens, tokens[1:]):
+                if (
+                    token.type == TokenType.IDENTIFIER
+                    and following.type == TokenType.EQUAL
+                ):
+                    self.assigned.add(token.lexeme)
+        self.count(stmt.body)
+
+    def visit_if_stmt(self, stmt: st.If):
+        self.visit(stmt.condition)
+        self.visit(stmt.then_branch)
+        self.visit(stmt.else_branch)
+
+    def visit_print_stmt(self, stmt: st.Print):
+        self.visit(stmt.expression)
+
+    def visit_return_stmt(self, stmt: st.Return):
+        self.visit(stmt.val)
+
+    def visit_var_stmt(self, stmt: st.Var):
+        self.visit(stmt.initializer)
+
+    def visit_while_stmt(self, stmt: st.While):
+        self.visit(stmt.condition)
+        self.visit(stmt.body)
+
+    def visit_assign_expr(self, expr: ex.Assign):
+        self.assigned.add(expr.name.lexeme)
+        self.visit(expr.value)
+
+    def visit_binary_expr(self, expr: ex.Binary):
+        self.visit(expr.left)
+        self.visit(expr.right)
+
+    def visit_call_expr(self, expr: ex.Call):
+        self.visit(expr.callee)
+        for arg in expr.args:
+            self.visit(arg)
+
+    def visit_get_expr(self, expr: ex.Get):
+        self.visit(expr.obj)
+
+    def visit_grouping_expr(self, expr: ex.Grouping):
+        self.visit(expr.expression)
+
+    def visit_index_expr(self, expr: ex.Index):
+        self.visit(expr.obj)
+        self.visit(expr.index)
+
+    def visit_literal_expr(self, expr: ex.Literal):
+        pass
+
+    def visit_logical_expr(self, expr: ex.Logical):
+        self.visit(expr.left)
+        self.visit(expr.right)
+
+    def visit_set_expr(self, expr: ex.Set):
+        self.visit(expr.obj)
+        self.visit(expr.value)
+
+    def visit_setindex_expr(self, expr: ex.SetIndex):
+        self.visit(expr.obj)
+        self.visit(expr.index)
+        self.visit(expr.value)
+
+    def visit_super_expr(self, expr: ex.Super):
+        pass
+
+    def visit_this_expr(self, expr: ex.This):
+        pass
+
+    def visit_unary_expr(self, expr: ex.Unary):
+        self.visit(expr.right)
+
+    def visit_variable_expr(self, expr: ex.Variable):
+        pass
+
+
+class Optimizer(ex.Visitor, st.Visitor):
+    """Simplifies resolved trees before they run.
+
+    Level 1 folds operators whose operands are literals, strips groupings
+    and drops branches and loops whose condition is constant. Level 2 also
+    replaces reads of locals that are never assigned with the literal they
+    were declared with.
+
+    Operations that would fail at runtime are left alone so they still
+    report their error, and declarations are never removed so the slots
+    the resolver gave the remaining locals stay valid.
+    """
+
+    def __init__(self, level: int) -> None:
+        self.level = level
+        self.scopes: list[dict[str, object]] = []
+        self.assigned: set[str] = set()
+        self.removed = 0
+
+    def optimize(self, stmts: list[st.Stmt]) -> list[st.Stmt]:
+        census = Census().count(stmts)
+        self.assigned = census.assigned
+        stmts = self.optimize_stmts(stmts)
+        self.removed = census.nodes - Census().count(stmts).nodes
+        return stmts
+
+    def optimize_stmts(self, stmts: list[st.Stmt]) -> list[st.Stmt]:
+        optimized = (stmt.accept(self) for stmt in stmts)
+        return [stmt for stmt in optimized if stmt is not None]
+
+    def optimize_body(self, stmt: st.Stmt) -> st.Stmt:
+        """Optimizes a statement that can't be removed altogether."""
+        return stmt.accept(self) or st.Block([])
+
+    def optimize_expr(self, expr: ex.Expr) -> ex.Expr:
+        return expr.accept(self)
+
+    def optimize_function(self, stmt: st.Function, scope: dict[str, object]):
+        self.scopes.append(scope)
+        for param in stmt.params:
+            self.declare(param.lexeme)
+        stmt.body = self.optimize_stmts(stmt.body)
+        self.scopes.pop()
+
+    def declare(self, name: str, val: object = NOT_CONSTANT):
+        if self.scopes:
+            self.scopes[-1][name] = val
+
+    def visit_block_stmt(self, stmt: st.Block):
+        self.scopes.append({})
+        stmt.statements = self.optimize_stmts(stmt.statements)
+        self.scopes.pop()
+        if not stmt.statements:
+            return None
+        return stmt
+
+    def visit_class_stmt(self, stmt: st.Class):
+        self.declare(stmt.name.lexeme)
+        for method in stmt.methods:
+            self.optimize_function(method, {"this": NOT_CONSTANT})
+        return stmt
+
+    def visit_expression_stmt(self, stmt: st.Expression):
+        stmt.expression = self.optimize_expr(stmt.expression)
+        if isinstance(stmt.expression, ex.Literal):
+            return None
+        return stmt
+
+    def visit_function_stmt(self, stmt: st.Function):
+        self.declare(stmt.name.lexeme)
+        self.optimize_function(stmt, {})
+        return stmt
+
+    def visit_if_stmt(self, stmt: st.If):
+        stmt.condition = self.optimize_expr(stmt.condition)
+        if isinstance(stmt.condition, ex.Literal):
+            if Interpreter.truthy(stmt.condition.value):
+                return stmt.then_branch.accept(self)
+            if stmt.else_branch is not None:
+                return stmt.else_branch.accept(self)
+            return None
+
+        stmt.then_branch = self.optimize_body(stmt.then_branch)
+        if stmt.else_branch is not None:
+            stmt.else_branch = stmt.else_branch.accept(self)
+        return stmt
+
+    def visit_print_stmt(self, stmt: st.Print):
+        stmt.expression = self.optimize_expr(stmt.expression)
+        return stmt
+
+    def visit_return_stmt(self, stmt: st.Return):
+        if stmt.val is not None:
+            stmt.val = self.optimize_expr(stmt.val)
+        return stmt
+
+    def visit_var_stmt(self, stmt: st.Var):
+        val = None
+        if stmt.initializer is not None:
+            stmt.initializer = self.optimize_expr(stmt.initializer)
+            val = NOT_CONSTANT
+            if isinstance(stmt.initializer, ex.Literal):
+                val = stmt.initializer.value
+
+        if self.level < 2 or stmt.name.lexeme in self.assigned:
+            val = NOT_CONSTANT
+        self.declare(stmt.name.lexeme, val)
+        return stmt
+
+    def visit_while_stmt(self, stmt: st.While):
+        stmt.condition = self.optimize_expr(stmt.condition)
+        if isinstance(stmt.condition, ex.Literal) and not Interpreter.truthy(
+            stmt.condition.value
+        ):
+            return None
+
+        stmt.body = self.optimize_body(stmt.body)
+        return stmt
+
+    def visit_assign_expr(self, expr: ex.Assign):
+        expr.value = self.optimize_expr(expr.value)
+        return expr
+
+    def visit_binary_expr(self, expr: ex.Binary):
+        expr.left = self.optimize_expr(expr.left)
+        expr.right = self.optimize_expr(expr.right)
+        if not (
+            isinstance(expr.left, ex.Literal)
+            and isinstance(expr.right, ex.Literal)
+        ):
+            return expr
+
+        left, right = expr.left.value, expr.right.value
+        match expr.operator.type:
+            case TokenType.EQUAL_EQUAL:
+                return ex.Literal(left == right)
+            case TokenType.BANG_EQUAL:
+                return ex.Literal(left != right)
+            case TokenType.PLUS if isinstance(left, str) and isinstance(
+                right, str
+            ):
+                return ex.Literal(left + right)
+
+        if not (isinstance(left, float) and isinstance(right, float)):
+            return expr
+
+        match expr.operator.type:
+            case TokenType.PLUS:
+                return ex.Literal(left + right)
+            case TokenType.MINUS:
+                return ex.Literal(left - right)
+            case TokenType.STAR:
+                return ex.Literal(left * right)
+            case TokenType.SLASH if right:
+                return ex.Literal(left / right)
+            case TokenType.MOD if right:
+                return ex.Literal(left % right)
+            case TokenType.GREATER:
+                return ex.Literal(left > right)
+            case TokenType.GREATER_EQUAL:
+                return ex.Literal(left >= right)
+            case TokenType.LESS:
+                return ex.Literal(left < right)
+            case TokenType.LESS_EQUAL:
+                return ex.Literal(left <= right)
+
+        return expr
+
+    def visit_call_expr(self, expr: ex.Call):
+        expr.callee = self.optimize_expr(expr.callee)
+        expr.args = [self.optimize_expr(arg) for arg in expr.args]
+        return expr
+
+    def visit_get_expr(self, expr: ex.Get):
+        expr.obj = self.optimize_expr(expr.obj)
+        return expr
+
+    def visit_grouping_expr(self, expr: ex.Grouping):
+        return self.optimize_expr(expr.expression)
+
+    def visit_index_expr(self, expr: ex.Index):
+        expr.obj = self.optimize_expr(expr.obj)
+        expr.index = self.optimize_expr(expr.index)
+        return expr
+
+    def visit_literal_expr(self, expr: ex.Literal):
+        return expr
+
+    def visit_logical_expr(self, expr: ex.Logical):
+        expr.left = self.optimize_expr(expr.left)
+        expr.right = self.optimize_expr(expr.right)
+        if not isinstance(expr.left, ex.Literal):
+            return expr
+
+        truthy = Interpreter.truthy(expr.left.value)
+        if truthy == (expr.operator.type == TokenType.OR):
+            return expr.left
+        return expr.right
+
+    def visit_set_expr(self, expr: ex.Set):
+        expr.obj = self.optimize_expr(expr.obj)
+        expr.value = self.optimize_expr(expr.value)
+        return expr
+
+    def visit_setindex_expr(self, expr: ex.SetIndex):
+        expr.obj = self.optimize_expr(expr.obj)
+        expr.index = self.optimize_expr(expr.index)
+        expr.value = self.optimize_expr(expr.value)
+        return expr
+
+    def visit_super_expr(self, expr: ex.Super):
+        return expr
+
+    def visit_this_expr(self, expr: ex.This):
+        return expr
+
+    def visit_unary_expr(self, expr: ex.Unary):
+        expr.right = self.optimize_expr(expr.right)
+        if not isinstance(expr.right, ex.Literal):
+            return expr
+
+        val = expr.right.value
+        if expr.operator.type == TokenType.BANG:
+            return ex.Literal(not Interpreter.truthy(val))
+        if isinstance(val, float):
+            return ex.Literal(-val)
+        return expr
+
+    def visit_variable_expr(self, expr: ex.Variable):
+        if expr.depth is None:
+            return expr
+
+        for scope in reversed(self.scopes):
+            if expr.name.lexeme in scope:
+                val = scope[expr.name.lexeme]
+                if val is NOT_CONSTANT:
+                    return expr
+                return ex.Literal(val)
+        return expr
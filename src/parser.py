@@ -1,27 +1,76 @@
+from enum import IntEnum
+from types import GeneratorType
+from typing import Callable, Generator, Iterable, Iterator
+
 import expr as ex
 import stmt as st
 from error_handler import ErrorHandler, ParseErr
 from tokens import Token, TokenType
 
+# Parse function of an expression with operands, see `parse_precedence`.
+Rule = Generator[int, ex.Expr, ex.Expr]
+
+
+class Precedence(IntEnum):
+    """How tightly operators bind, from loosest to tightest."""
+
+    NONE = 0
+    ASSIGNMENT = 1
+    OR = 2
+    EQUALITY = 3
+    COMPARISON = 4
+    TERM = 5
+    FACTOR = 6
+    UNARY = 7
+    CALL = 8
+
+
+class LazyBody:
+    """Body of a function left unparsed until the function is first called.
+
+    Only the braces of the body are matched when it is declared; its tokens
+    are kept with what the resolver knew about the scopes around it, set in
+    `context` when it reaches the declaration.
+    """
+
+    __slots__ = "tokens", "context"
 
-class Parser:
     def __init__(self, tokens: list[Token]) -> None:
         self.tokens = tokens
-        self.cur = 0
+        self.context = None
+
+
+class Parser:
+    def __init__(self, tokens: Iterable[Token], lazy: bool = False) -> None:
+        # Tokens are pulled as they are needed, and only the current one
+        # and the one before it are kept.
+        self.tokens = iter(tokens)
+        self.current = next(self.tokens)
+        self.prev: Token | None = None
+        # Leave function bodies for `LazyBody` to parse.
+        self.lazy = lazy
 
     def parse(self, can_be_expr: bool = False) -> list[st.Stmt]:
-        if can_be_expr and self.tokens[-2].type not in (
-            TokenType.SEMICOLON,
-            TokenType.RIGHT_BRACE,
-        ):
-            expr = self.expression()
-            # This feels dirty
-            return [st.Print(expr)]
+        if can_be_expr:
+            # Only whole inputs can be expressions, so they are held in
+            # full to look at their last token.
+            tokens = [self.current, *self.tokens]
+            self.tokens = iter(tokens[1:])
+            if len(tokens) > 1 and tokens[-2].type not in (
+                TokenType.SEMICOLON,
+                TokenType.RIGHT_BRACE,
+            ):
+                expr = self.expression()
+                # This feels dirty
+                return [st.Print(expr)]
 
-        statements = []
+        return list(self.declarations())
+
+    def declarations(self) -> Iterator[st.Stmt | None]:
+        """Yields top-level declarations as soon as each is parsed, `None`
+        for those with a syntax error."""
         while not self.is_at_end():
-            statements.append(self.declaration())
-        return statements
+            yield self.declaration()
 
     def declaration(self):
         try:
@@ -105,6 +154,11 @@ class Parser:
         self.consume(
             TokenType.LEFT_BRACE, "Expect '{' before " + kind + " body."
         )
+        if self.lazy:
+            function = st.Function(name, params, [])
+            function.lazy = LazyBody(self.skip_block())
+            return function
+
         body = self.block()  # block() assumes { has already been matched
 
         return st.Function(name, params, body)
@@ -183,128 +237,145 @@ class Parser:
         self.consume(TokenType.RIGHT_BRACE, "Expect '}' after block.")
         return statements
 
-    def expression(self) -> ex.Expr:
-        return self.assignment()
-
-    def assignment(self):
-        expr = self.logic_or()
-
-        if self.match(TokenType.EQUAL):
-            equal = self.previous()
-            val = self.assignment()
-
-            if isinstance(expr, ex.Variable):
-                return ex.Assign(expr.name, val)
-            elif isinstance(expr, ex.Get):
-                return ex.Set(expr.obj, expr.name, val)
-
-            self.error(equal, "Invalid assignment target.")
-
-        return expr
-
-    def logic_or(self):
-        expr = self.logic_and()
-
-        while self.match(TokenType.OR):
-            op = self.previous()
-            right = self.logic_and()
-            expr = ex.Logical(expr, op, right)
-
-        return expr
-
-    def logic_and(self):
-        expr = self.equality()
-
-        while self.match(TokenType.OR):
-            op = self.previous()
-            right = self.equality()
-            expr = ex.Logical(expr, op, right)
-
-        return expr
-
-    def equality(self) -> ex.Expr:
-        expr = self.comparison()
-
-        while self.match(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL):
-            op = self.previous()
-            right = self.comparison()
-            expr = ex.Binary(expr, op, right)
-
-        return expr
-
-    def comparison(self) -> ex.Expr:
-        expr = self.term()
-
-        while self.match(
-            TokenType.LESS,
-            TokenType.LESS_EQUAL,
-            TokenType.GREATER,
-            TokenType.GREATER_EQUAL,
-        ):
-            op = self.previous()
-            right = self.term()
-            expr = ex.Binary(expr, op, right)
-
-        return expr
-
-    def term(self) -> ex.Expr:
-        expr = self.factor()
-
-        while self.match(
-            TokenType.PLUS,
-            TokenType.MINUS,
-        ):
-            op = self.previous()
-            right = self.factor()
-            expr = ex.Binary(expr, op, right)
-
-        return expr
-
-    def factor(self) -> ex.Expr:
-        expr = self.unary()
-
-        while self.match(
-            TokenType.STAR,
-            TokenType.SLASH,
-            TokenType.MOD,
-        ):
-            op = self.previous()
-            right = self.unary()
-            expr = ex.Binary(expr, op, right)
-
-        return expr
-
-    def unary(self) -> ex.Expr:
-        if self.match(TokenType.BANG, TokenType.MINUS):
-            op = self.previous()
-            right = self.unary()
-            return ex.Unary(op, right)
-
-        return self.call()
-
-    def call(self):
-        expr = self.primary()
+    def skip_block(self) -> list[Token]:
+        """Returns the tokens of a block up to its closing brace, followed
+        by an end of file, without parsing them."""
+        tokens = []
+        depth = 1
+        # Bodies are skipped a token at a time, so the tokens are pulled
+        # straight from the iterator rather than with `advance`.
+        token = self.current
+        while token.type != TokenType.EOF:
+            tokens.append(token)
+            if token.type == TokenType.LEFT_BRACE:
+                depth += 1
+            elif token.type == TokenType.RIGHT_BRACE:
+                depth -= 1
+                if depth == 0:
+                    tokens.append(Token(TokenType.EOF, "", None, token.line))
+                    self.prev = token
+                    self.current = next(self.tokens)
+                    return tokens
+            token = next(self.tokens)
+
+        self.current = token
+        raise self.error(token, "Expect '}' after block.")
 
+    def expression(self) -> ex.Expr:
+        return self.parse_precedence(Precedence.ASSIGNMENT)
+
+    def parse_precedence(self, precedence: int) -> ex.Expr:
+        """Parses an expression whose operators bind at least as tightly as
+        `precedence`.
+
+        Rules parsing operands of their own are generators, which yield the
+        precedence of each operand and are sent it once parsed. They are
+        resumed from the loop below rather than calling it, so expressions
+        can nest as deep as they like without growing the Python stack.
+        """
+        prefix_rules = self.prefix_rules
+        infix_rules = self.infix_rules
+        # Rules waiting for an operand, innermost last, each with the
+        # precedence of the expression it is part of.
+        pending: list[tuple[Generator, int]] = []
         while True:
-            if self.match(TokenType.LEFT_PAREN):
-                expr = self.finish_call(expr)
-            elif self.match(TokenType.DOT):
-                name = self.consume(
-                    TokenType.IDENTIFIER, "Expect property name after '.'."
-                )
-                expr = ex.Get(expr, name)
-            else:
-                break
-
-        return expr
-
-    def finish_call(self, callee):
+            prefix = prefix_rules.get(self.current.type)
+            if prefix is None:
+                raise self.error(self.peek(), "Expected expression")
+            self.advance()
+            expr = prefix(self)
+
+            while True:
+                if expr.__class__ is GeneratorType:
+                    rule = expr
+                    try:
+                        operand_precedence = next(rule)
+                    except StopIteration as stop:
+                        # Calls without arguments have no operands.
+                        expr = stop.value
+                        continue
+                    pending.append((rule, precedence))
+                    precedence = operand_precedence
+                    break
+
+                rule = infix_rules.get(self.current.type)
+                if rule is not None and rule[0] >= precedence:
+                    self.advance()
+                    expr = rule[1](self, expr)
+                    continue
+
+                # `expr` is complete, so it is the operand of the innermost
+                # pending rule, if there is one.
+                if not pending:
+                    return expr
+                rule, precedence = pending.pop()
+                try:
+                    operand_precedence = rule.send(expr)
+                except StopIteration as stop:
+                    expr = stop.value
+                else:
+                    pending.append((rule, precedence))
+                    precedence = operand_precedence
+                    break
+
+    def literal(self) -> ex.Expr:
+        return ex.Literal(self.previous().literal)
+
+    def variable(self) -> ex.Expr:
+        return ex.Variable(self.previous())
+
+    def super_(self) -> ex.Expr:
+        keyword = self.previous()
+        self.consume(TokenType.DOT, "Expect a '.' after super.")
+        method = self.consume(TokenType.IDENTIFIER, "Expect a method name.")
+        return ex.Super(keyword, method)
+
+    def this(self) -> ex.Expr:
+        return ex.This(self.previous())
+
+    def grouping(self) -> Rule:
+        expr = yield Precedence.ASSIGNMENT
+        self.consume(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
+        return ex.Grouping(expr)
+
+    def unary(self) -> Rule:
+        op = self.previous()
+        right = yield Precedence.CALL
+        return ex.Unary(op, right)
+
+    def binary(self, left: ex.Expr) -> Rule:
+        op = self.previous()
+        # Operands on the right bind tighter, making operators left
+        # associative.
+        right = yield self.infix_rules[op.type][0] + 1
+        return ex.Binary(left, op, right)
+
+    def logical(self, left: ex.Expr) -> Rule:
+        op = self.previous()
+        right = yield Precedence.OR + 1
+        return ex.Logical(left, op, right)
+
+    def assignment(self, target: ex.Expr) -> Rule:
+        equal = self.previous()
+        # Values are parsed at the precedence of assignments so that they
+        # can be assignments too, making them right associative.
+        val = yield Precedence.ASSIGNMENT
+        if isinstance(target, ex.Variable):
+            return ex.Assign(target.name, val)
+        if isinstance(target, ex.Get):
+            return ex.Set(target.obj, target.name, val)
+        if isinstance(target, ex.Index):
+            return ex.SetIndex(target.obj, target.bracket, target.index, val)
+        self.error(equal, "Invalid assignment target.")
+        return target
+
+    def call(self, callee: ex.Expr) -> Rule:
         args = []
 
         if not self.check(TokenType.RIGHT_PAREN):
-            args.append(self.expression())
+            args.append((yield Precedence.ASSIGNMENT))
             while self.match(TokenType.COMMA):
-                args.append(self.expression())
+                args.append((yield Precedence.ASSIGNMENT))
 
         paren = self.consume(
             TokenType.RIGHT_PAREN, "Expect ')' after arguments."
@@ -315,34 +386,57 @@ class Parser:
 
         return ex.Call(callee, paren, args)
 
-    def primary(self) -> ex.Expr:
-        if self.match(
-            TokenType.FALSE,
-            TokenType.TRUE,
-            TokenType.NIL,
-            TokenType.STRING,
-            TokenType.NUMBER,
-        ):
-            return ex.Literal(self.previous().literal)
-
-        if self.match(TokenType.IDENTIFIER):
-            return ex.Variable(self.previous())
-
-        if self.match(TokenType.SUPER):
-            keyword = self.previous()
-            self.consume(TokenType.DOT, "Expect a '.' after super.")
-            method = self.consume(TokenType.IDENTIFIER, "Expect a method name.")
-            return ex.Super(keyword, method)
-
-        if self.match(TokenType.THIS):
-            return ex.This(self.previous())
-
-        if self.match(TokenType.LEFT_PAREN):
-            expr = self.expression()
-            self.consume(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
-            return ex.Grouping(expr)
+    def get(self, obj: ex.Expr) -> ex.Expr:
+        name = self.consume(
+            TokenType.IDENTIFIER, "Expect property name after '.'."
+        )
+        return ex.Get(obj, name)
 
-        raise self.error(self.peek(), "Expected expression")
+    def index(self, obj: ex.Expr) -> Rule:
+        index = yield Precedence.ASSIGNMENT
+        bracket = self.consume(
+            TokenType.RIGHT_BRACKET, "Expect ']' after index."
+        )
+        return ex.Index(obj, bracket, index)
+
+    # Parse functions for the tokens that can start an expression.
+    prefix_rules: dict[TokenType, Callable[["Parser"], ex.Expr | Rule]] = {
+        TokenType.FALSE: literal,
+        TokenType.TRUE: literal,
+        TokenType.NIL: literal,
+        TokenType.STRING: literal,
+        TokenType.NUMBER: literal,
+        TokenType.IDENTIFIER: variable,
+        TokenType.SUPER: super_,
+        TokenType.THIS: this,
+        TokenType.LEFT_PAREN: grouping,
+        TokenType.BANG: unary,
+        TokenType.MINUS: unary,
+    }
+
+    # Precedence and parse function for the tokens that can follow an
+    # expression to extend it. Like `logic_and` in the descent parser this
+    # replaces, `or` binds as tightly as `and` should, and `and` is missing.
+    infix_rules: dict[
+        TokenType, tuple[int, Callable[["Parser", ex.Expr], ex.Expr | Rule]]
+    ] = {
+        TokenType.EQUAL: (Precedence.ASSIGNMENT, assignment),
+        TokenType.OR: (Precedence.OR, logical),
+        TokenType.BANG_EQUAL: (Precedence.EQUALITY, binary),
+        TokenType.EQUAL_EQUAL: (Precedence.EQUALITY, binary),
+        TokenType.LESS: (Precedence.COMPARISON, binary),
+        TokenType.LESS_EQUAL: (Precedence.COMPARISON, binary),
+        TokenType.GREATER: (Precedence.COMPARISON, binary),
+        TokenType.GREATER_EQUAL: (Precedence.COMPARISON, binary),
+        TokenType.PLUS: (Precedence.TERM, binary),
+        TokenType.MINUS: (Precedence.TERM, binary),
+        TokenType.STAR: (Precedence.FACTOR, binary),
+        TokenType.SLASH: (Precedence.FACTOR, binary),
+        TokenType.MOD: (Precedence.FACTOR, binary),
+        TokenType.LEFT_PAREN: (Precedence.CALL, call),
+        TokenType.DOT: (Precedence.CALL, get),
+        TokenType.LEFT_BRACKET: (Precedence.CALL, index),
+    }
 
     def consume(self, type: TokenType, msg: str):
         if self.check(type):
@@ -352,11 +446,12 @@ class Parser:
 
     def advance(self) -> Token:
         if not self.is_at_end():
-            self.cur += 1
+            self.prev = self.current
+            self.current = next(self.tokens)
         return self.previous()
 
     def previous(self) -> Token:
-        return self.tokens[self.cur - 1]
+        return self.prev
 
     def match(self, *types: TokenType) -> bool:
         for type in types:
@@ -373,7 +468,7 @@ class Parser:
         return self.peek().type == type
 
     def peek(self) -> Token:
-        return self.tokens[self.cur]
+        return self.current
 
     def is_at_end(self) -> bool:
         return self.peek().type == TokenType.EOF
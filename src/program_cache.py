@@ -0,0 +1,122 @@
+"""On-disk cache of parsed and resolved programs, like `__pycache__`.
+
+Programs are pickled into the cache directory under the hash of their
+source, with the depths the resolver recorded on their nodes. Programs
+parsed with lazy function bodies, which only the tree-walking interpreter
+can run, are kept under another key than the same program parsed in full.
+Each entry starts with a header holding its key again and the fingerprint
+of the front end that produced it, so entries made by another version of
+the scanner, parser or resolver, or by another Python, are treated as
+missing and overwritten.
+
+Cache entries are unpickled, so the cache directory must only be writable
+by trusted users.
+"""
+
+import contextlib
+import functools
+import gc
+import hashlib
+import os
+import pathlib
+import pickle
+import sys
+import tempfile
+from typing import Iterator
+
+import stmt as st
+
+# Modules whose output ends up in cache entries.
+FRONT_END = (
+    "tokens",
+    "scanner",
+    "parser",
+    "resolver",
+    "expr",
+    "stmt",
+    "program_cache",
+)
+
+
+@functools.cache
+def fingerprint() -> str:
+    digest = hashlib.sha256(sys.version.encode())
+    src = pathlib.Path(__file__).resolve().parent
+    for module in FRONT_END:
+        digest.update((src / f"{module}.py").read_bytes())
+    return digest.hexdigest()
+
+
+@contextlib.contextmanager
+def gc_paused() -> Iterator[None]:
+    """Keeps the garbage collector from repeatedly scanning the many
+    nodes being (un)pickled, none of which are garbage."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def source_hash(source: str) -> str:
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def entry_key(digest: str, lazy: bool) -> str:
+    return f"{digest}-lazy" if lazy else digest
+
+
+def entry_path(cache_dir: pathlib.Path, key: str) -> pathlib.Path:
+    return cache_dir / f"{key}.lox.pickle"
+
+
+def load(
+    cache_dir: pathlib.Path, digest: str, lazy: bool = False
+) -> list[st.Stmt] | None:
+    """Returns the cached program for the source hashed to `digest`, parsed
+    with lazy function bodies or not, or `None` if there is no valid entry
+    for it."""
+    key = entry_key(digest, lazy)
+    try:
+        with entry_path(cache_dir, key).open("rb") as f, gc_paused():
+            header = pickle.load(f)
+            if header != (key, fingerprint()):
+                return None
+            program = pickle.load(f)
+    except Exception:
+        # Damaged entries can fail to unpickle in about any way.
+        return None
+
+    # The tree lives as long as the program runs, so collections that
+    # would only walk it again are saved by moving it out of their reach.
+    gc.freeze()
+    return program
+
+
+def store(
+    cache_dir: pathlib.Path,
+    digest: str,
+    program: list[st.Stmt],
+    lazy: bool = False,
+) -> None:
+    """Saves `program`, parsed with lazy function bodies or not, as the
+    cached program for the source hashed to `digest`, silently giving up if
+    the entry can't be written."""
+    key = entry_key(digest, lazy)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Written next to the entry then renamed over it, so concurrent
+        # runs never see a partial entry.
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f, gc_paused():
+                pickle.dump((key, fingerprint()), f)
+                pickle.dump(program, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, entry_path(cache_dir, key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except (OSError, RecursionError, pickle.PicklingError):
+        pass
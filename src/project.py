@@ -0,0 +1,83 @@
+"""Front end for many scripts at once, spread over a pool of processes.
+
+Each worker scans, parses and resolves a script, and sends back the errors
+it found or, if there were none, its syntax tree, pickled by the pool. The
+trees can be kept in the program cache, so that running the scripts later
+skips their front end.
+"""
+
+import concurrent.futures
+import os
+import pathlib
+from parser import Parser
+from typing import Iterable, Iterator, NamedTuple
+
+import program_cache
+import stmt as st
+from error_handler import ErrorHandler, ParseErr
+from resolver import Resolver
+from scanner import RegexScanner
+
+
+class Checked(NamedTuple):
+    path: pathlib.Path
+    # As (line, where, message), line 0 for errors reading the script.
+    errors: list[tuple[int, str, str]]
+    # `None` if there were errors.
+    statements: list[st.Stmt] | None
+    # Hash of the source, keying its program in the cache, or `None` if
+    # the script couldn't be read.
+    source_hash: str | None
+
+
+def find_scripts(paths: Iterable[pathlib.Path]) -> list[pathlib.Path]:
+    """Expands directories into the scripts they contain."""
+    scripts = []
+    for path in paths:
+        if path.is_dir():
+            scripts.extend(sorted(path.rglob("*.lox")))
+        else:
+            scripts.append(path)
+    return scripts
+
+
+def front_end(path: pathlib.Path) -> Checked:
+    try:
+        source = path.read_text()
+    except OSError as e:
+        error = f"Can't read script: {e.strerror or e}."
+        return Checked(path, [(0, "", error)], None, None)
+    except UnicodeDecodeError as e:
+        error = f"Can't decode script: {e.reason} at byte {e.start}."
+        return Checked(path, [(0, "", error)], None, None)
+
+    with ErrorHandler.collect() as errors:
+        tokens = RegexScanner(source).scan_tokens()
+        try:
+            statements = Parser(tokens).parse(can_be_expr=True)
+        except ParseErr:
+            # Raised for scripts ending in an invalid expression, once
+            # reported.
+            pass
+        if not errors:
+            Resolver().resolve_stmts(statements)
+
+    statements = None if errors else statements
+    return Checked(path, errors, statements, program_cache.source_hash(source))
+
+
+def check(
+    scripts: list[pathlib.Path], jobs: int | None = None
+) -> Iterator[Checked]:
+    """Runs the front end on every script, over `jobs` processes (one per
+    core by default), yielding the results in order."""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(scripts) <= 1:
+        yield from map(front_end, scripts)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(jobs) as pool:
+        # Scripts are handed out a few at a time, to pickle fewer tasks
+        # while keeping every worker busy.
+        chunksize = max(1, len(scripts) // (jobs * 4))
+        yield from pool.map(front_end, scripts, chunksize=chunksize)
@@ -0,0 +1,130 @@
+"""Specialised variants of `Binary` and `Unary` nodes.
+
+The first time the interpreter runs an operator it swaps the class of its
+node for the variant matching the operands it saw, so later runs dispatch
+straight to a visit method that skips the operator `match` and the type
+checks. Each variant guards on the operand types it was made for; when the
+guard fails the node is despecialised back to its generic class, and after
+`DEOPT_LIMIT` failures it stays generic.
+
+Only the interpreter running a tree visits it once it has been quickened,
+so the variants dispatch to visit methods that only `Interpreter` has.
+"""
+
+import operator
+from typing import Callable
+
+import expr as ex
+from rope import STRINGS
+from tokens import TokenType
+
+DEOPT_LIMIT = 2
+
+
+class FloatBinary(ex.Binary):
+    """Arithmetic or comparison on two numbers."""
+
+    __slots__ = ()
+    op: Callable[[float, float], object]
+
+    def accept(self, visitor):
+        return visitor.visit_float_binary_expr(self)
+
+
+class FloatDivision(FloatBinary):
+    """Division or modulo of two numbers, by anything but zero."""
+
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visit_float_division_expr(self)
+
+
+class StringConcat(ex.Binary):
+    """Concatenation of two strings, either of which can be a rope."""
+
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visit_string_concat_expr(self)
+
+
+class Equality(ex.Binary):
+    """Equality test, which takes operands of any type."""
+
+    __slots__ = ()
+    op: Callable[[object, object], bool]
+
+    def accept(self, visitor):
+        return visitor.visit_equality_expr(self)
+
+
+class FloatNegate(ex.Unary):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visit_float_negate_expr(self)
+
+
+class Not(ex.Unary):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visit_not_expr(self)
+
+
+def variant(base: type, name: str, op: Callable) -> type:
+    return type(name, (base,), {"__slots__": (), "op": staticmethod(op)})
+
+
+FLOAT_BINARIES = {
+    TokenType.PLUS: variant(FloatBinary, "FloatAdd", operator.add),
+    TokenType.MINUS: variant(FloatBinary, "FloatSubtract", operator.sub),
+    TokenType.STAR: variant(FloatBinary, "FloatMultiply", operator.mul),
+    TokenType.SLASH: variant(FloatDivision, "FloatDivide", operator.truediv),
+    TokenType.MOD: variant(FloatDivision, "FloatModulo", operator.mod),
+    TokenType.GREATER: variant(FloatBinary, "FloatGreater", operator.gt),
+    TokenType.GREATER_EQUAL: variant(
+        FloatBinary, "FloatGreaterEqual", operator.ge
+    ),
+    TokenType.LESS: variant(FloatBinary, "FloatLess", operator.lt),
+    TokenType.LESS_EQUAL: variant(FloatBinary, "FloatLessEqual", operator.le),
+}
+
+EQUALITIES = {
+    TokenType.EQUAL_EQUAL: variant(Equality, "Equal", operator.eq),
+    TokenType.BANG_EQUAL: variant(Equality, "NotEqual", operator.ne),
+}
+
+
+def specialise_binary(expr: ex.Binary, left, right) -> None:
+    """Turns `expr` into the variant for the operands it was just run
+    with, if there is one."""
+    if expr.deopts is not None and expr.deopts >= DEOPT_LIMIT:
+        return
+
+    op_type = expr.operator.type
+    if op_type in EQUALITIES:
+        expr.__class__ = EQUALITIES[op_type]
+    elif type(left) is float and type(right) is float:
+        if right or op_type not in (TokenType.SLASH, TokenType.MOD):
+            expr.__class__ = FLOAT_BINARIES[op_type]
+    elif type(left) in STRINGS and type(right) in STRINGS:
+        if op_type == TokenType.PLUS:
+            expr.__class__ = StringConcat
+
+
+def specialise_unary(expr: ex.Unary, right) -> None:
+    if expr.deopts is not None and expr.deopts >= DEOPT_LIMIT:
+        return
+
+    if expr.operator.type == TokenType.BANG:
+        expr.__class__ = Not
+    elif type(right) is float:
+        expr.__class__ = FloatNegate
+
+
+def despecialise(expr: ex.Binary | ex.Unary) -> None:
+    """Turns a variant whose guard failed back into a generic node."""
+    expr.__class__ = ex.Unary if isinstance(expr, ex.Unary) else ex.Binary
+    expr.deopts = (expr.deopts or 0) + 1
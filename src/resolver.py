@@ -5,16 +5,29 @@ import stmt as st
 from error_handler import ErrorHandler
 from lox_class import ClassType
 from lox_function import FunctionType
+from tokens import TokenType
 
 if TYPE_CHECKING:
-    import interpreter
     from tokens import Token
 
+# Tokens `Resolver.check_lazy_body` looks at.
+LAZY_CHECKED = frozenset(
+    (
+        TokenType.LEFT_BRACE,
+        TokenType.RIGHT_BRACE,
+        TokenType.FUN,
+        TokenType.CLASS,
+        TokenType.THIS,
+        TokenType.SUPER,
+        TokenType.RETURN,
+    )
+)
+
 
 class Resolver(ex.Visitor, st.Visitor):
-    def __init__(self, interpreter: "interpreter.Interpreter") -> None:
-        self.interpreter = interpreter
+    def __init__(self) -> None:
         self.scopes: list[dict[str, bool]] = []
+        self.slots: list[dict[str, int]] = []
         self.current_function = FunctionType.NONE
         self.current_class = ClassType.NONE
 
@@ -22,6 +35,18 @@ class Resolver(ex.Visitor, st.Visitor):
         return expr.accept(self)
 
     def resolve_function(self, stmt: st.Function, type: FunctionType):
+        if stmt.lazy is not None:
+            # The body is resolved once it is parsed, against the scopes as
+            # they are now.
+            stmt.lazy.context = (
+                [dict(scope) for scope in self.scopes],
+                [dict(slots) for slots in self.slots],
+                type,
+                self.current_class,
+            )
+            self.check_lazy_body(stmt.lazy.tokens, type)
+            return
+
         enclosing_function = self.current_function
         self.current_function = type
         self.begin_scope()
@@ -32,10 +57,77 @@ class Resolver(ex.Visitor, st.Visitor):
         self.end_scope()
         self.current_function = enclosing_function
 
-    def resolve_local(self, expr: ex.Expr, name: "Token"):
+    def check_lazy_body(self, tokens: list["Token"], type: FunctionType):
+        """Reports the misplaced `this`, `super` and `return` of a body left
+        unparsed, which only depend on where it is declared, going over its
+        tokens. Its other errors are reported on the function's first call.
+        """
+        if self.current_class == ClassType.SUBCLASS:
+            if type != FunctionType.INITIALIZER:
+                return
+
+        depth = 0
+        # Depths of the outermost function and class declared in the body,
+        # and the kind of declaration whose body the next brace opens.
+        function_depth = class_depth = None
+        declaring = None
+        for i, token in enumerate(tokens):
+            if token.type not in LAZY_CHECKED:
+                continue
+            msg = None
+            match token.type:
+                case TokenType.LEFT_BRACE:
+                    depth += 1
+                    if declaring == TokenType.FUN and function_depth is None:
+                        function_depth = depth
+                    if declaring == TokenType.CLASS and class_depth is None:
+                        class_depth = depth
+                    declaring = None
+                case TokenType.RIGHT_BRACE:
+                    if depth == function_depth:
+                        function_depth = None
+                    if depth == class_depth:
+                        class_depth = None
+                    depth -= 1
+                case TokenType.FUN | TokenType.CLASS:
+                    declaring = token.type
+                case _ if class_depth is not None:
+                    # Classes declared in the body have a context of their
+                    # own, left for the resolver.
+                    pass
+                case TokenType.THIS if self.current_class == ClassType.NONE:
+                    msg = "Can't use 'this' outside of a class."
+                case TokenType.SUPER if self.current_class == ClassType.NONE:
+                    msg = "Can't use 'super' outside of a class."
+                case TokenType.SUPER if self.current_class == ClassType.CLASS:
+                    msg = "Can't use 'super' in a class with no superclass."
+                case TokenType.RETURN if (
+                    type == FunctionType.INITIALIZER
+                    and function_depth is None
+                    and tokens[i + 1].type != TokenType.SEMICOLON
+                ):
+                    msg = "Can't return a value from an initializer."
+            if msg is not None:
+                ErrorHandler.error(token, msg)
+
+    def resolve_lazy_function(self, stmt: st.Function, body: list[st.Stmt]):
+        """Resolves the body of a function parsed on its first call."""
+        scopes, slots, type, self.current_class = stmt.lazy.context
+        self.scopes = list(scopes)
+        self.slots = list(slots)
+        stmt.body = body
+        stmt.lazy = None
+        self.resolve_function(stmt, type)
+
+    def resolve_local(
+        self, expr: ex.Variable | ex.Assign | ex.This | ex.Super, name: "Token"
+    ):
+        """Records on `expr` the depth and slot of the local `name` refers
+        to, leaving them `None` for globals."""
         for i in range(len(self.scopes)):
             if name.lexeme in self.scopes[~i]:
-                self.interpreter.resolve(expr, i)
+                expr.depth = i
+                expr.slot = self.slots[~i][name.lexeme]
                 return
 
     def resolve_stmt(self, stmt: st.Stmt):
@@ -47,9 +139,11 @@ class Resolver(ex.Visitor, st.Visitor):
 
     def begin_scope(self):
         self.scopes.append({})
+        self.slots.append({})
 
     def end_scope(self):
         self.scopes.pop()
+        self.slots.pop()
 
     def declare(self, name: "Token"):
         if not self.scopes:
@@ -62,12 +156,20 @@ class Resolver(ex.Visitor, st.Visitor):
             )
 
         scope[name.lexeme] = False
+        slots = self.slots[-1]
+        slots.setdefault(name.lexeme, len(slots))
 
     def define(self, name: "Token"):
         if not self.scopes:
             return
         self.scopes[-1][name.lexeme] = True
 
+    def begin_implicit_scope(self, name: str):
+        """Opens a scope holding only the implicit `this` or `super`."""
+        self.begin_scope()
+        self.scopes[-1][name] = True
+        self.slots[-1][name] = 0
+
     def visit_block_stmt(self, stmt: st.Block):
         self.begin_scope()
         self.resolve_stmts(stmt.statements)
@@ -87,11 +189,9 @@ class Resolver(ex.Visitor, st.Visitor):
                 )
             self.current_class = ClassType.SUBCLASS
             self.resolve_expr(stmt.superclass)
-            self.begin_scope()
-            self.scopes[-1]["super"] = True
+            self.begin_implicit_scope("super")
 
-        self.begin_scope()
-        self.scopes[-1]["this"] = True
+        self.begin_implicit_scope("this")
 
         for method in stmt.methods:
             type = FunctionType.METHOD
@@ -139,6 +239,14 @@ class Resolver(ex.Visitor, st.Visitor):
         if stmt.val is not None:
             self.resolve_expr(stmt.val)
 
+            # A call whose value is returned as is can reuse the frame of
+            # the function returning it.
+            val = stmt.val
+            while isinstance(val, ex.Grouping):
+                val = val.expression
+            if isinstance(val, ex.Call):
+                val.tail = True
+
     def visit_var_stmt(self, stmt: st.Var):
         self.declare(stmt.name)
 
@@ -170,6 +278,10 @@ class Resolver(ex.Visitor, st.Visitor):
     def visit_grouping_expr(self, expr: ex.Grouping):
         self.resolve_expr(expr.expression)
 
+    def visit_index_expr(self, expr: ex.Index):
+        self.resolve_expr(expr.obj)
+        self.resolve_expr(expr.index)
+
     def visit_literal_expr(self, expr: ex.Literal):
         pass
 
@@ -181,6 +293,11 @@ class Resolver(ex.Visitor, st.Visitor):
         self.resolve_expr(expr.value)
         self.resolve_expr(expr.obj)
 
+    def visit_setindex_expr(self, expr: ex.SetIndex):
+        self.resolve_expr(expr.value)
+        self.resolve_expr(expr.obj)
+        self.resolve_expr(expr.index)
+
     def visit_super_expr(self, expr: ex.Super):
         if self.current_class == ClassType.NONE:
             ErrorHandler.error(
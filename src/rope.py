@@ -0,0 +1,80 @@
+"""Strings built by repeated concatenation, kept as their pieces.
+
+Appending to a Python string copies it, so a loop building a string with
+`s = s + piece` takes time quadratic in its length. Once a concatenation
+is `MIN_LENGTH` characters long it makes a `Rope` instead, to which
+further pieces are appended in constant time, and which is only joined
+into a string when its text is needed: when it is printed, compared, used
+as a map key or measured by a native.
+
+Only appending is cheap: putting a string in front of a rope still copies
+the rope.
+"""
+
+# Shorter results are concatenated directly, which is faster than keeping
+# their pieces while they are small.
+MIN_LENGTH = 256
+
+
+class Rope:
+    """Text made of the first `count` strings of `parts`.
+
+    Ropes are immutable but share their list of parts: appending to a rope
+    adds to the end of its list if no other rope has yet, so a chain of
+    appends reuses a single list.
+    """
+
+    __slots__ = "parts", "count", "length", "text"
+
+    def __init__(self, parts: list[str], count: int, length: int) -> None:
+        self.parts = parts
+        self.count = count
+        self.length = length
+        # The joined parts, once they have been joined.
+        self.text: str | None = None
+
+    def append(self, piece: str) -> "Rope":
+        parts = self.parts
+        if len(parts) != self.count:
+            parts = parts[: self.count]
+        parts.append(piece)
+        return Rope(parts, self.count + 1, self.length + len(piece))
+
+    def flatten(self) -> str:
+        text = self.text
+        if text is None:
+            parts = self.parts
+            if len(parts) != self.count:
+                parts = parts[: self.count]
+            text = self.text = "".join(parts)
+        return text
+
+    def __str__(self) -> str:
+        return self.flatten()
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is Rope:
+            other = other.flatten()
+        return other.__class__ is str and self.flatten() == other
+
+    def __hash__(self) -> int:
+        return hash(self.flatten())
+
+
+# Types of the values Lox treats as strings.
+STRINGS = (str, Rope)
+
+
+def concat(left: str | Rope, right: str | Rope) -> str | Rope:
+    if right.__class__ is Rope:
+        right = right.flatten()
+    if left.__class__ is Rope:
+        return left.append(right)
+
+    length = len(left) + len(right)
+    if length < MIN_LENGTH:
+        return left + right
+    return Rope([left, right], 2, length)
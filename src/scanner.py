@@ -1,6 +1,83 @@
+import codecs
+import re
+from typing import BinaryIO, Iterable, Iterator, TextIO
+
 from error_handler import ErrorHandler
 from tokens import Token, TokenType
 
+KEYWORDS = {
+    "add": TokenType.AND,
+    "class": TokenType.CLASS,
+    "else": TokenType.ELSE,
+    "false": TokenType.FALSE,
+    "for": TokenType.FOR,
+    "fun": TokenType.FUN,
+    "if": TokenType.IF,
+    "nil": TokenType.NIL,
+    "or": TokenType.OR,
+    "print": TokenType.PRINT,
+    "return": TokenType.RETURN,
+    "super": TokenType.SUPER,
+    "true": TokenType.TRUE,
+    "var": TokenType.VAR,
+    "while": TokenType.WHILE,
+}
+LITERALS = {"true": True, "false": False, "nil": None}
+
+SINGLE_TOKENS = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    "[": TokenType.LEFT_BRACKET,
+    "]": TokenType.RIGHT_BRACKET,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    "-": TokenType.MINUS,
+    "+": TokenType.PLUS,
+    ";": TokenType.SEMICOLON,
+    "*": TokenType.STAR,
+    "%": TokenType.MOD,
+}
+OPERATORS = SINGLE_TOKENS | {
+    "/": TokenType.SLASH,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    "=": TokenType.EQUAL,
+    "==": TokenType.EQUAL_EQUAL,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+}
+
+# Characters of source `RegexScanner` scans at a time.
+CHUNK_SIZE = 1 << 16
+
+# Lexemes with a fixed text, with the literal value they stand for.
+FIXED_LEXEMES = {text: (type, None) for text, type in OPERATORS.items()} | {
+    text: (type, LITERALS.get(text)) for text, type in KEYWORDS.items()
+}
+
+# Captures the next lexeme after any blanks: a newline, an identifier, a
+# comment, an operator, a number, a string (possibly unterminated) or any
+# other single character, which is an error.
+TOKEN_PATTERN = re.compile(
+    r"""
+    [^\S\n]*
+    (
+        \n
+        | [^\W\d_][^\W_]*
+        | //[^\n]*
+        | [!=<>]=? | [-(){}[\],.+;*%/]
+        | \d+(?:\.\d*)?
+        | "[^"]*"?
+        | \S
+    )
+    """,
+    re.VERBOSE,
+)
+
 
 class Scanner:
     def __init__(self, source: str) -> None:
@@ -11,44 +88,21 @@ class Scanner:
         self.start = 0
         self.line = 1
 
-        self.keywords = {
-            "add": TokenType.AND,
-            "class": TokenType.CLASS,
-            "else": TokenType.ELSE,
-            "false": TokenType.FALSE,
-            "for": TokenType.FOR,
-            "fun": TokenType.FUN,
-            "if": TokenType.IF,
-            "nil": TokenType.NIL,
-            "or": TokenType.OR,
-            "print": TokenType.PRINT,
-            "return": TokenType.RETURN,
-            "super": TokenType.SUPER,
-            "true": TokenType.TRUE,
-            "var": TokenType.VAR,
-            "while": TokenType.WHILE,
-        }
-        self.single_tokens = {
-            "(": TokenType.LEFT_PAREN,
-            ")": TokenType.RIGHT_PAREN,
-            "{": TokenType.LEFT_BRACE,
-            "}": TokenType.RIGHT_BRACE,
-            ",": TokenType.COMMA,
-            ".": TokenType.DOT,
-            "-": TokenType.MINUS,
-            "+": TokenType.PLUS,
-            ";": TokenType.SEMICOLON,
-            "*": TokenType.STAR,
-            "%": TokenType.MOD,
-        }
+        self.keywords = KEYWORDS
+        self.single_tokens = SINGLE_TOKENS
 
     def scan_tokens(self) -> list[Token]:
+        return list(self.iter_tokens())
+
+    def iter_tokens(self) -> Iterator[Token]:
+        """Yields tokens as they are scanned, `EOF` last."""
         while not self.is_at_end():
             self.start = self.cur
             self.scan_token()
+            yield from self.tokens
+            self.tokens.clear()
 
-        self.tokens.append(Token(TokenType.EOF, "", None, self.line))
-        return self.tokens
+        yield Token(TokenType.EOF, "", None, self.line)
 
     def scan_token(self):
         c = self.advance()
@@ -143,7 +197,7 @@ class Scanner:
 
         text = self.source[self.start : self.cur]
         type = self.keywords.get(text, TokenType.IDENTIFIER)
-        literal = {"true": True, "false": False, "nil": None}.get(text)
+        literal = LITERALS.get(text)
         self.add_token(type, literal)
 
     def advance(self):
@@ -171,3 +225,94 @@ class Scanner:
 
     def is_at_end(self):
         return self.cur >= len(self.source)
+
+
+class RegexScanner(Scanner):
+    """Splits the source into lexemes with `TOKEN_PATTERN` and tells them
+    apart by their first character, producing the same tokens and errors
+    as `Scanner` without stepping through the source a character at a
+    time.
+
+    The source can also be an iterable of chunks of text, such as the one
+    `read_chunks` makes of a file, which is then scanned one chunk at a
+    time.
+    """
+
+    def __init__(self, source: str | Iterable[str]) -> None:
+        super().__init__(source)
+
+    def iter_tokens(self) -> Iterator[Token]:
+        source = chunks = self.source
+        if isinstance(source, str):
+            chunks = (
+                source[i : i + CHUNK_SIZE]
+                for i in range(0, len(source), CHUNK_SIZE)
+            )
+
+        pending = ""
+        for chunk in chunks:
+            text = pending + chunk
+            lexemes = TOKEN_PATTERN.findall(text)
+
+            # A lexeme running up to the end of the chunk may go on in the
+            # next one, so it is scanned again along with it.
+            pending = ""
+            if lexemes and text.endswith(lexemes[-1]):
+                pending = lexemes.pop()
+
+            yield from self.scan_lexemes(lexemes)
+
+        yield from self.scan_lexemes(TOKEN_PATTERN.findall(pending))
+        yield Token(TokenType.EOF, "", None, self.line)
+
+    def scan_lexemes(self, lexemes: list[str]) -> list[Token]:
+        tokens = []
+        append = tokens.append
+        fixed_lexemes = FIXED_LEXEMES
+        line = self.line
+
+        for text in lexemes:
+            fixed = fixed_lexemes.get(text)
+            if fixed is not None:
+                append(Token(fixed[0], text, fixed[1], line))
+                continue
+
+            c = text[0]
+            if c == "\n":
+                line += 1
+
+            elif c == "/":
+                pass  # A comment, as a lone slash is a fixed lexeme.
+
+            elif c == '"':
+                line += text.count("\n")
+                if len(text) == 1 or text[-1] != '"':
+                    ErrorHandler.error(line, "Unexpected character.")
+                else:
+                    value = text[1:-1]
+                    append(Token(TokenType.STRING, text, value, line))
+
+            elif c.isdecimal():
+                append(Token(TokenType.NUMBER, text, float(text), line))
+
+            elif c.isalnum() and c != "_":
+                append(Token(TokenType.IDENTIFIER, text, None, line))
+
+            else:
+                ErrorHandler.error(line, "Unexpected character.")
+
+        self.line = line
+        return tokens
+
+
+def read_chunks(
+    file: TextIO | BinaryIO, size: int = CHUNK_SIZE
+) -> Iterator[str]:
+    """Reads a text file, or a binary one holding UTF-8 such as a memory
+    mapped file, in chunks of text."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while chunk := file.read(size):
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        yield chunk
+    yield decoder.decode(b"", final=True)
@@ -0,0 +1,49 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from lox_class import LoxClass
+    from lox_function import LoxFunction
+
+# Instances given more fields than this keep them in a dict instead.
+MAX_FIELDS = 32
+
+
+class Shape:
+    """Layout shared by the instances of a class that were given the same
+    fields in the same order.
+
+    `slots` maps field names to their index in `LoxInstance.values` and
+    `transitions` records the shape reached by adding each new field, so
+    instances built the same way, typically by `init`, share their shapes.
+    """
+
+    __slots__ = "klass", "slots", "transitions"
+
+    def __init__(
+        self, klass: "LoxClass", slots: dict[str, int] | None = None
+    ) -> None:
+        self.klass = klass
+        self.slots: dict[str, int] = {} if slots is None else slots
+        self.transitions: dict[str, Shape] = {}
+
+    def lookup(self, name: str) -> "int | LoxFunction | None":
+        """Finds what reading `name` gives: a field index or a method."""
+        index = self.slots.get(name)
+        if index is not None:
+            return index
+        return self.klass.find_method(name)
+
+    def transition(self, name: str) -> "tuple[int, Shape] | None":
+        """Finds the index writing `name` stores to and the shape the
+        instance has afterwards, or `None` if it must switch to a dict."""
+        index = self.slots.get(name)
+        if index is not None:
+            return index, self
+
+        shape = self.transitions.get(name)
+        if shape is None:
+            if len(self.slots) == MAX_FIELDS:
+                return None
+            slots = {**self.slots, name: len(self.slots)}
+            shape = self.transitions[name] = Shape(self.klass, slots)
+        return len(self.slots), shape
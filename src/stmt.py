@@ -46,12 +46,16 @@ class Visitor(ABC, Generic[V]):
 
 
 class Stmt(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def accept(self, visitor: Visitor[V]) -> V:
         ...
 
 
 class Block(Stmt):
+    __slots__ = ("statements",)
+
     def __init__(self, statements: list[Stmt]):
         self.statements: list[Stmt] = statements
 
@@ -60,6 +64,8 @@ class Block(Stmt):
 
 
 class Class(Stmt):
+    __slots__ = "name", "superclass", "methods"
+
     def __init__(
         self,
         name: Token,
@@ -75,6 +81,8 @@ class Class(Stmt):
 
 
 class Expression(Stmt):
+    __slots__ = ("expression",)
+
     def __init__(self, expression: Expr):
         self.expression: Expr = expression
 
@@ -83,16 +91,21 @@ class Expression(Stmt):
 
 
 class Function(Stmt):
+    __slots__ = "name", "params", "body", "lazy"
+
     def __init__(self, name: Token, params: list[Token], body: list[Stmt]):
         self.name: Token = name
         self.params: list[Token] = params
         self.body: list[Stmt] = body
+        self.lazy = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_function_stmt(self)
 
 
 class If(Stmt):
+    __slots__ = "condition", "then_branch", "else_branch"
+
     def __init__(
         self, condition: Expr, then_branch: Stmt, else_branch: Stmt | None
     ):
@@ -105,6 +118,8 @@ class If(Stmt):
 
 
 class Print(Stmt):
+    __slots__ = ("expression",)
+
     def __init__(self, expression: Expr):
         self.expression: Expr = expression
 
@@ -113,6 +128,8 @@ class Print(Stmt):
 
 
 class Return(Stmt):
+    __slots__ = "keyword", "val"
+
     def __init__(self, keyword: Token, val: Expr | None):
         self.keyword: Token = keyword
         self.val: Expr | None = val
@@ -122,6 +139,8 @@ class Return(Stmt):
 
 
 class Var(Stmt):
+    __slots__ = "name", "initializer"
+
     def __init__(self, name: Token, initializer: Expr | None):
         self.name: Token = name
         self.initializer: Expr | None = initializer
@@ -131,6 +150,8 @@ class Var(Stmt):
 
 
 class While(Stmt):
+    __slots__ = "condition", "body"
+
     def __init__(self, condition: Expr, body: Stmt):
         self.condition: Expr = condition
         self.body: Stmt = body
@@ -5,7 +5,8 @@ __all__ = "TokenType", "Token"
 TokenType = Enum(
     "TokenType",
     """
-    LEFT_PAREN, RIGHT_PAREN, LEFT_BRACE, RIGHT_BRACE, MOD,
+    LEFT_PAREN, RIGHT_PAREN, LEFT_BRACE, RIGHT_BRACE, LEFT_BRACKET,
+    RIGHT_BRACKET, MOD,
     COMMA, DOT, MINUS, PLUS, SEMICOLON, SLASH, STAR,
 
     BANG, BANG_EQUAL, EQUAL, EQUAL_EQUAL, GREATER,
@@ -22,6 +23,8 @@ TokenType = Enum(
 
 
 class Token:
+    __slots__ = "type", "lexeme", "literal", "line"
+
     def __init__(self, type: TokenType, lexeme: str, literal, line: int):
         self.type = type
         self.lexeme = lexeme
@@ -0,0 +1,910 @@
+import functools
+import hashlib
+import itertools
+from types import CodeType
+
+import expr as ex
+import stmt as st
+import transpiler_runtime as rt
+from error_handler import ErrorHandler, RuntimeErr
+from interpreter import Interpreter
+from native_functions import built_ins
+from tokens import Token, TokenType
+
+COMPARISONS = {
+    TokenType.MINUS: "-",
+    TokenType.STAR: "*",
+    TokenType.GREATER: ">",
+    TokenType.GREATER_EQUAL: ">=",
+    TokenType.LESS: "<",
+    TokenType.LESS_EQUAL: "<=",
+}
+
+BOOLEAN_OPS = (
+    TokenType.GREATER,
+    TokenType.GREATER_EQUAL,
+    TokenType.LESS,
+    TokenType.LESS_EQUAL,
+    TokenType.EQUAL_EQUAL,
+    TokenType.BANG_EQUAL,
+)
+
+# Separates a Lox line number from the code that follows it inside a
+# generated expression; `emit` turns them into physical line breaks.
+MARK, END_MARK = "\x00", "\x01"
+
+# Expressions nested deeper than this are generated as a flat sequence of
+# temporaries instead, as every level nests the code a few parentheses
+# deeper and Python's parser gives up at 200.
+MAX_NESTING = 32
+
+
+class TooDeep(Exception):
+    """Raised to generate an expression again as a flat sequence."""
+
+
+class Decl:
+    """A local variable and the Python name it is given."""
+
+    __slots__ = "py_name", "owner", "in_loop", "boxed"
+
+    def __init__(self, py_name: str, owner: "FunctionInfo", in_loop: bool):
+        self.py_name = py_name
+        self.owner = owner
+        self.in_loop = in_loop
+        self.boxed = False
+
+
+class FunctionInfo:
+    __slots__ = "parent", "free_boxed", "nonlocals"
+
+    def __init__(self, parent: "FunctionInfo | None") -> None:
+        self.parent = parent
+        self.free_boxed: dict[str, Decl] = {}
+        self.nonlocals: set[str] = set()
+
+
+class Analyzer(ex.Visitor, st.Visitor):
+    """Names every local and finds how closures capture them.
+
+    Python closures share one cell per variable and call, while a Lox block
+    creates fresh variables each time it runs. The two only disagree about
+    variables declared inside a loop and captured by a closure; those are
+    marked `boxed` and live in a one-element list that every closure created
+    in that iteration receives through a factory function.
+    """
+
+    def __init__(self) -> None:
+        self.scopes: list[dict[str, Decl]] = []
+        self.decls: dict[Token, Decl] = {}
+        self.refs: dict[ex.Expr, Decl] = {}
+        self.functions: dict[st.Function, FunctionInfo] = {}
+        self.root = self.function = FunctionInfo(None)
+        self.loop_depth = 0
+        self.counter = itertools.count()
+
+    def analyze(self, stmts: list[st.Stmt]):
+        for stmt in stmts:
+            stmt.accept(self)
+
+    def declare(self, name: Token):
+        if not self.scopes:
+            return
+
+        decl = Decl(
+            f"{name.lexeme}_{next(self.counter)}",
+            self.function,
+            self.loop_depth > 0,
+        )
+        self.scopes[-1][name.lexeme] = decl
+        self.decls[name] = decl
+
+    def reference(self, expr: ex.Expr, name: Token, assign: bool = False):
+        for scope in reversed(self.scopes):
+            if name.lexeme in scope:
+                decl = scope[name.lexeme]
+                break
+        else:
+            return
+
+        self.refs[expr] = decl
+        if decl.owner is self.function:
+            return
+
+        if decl.in_loop:
+            decl.boxed = True
+            function = self.function
+            while function is not decl.owner:
+                function.free_boxed[decl.py_name] = decl
+                function = function.parent
+        elif assign:
+            self.function.nonlocals.add(decl.py_name)
+
+    def analyze_function(self, stmt: st.Function, method: bool = False):
+        enclosing, loop_depth = self.function, self.loop_depth
+        self.function = self.functions[stmt] = FunctionInfo(enclosing)
+        self.loop_depth = 0
+        if method:
+            # `this` is an implicit first parameter of every method.
+            self.scopes.append({"this": Decl("this", self.function, False)})
+        self.scopes.append({})
+        for param in stmt.params:
+            self.declare(param)
+        self.analyze(stmt.body)
+        self.scopes.pop()
+        if method:
+            self.scopes.pop()
+        self.function, self.loop_depth = enclosing, loop_depth
+
+    def visit_block_stmt(self, stmt: st.Block):
+        self.scopes.append({})
+        self.analyze(stmt.statements)
+        self.scopes.pop()
+
+    def visit_class_stmt(self, stmt: st.Class):
+        self.declare(stmt.name)
+        if stmt.superclass is not None:
+            stmt.superclass.accept(self)
+        for method in stmt.methods:
+            self.analyze_function(method, method=True)
+
+    def visit_expression_stmt(self, stmt: st.Expression):
+        stmt.expression.accept(self)
+
+    def visit_function_stmt(self, stmt: st.Function):
+        self.declare(stmt.name)
+        self.analyze_function(stmt)
+
+    def visit_if_stmt(self, stmt: st.If):
+        stmt.condition.accept(self)
+        stmt.then_branch.accept(self)
+        if stmt.else_branch is not None:
+            stmt.else_branch.accept(self)
+
+    def visit_print_stmt(self, stmt: st.Print):
+        stmt.expression.accept(self)
+
+    def visit_return_stmt(self, stmt: st.Return):
+        if stmt.val is not None:
+            stmt.val.accept(self)
+
+    def visit_var_stmt(self, stmt: st.Var):
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+        self.declare(stmt.name)
+
+    def visit_while_stmt(self, stmt: st.While):
+        self.loop_depth += 1
+        stmt.condition.accept(self)
+        stmt.body.accept(self)
+        self.loop_depth -= 1
+
+    def visit_assign_expr(self, expr: ex.Assign):
+        expr.value.accept(self)
+        self.reference(expr, expr.name, assign=True)
+
+    def visit_binary_expr(self, expr: ex.Binary):
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visit_call_expr(self, expr: ex.Call):
+        expr.callee.accept(self)
+        for arg in expr.args:
+            arg.accept(self)
+
+    def visit_get_expr(self, expr: ex.Get):
+        expr.obj.accept(self)
+
+    def visit_grouping_expr(self, expr: ex.Grouping):
+        expr.expression.accept(self)
+
+    def visit_index_expr(self, expr: ex.Index):
+        expr.obj.accept(self)
+        expr.index.accept(self)
+
+    def visit_literal_expr(self, expr: ex.Literal):
+        pass
+
+    def visit_logical_expr(self, expr: ex.Logical):
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visit_set_expr(self, expr: ex.Set):
+        expr.obj.accept(self)
+        expr.value.accept(self)
+
+    def visit_setindex_expr(self, expr: ex.SetIndex):
+        expr.obj.accept(self)
+        expr.index.accept(self)
+        expr.value.accept(self)
+
+    def visit_super_expr(self, expr: ex.Super):
+        pass
+
+    def visit_this_expr(self, expr: ex.This):
+        pass
+
+    def visit_unary_expr(self, expr: ex.Unary):
+        expr.right.accept(self)
+
+    def visit_variable_expr(self, expr: ex.Variable):
+        self.reference(expr, expr.name)
+
+
+class Transpiler(ex.Visitor, st.Visitor):
+    """Translates a resolved program into the source of a Python function.
+
+    Lox locals become Python locals and Lox globals become module globals
+    suffixed with `_g`; since Lox identifiers cannot contain underscores no
+    generated name can clash with them. Expressions inline the fast path of
+    every operation and call into `transpiler_runtime` for the rest.
+
+    Alongside the source, `transpile` returns the Lox line of every Python
+    line so errors raised by Python itself can be reported like Lox ones.
+    """
+
+    def __init__(self, known_globals: set[str]) -> None:
+        # Lox globals certainly defined when the code runs, which can be
+        # assigned without checking.
+        self.known_globals = known_globals
+
+    def transpile(self, stmts: list[st.Stmt]) -> tuple[str, list[int]]:
+        analyzer = Analyzer()
+        analyzer.analyze(stmts)
+        self.decls = analyzer.decls
+        self.refs = analyzer.refs
+        self.functions = analyzer.functions
+        self.temps = itertools.count()
+        self.lines: list[tuple[int, str, int]] = []
+        self.indent = 0
+        self.line = 1
+        self.function: FunctionInfo | None = None
+        self.global_names: set[str] = set()
+        self.is_init = False
+        # Depth of the expression being generated, and the temporaries it
+        # is flattened into once generated as a sequence.
+        self.nesting = 0
+        self.sequence: list[str] | None = None
+
+        saved = self.begin_function(analyzer.root, False)
+        self.emit_stmts(stmts)
+        self.end_function(saved, "def _main():", 1)
+
+        source = "\n".join(
+            " " * 4 * indent + text for indent, text, _ in self.lines
+        )
+        return source, [line for _, _, line in self.lines]
+
+    def temp(self) -> str:
+        return f"_t{next(self.temps)}"
+
+    def mark(self, line: int) -> str:
+        return f"{MARK}{line}{END_MARK}"
+
+    def emit(self, text: str, line: int | None = None):
+        """Adds a line of code, split wherever an expression moves on to
+        another Lox line so every Python line maps to exactly one."""
+        first, *rest = text.split(MARK)
+        if line is None:
+            line = int(rest[0].split(END_MARK)[0]) if rest else self.line
+
+        physical = [[first, line]]
+        for part in rest:
+            mark, code = part.split(END_MARK)
+            mark = int(mark)
+            if mark == physical[-1][1] or not physical[-1][0].strip():
+                physical[-1][0] += code
+                physical[-1][1] = mark
+            else:
+                physical.append([code, mark])
+
+        for code, line in physical:
+            self.lines.append((self.indent, code, line))
+        self.line = physical[-1][1]
+
+    def emit_stmts(self, stmts: list[st.Stmt]):
+        for stmt in stmts:
+            stmt.accept(self)
+
+    def emit_suite(self, stmt: st.Stmt):
+        self.indent += 1
+        count = len(self.lines)
+        stmt.accept(self)
+        if len(self.lines) == count:
+            self.emit("pass")
+        self.indent -= 1
+
+    def begin_function(self, info: FunctionInfo, is_init: bool):
+        saved = (
+            self.lines,
+            self.indent,
+            self.function,
+            self.global_names,
+            self.is_init,
+        )
+        self.lines = []
+        self.indent = 1
+        self.function = info
+        self.global_names = set()
+        self.is_init = is_init
+        return saved
+
+    def end_function(self, saved: tuple, header: str, line: int):
+        body, global_names, info = self.lines, self.global_names, self.function
+        (
+            self.lines,
+            self.indent,
+            self.function,
+            self.global_names,
+            self.is_init,
+        ) = saved
+
+        self.emit(header, line)
+        self.indent += 1
+        if global_names:
+            self.emit("global " + ", ".join(sorted(global_names)), line)
+        if info is not None and info.nonlocals:
+            self.emit("nonlocal " + ", ".join(sorted(info.nonlocals)), line)
+        if not body:
+            self.emit("pass", line)
+        self.indent -= 1
+
+        for indent, text, lox_line in body:
+            self.lines.append((self.indent + indent, text, lox_line))
+
+    def global_name(self, name: Token) -> str:
+        return f"{name.lexeme}_g"
+
+    def emit_define(self, name: Token, value: str):
+        decl = self.decls.get(name)
+        if decl is None:
+            target = self.global_name(name)
+            self.global_names.add(target)
+            self.emit(f"{target} = ({value})", name.line)
+            self.known_globals.add(name.lexeme)
+        elif decl.boxed:
+            self.emit(f"{decl.py_name} = [({value})]", name.line)
+        else:
+            self.emit(f"{decl.py_name} = ({value})", name.line)
+
+    def emit_closure(
+        self, name: Token, free: dict[str, Decl], emit_def, def_name: str
+    ):
+        """Binds `name` to the function or class `emit_def` defines as
+        `def_name`, going through a factory taking the boxed variables
+        it closes over, if any."""
+        decl = self.decls.get(name)
+        target = self.global_name(name) if decl is None else decl.py_name
+        if decl is None:
+            self.global_names.add(target)
+        elif decl.boxed:
+            self.emit(f"{target} = [None]", name.line)
+
+        if free:
+            factory = f"_make_{def_name}"
+            params = ", ".join(free)
+            saved = self.begin_function(None, False)
+            emit_def()
+            self.emit(f"return {def_name}", name.line)
+            self.end_function(saved, f"def {factory}({params}):", name.line)
+            value = f"{factory}({params})"
+        else:
+            emit_def()
+            value = def_name
+
+        if decl is not None and decl.boxed:
+            self.emit(f"{target}[0] = {value}", name.line)
+        elif value != target:
+            self.emit(f"{target} = {value}", name.line)
+
+        if decl is None:
+            self.known_globals.add(name.lexeme)
+
+    def def_name(self, name: Token) -> str:
+        decl = self.decls.get(name)
+        if decl is None:
+            return self.global_name(name)
+        if decl.boxed:
+            return f"{decl.py_name}_fn"
+        return decl.py_name
+
+    def emit_function(self, stmt: st.Function, def_name: str, method: bool):
+        is_init = method and stmt.name.lexeme == "init"
+        params = [self.decls[param].py_name for param in stmt.params]
+        if method:
+            params.insert(0, "this")
+
+        line = stmt.name.line
+        saved = self.begin_function(self.functions[stmt], is_init)
+        # Calls are counted like in the other engines, as Python's own
+        # recursion limit has to be far higher than `max_call_depth`.
+        self.global_names.add("_depth")
+        self.emit("if _depth == _max_depth:", line)
+        self.emit("    _stack_overflow()", line)
+        self.emit("_depth += 1", line)
+        self.emit("try:", line)
+        self.indent += 1
+        self.emit_stmts(stmt.body)
+        if is_init:
+            self.emit("return this", line)
+        elif self.lines[-1][1] == "try:":
+            self.emit("pass", line)
+        self.indent -= 1
+        self.emit("finally:", line)
+        self.emit("    _depth -= 1", line)
+        header = f"def {def_name}({', '.join(params)}):"
+        self.end_function(saved, header, stmt.name.line)
+        self.emit(f"{def_name}._lox_arity = {len(stmt.params)}", stmt.name.line)
+
+    def visit_block_stmt(self, stmt: st.Block):
+        self.emit_stmts(stmt.statements)
+
+    def visit_class_stmt(self, stmt: st.Class):
+        line = stmt.name.line
+        free = {}
+        for method in stmt.methods:
+            free |= self.functions[method].free_boxed
+
+        base = "_LoxObject"
+        if stmt.superclass is not None:
+            base = self.temp()
+            superclass = self.generate(stmt.superclass)
+            self.emit(
+                f"{base} = _check_superclass({superclass}, "
+                f"{stmt.superclass.name.line})",
+                stmt.superclass.name.line,
+            )
+            free = {**free, base: None}
+
+        def_name = self.def_name(stmt.name)
+
+        def emit_class():
+            self.emit(f"class {def_name}({base}):", line)
+            self.indent += 1
+            init = None
+            for method in stmt.methods:
+                name = rt.attribute_name(method.name.lexeme)
+                self.emit_function(method, name, method=True)
+                if name == "init":
+                    init = method
+
+            if init is not None:
+                self.emit(f"_lox_init_arity = {len(init.params)}", line)
+                self.emit("def __init__(this, *args, _init=init):", line)
+                self.emit("    _init(this, *args)", line)
+            elif not stmt.methods:
+                self.emit("pass", line)
+            self.indent -= 1
+
+        self.emit_closure(stmt.name, free, emit_class, def_name)
+
+    def visit_expression_stmt(self, stmt: st.Expression):
+        expression = stmt.expression
+        if isinstance(expression, ex.Assign):
+            self.emit_assign(expression)
+        elif isinstance(expression, ex.Set):
+            self.emit_set(expression)
+        else:
+            self.emit(f"({self.generate(expression)})")
+
+    def visit_function_stmt(self, stmt: st.Function):
+        def_name = self.def_name(stmt.name)
+        self.emit_closure(
+            stmt.name,
+            self.functions[stmt].free_boxed,
+            lambda: self.emit_function(stmt, def_name, method=False),
+            def_name,
+        )
+
+    def visit_if_stmt(self, stmt: st.If):
+        keyword = "if"
+        while True:
+            self.emit(f"{keyword} ({self.condition(stmt.condition)}):")
+            self.emit_suite(stmt.then_branch)
+            stmt = stmt.else_branch
+            if not isinstance(stmt, st.If):
+                break
+            keyword = "elif"
+
+        if stmt is not None:
+            self.emit("else:")
+            self.emit_suite(stmt)
+
+    def visit_print_stmt(self, stmt: st.Print):
+        self.emit(f"print(_stringfy({self.generate(stmt.expression)}))")
+
+    def visit_return_stmt(self, stmt: st.Return):
+        line = stmt.keyword.line
+        if self.is_init:
+            self.emit("return this", line)
+        elif stmt.val is None:
+            self.emit("return None", line)
+        elif isinstance(stmt.val, ex.Call) and stmt.val.tail:
+            # Tail calls don't count towards the depth of the function
+            # making them, which they replace in the other engines.
+            self.emit("_depth -= 1", line)
+            self.emit("try:", line)
+            self.emit(f"    return ({self.generate(stmt.val)})", line)
+            self.emit("finally:", line)
+            self.emit("    _depth += 1", line)
+        else:
+            self.emit(f"return ({self.generate(stmt.val)})", line)
+
+    def visit_var_stmt(self, stmt: st.Var):
+        value = "None"
+        if stmt.initializer is not None:
+            value = self.generate(stmt.initializer)
+        self.emit_define(stmt.name, value)
+
+    def visit_while_stmt(self, stmt: st.While):
+        self.emit(f"while ({self.condition(stmt.condition)}):")
+        self.emit_suite(stmt.body)
+
+    def generate(self, expr: ex.Expr) -> str:
+        if self.sequence is not None:
+            code = expr.accept(self)
+            if isinstance(expr, (ex.Grouping, ex.Literal, ex.This)):
+                return code
+            return self.bind(code)
+
+        if self.nesting == MAX_NESTING:
+            raise TooDeep
+        self.nesting += 1
+        try:
+            return expr.accept(self)
+        except TooDeep:
+            if self.nesting > 1:
+                raise
+        finally:
+            self.nesting -= 1
+        return self.generate_apart(expr)
+
+    def generate_conditional(self, expr: ex.Expr) -> str:
+        if self.sequence is None:
+            return self.generate(expr)
+        return self.generate_apart(expr)
+
+    def generate_apart(self, expr: ex.Expr) -> str:
+        """Generates an expression as a sequence of its own, for operands
+        only evaluated under a condition, which the sequence of the
+        expression holding them must not evaluate beforehand."""
+        saved, self.sequence = self.sequence, []
+        code = expr.accept(self)
+        sequence, self.sequence = self.sequence, saved
+        if not sequence:
+            return code
+        return f"[{', '.join(sequence)}, {code}][-1]"
+
+    def bind(self, code: str) -> str:
+        """Evaluates `code` at this point of the sequence being generated,
+        if there is one, returning a temporary holding its value."""
+        if self.sequence is None:
+            return code
+        t = self.temp()
+        self.sequence.append(f"{t} := {code}")
+        return t
+
+    def is_this(self, expr: ex.Expr) -> bool:
+        """Tells whether `expr` reads `this`, which is always an instance."""
+        decl = self.refs.get(expr)
+        return decl is not None and decl.py_name == "this"
+
+    def condition(self, expr: ex.Expr) -> str:
+        """Generates an expression Python can test for Lox truthiness."""
+        while isinstance(expr, ex.Grouping):
+            expr = expr.expression
+
+        if (
+            isinstance(expr, ex.Binary)
+            and expr.operator.type in BOOLEAN_OPS
+            or isinstance(expr, ex.Unary)
+            and expr.operator.type == TokenType.BANG
+        ):
+            return self.generate(expr)
+
+        t = self.temp()
+        return (
+            f"({t} := {self.generate(expr)}) is not None and {t} is not False"
+        )
+
+    def emit_assign(self, expr: ex.Assign):
+        value = self.generate(expr.value)
+        line = expr.name.line
+        decl = self.refs.get(expr)
+        if decl is None:
+            name = self.global_name(expr.name)
+            if expr.name.lexeme not in self.known_globals:
+                self.emit(f'_set_global("{name}", ({value}), {line})', line)
+                return
+            self.global_names.add(name)
+            self.emit(f"{name} = ({value})", line)
+        elif decl.boxed:
+            self.emit(f"{decl.py_name}[0] = ({value})", line)
+        else:
+            self.emit(f"{decl.py_name} = ({value})", line)
+
+    def emit_set(self, expr: ex.Set):
+        line = expr.name.line
+        name = rt.attribute_name(expr.name.lexeme)
+        if self.is_this(expr.obj):
+            obj = "this"
+        else:
+            obj = self.temp()
+            self.emit(
+                f"{obj} = _check_instance({self.generate(expr.obj)}, {line})"
+            )
+        self.emit(f"{obj}.{name} = ({self.generate(expr.value)})", line)
+
+    def visit_assign_expr(self, expr: ex.Assign):
+        value = self.generate(expr.value)
+        decl = self.refs.get(expr)
+        if decl is None:
+            name = self.global_name(expr.name)
+            if expr.name.lexeme not in self.known_globals:
+                return f'_set_global("{name}", {value}, {expr.name.line})'
+            self.global_names.add(name)
+            return f"({name} := {value})"
+        if decl.boxed:
+            return f"_set_box({decl.py_name}, {value})"
+        return f"({decl.py_name} := {value})"
+
+    def visit_binary_expr(self, expr: ex.Binary):
+        left = self.generate(expr.left)
+        right = self.generate(expr.right)
+        op = expr.operator
+        line = op.line
+
+        match op.type:
+            case TokenType.EQUAL_EQUAL:
+                return f"({left} == {right})"
+            case TokenType.BANG_EQUAL:
+                return f"({left} != {right})"
+
+        a, b = self.temp(), self.temp()
+        floats = f"type({a} := {left}) is type({b} := {right}) is float"
+        match op.type:
+            case TokenType.PLUS:
+                return f"({a} + {b} if {floats} else _add({a}, {b}, {line}))"
+            case TokenType.SLASH:
+                return (
+                    f"({a} / {b} if {floats} and {b} "
+                    f"else _divide({a}, {b}, {line}))"
+                )
+            case TokenType.MOD:
+                return (
+                    f"({a} % {b} if {floats} and {b} "
+                    f"else _modulo({a}, {b}, {line}))"
+                )
+
+        return (
+            f"({a} {COMPARISONS[op.type]} {b} if {floats} "
+            f"else _numbers_error({line}))"
+        )
+
+    def visit_call_expr(self, expr: ex.Call):
+        callee = self.generate(expr.callee)
+        args = [self.generate(arg) for arg in expr.args]
+        line = expr.paren.line
+        c = self.temp()
+        joined = ", ".join(args)
+        packed = f"({joined},)" if len(args) == 1 else f"({joined})"
+        return (
+            f"({self.mark(line)}{c}({joined}) "
+            f'if getattr({c} := {callee}, "_lox_arity", None) == {len(args)} '
+            f"else _call({c}, {packed}, {line}))"
+        )
+
+    def visit_get_expr(self, expr: ex.Get):
+        name = rt.attribute_name(expr.name.lexeme)
+        line = expr.name.line
+        if self.is_this(expr.obj):
+            return f"{self.mark(line)}this.{name}"
+
+        obj = self.temp()
+        return (
+            f"({self.mark(line)}{obj}.{name} "
+            f"if isinstance({obj} := {self.generate(expr.obj)}, _LoxObject) "
+            f"else _not_instance({line}))"
+        )
+
+    def visit_grouping_expr(self, expr: ex.Grouping):
+        return self.generate(expr.expression)
+
+    def visit_index_expr(self, expr: ex.Index):
+        obj = self.generate(expr.obj)
+        index = self.generate(expr.index)
+        line = expr.bracket.line
+        return f"{self.mark(line)}_get_index({obj}, {index}, {line})"
+
+    def visit_literal_expr(self, expr: ex.Literal):
+        return repr(expr.value)
+
+    def visit_logical_expr(self, expr: ex.Logical):
+        left = self.generate(expr.left)
+        right = self.generate_conditional(expr.right)
+        t = self.temp()
+        truthy = f"({t} := {left}) is not None and {t} is not False"
+        if expr.operator.type == TokenType.AND:
+            return f"({right} if {truthy} else {t})"
+        return f"({t} if {truthy} else {right})"
+
+    def visit_set_expr(self, expr: ex.Set):
+        line = expr.name.line
+        name = rt.attribute_name(expr.name.lexeme)
+        obj = "this"
+        if not self.is_this(expr.obj):
+            obj = f"_check_instance({self.generate(expr.obj)}, {line})"
+            obj = self.bind(obj)
+        value = self.generate(expr.value)
+        return f'_set_property({obj}, "{name}", {value})'
+
+    def visit_setindex_expr(self, expr: ex.SetIndex):
+        obj = self.generate(expr.obj)
+        index = self.generate(expr.index)
+        value = self.generate(expr.value)
+        line = expr.bracket.line
+        return f"{self.mark(line)}_set_index({obj}, {index}, {value}, {line})"
+
+    def visit_super_expr(self, expr: ex.Super):
+        line = expr.method.line
+        method = expr.method.lexeme
+        return f'_get_super(__class__, this, "{method}", {line})'
+
+    def visit_this_expr(self, expr: ex.This):
+        return "this"
+
+    def visit_unary_expr(self, expr: ex.Unary):
+        right = self.generate(expr.right)
+        t = self.temp()
+        if expr.operator.type == TokenType.BANG:
+            return f"(({t} := {right}) is None or {t} is False)"
+        return (
+            f"(-{t} if type({t} := {right}) is float "
+            f"else _number_error({expr.operator.line}))"
+        )
+
+    def visit_variable_expr(self, expr: ex.Variable):
+        decl = self.refs.get(expr)
+        if decl is None:
+            return f"{self.mark(expr.name.line)}{self.global_name(expr.name)}"
+        if decl.boxed:
+            return f"{decl.py_name}[0]"
+        return decl.py_name
+
+
+@functools.lru_cache(maxsize=256)
+def compile_source(source: str) -> CodeType:
+    """Compiles generated source, naming it after its hash so that the
+    same program always maps back through the same line map."""
+    digest = hashlib.sha1(source.encode()).hexdigest()[:12]
+    return compile(source, f"<lox {digest}>", "exec")
+
+
+class PythonInterpreter(Interpreter):
+    """Runs programs by transpiling them to Python and executing the result.
+
+    Code objects are cached by source, so running the same program or REPL
+    line again skips Python's compiler. Programs whose blocks are nested
+    deeper than Python's compiler allows are run by the tree-walking
+    interpreter instead.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.namespace = {
+            "_LoxObject": rt.LoxObject,
+            "_stringfy": rt.stringfy,
+            "_add": rt.add,
+            "_divide": rt.divide,
+            "_modulo": rt.modulo,
+            "_numbers_error": rt.numbers_error,
+            "_number_error": rt.number_error,
+            "_not_instance": rt.not_instance,
+            "_check_instance": rt.check_instance,
+            "_check_superclass": rt.check_superclass,
+            "_set_property": rt.set_property,
+            "_get_index": rt.get_index,
+            "_set_index": rt.set_index,
+            "_set_box": rt.set_box,
+            "_get_super": rt.get_super,
+            "_set_global": self.set_global,
+            "_call": rt.call,
+            "_stack_overflow": rt.stack_overflow,
+            "_depth": 0,
+            "_max_depth": self.max_call_depth,
+        }
+        for name, func in built_ins.items():
+            self.namespace[f"{name}_g"] = func
+        # Lox line of every line of every program run so far, by filename.
+        self.line_maps: dict[str, list[int]] = {}
+        # Whether programs are handed over to the tree-walking interpreter,
+        # as one failed to compile before any other ran.
+        self.walking = False
+
+    def known_globals(self) -> set[str]:
+        return {
+            rt.lox_name(name) for name in self.namespace if name.endswith("_g")
+        }
+
+    def set_global(self, name: str, val, line: int):
+        if name not in self.namespace:
+            raise rt.error(f"Undefined variable '{rt.lox_name(name)}'.", line)
+        self.namespace[name] = val
+        return val
+
+    def interpret(self, statements: list[st.Stmt]):
+        if self.walking:
+            super().interpret(statements)
+            return
+
+        transpiler = Transpiler(self.known_globals())
+        line_map: list[int] = []
+        try:
+            source, line_map = transpiler.transpile(statements)
+            code = compile_source(source)
+        except (SyntaxError, RecursionError, MemoryError) as error:
+            # Python limits how deeply blocks can nest. The tree-walking
+            # interpreter can take over as long as nothing ran here yet,
+            # since globals defined here are out of its reach.
+            if not self.line_maps:
+                self.walking = True
+                super().interpret(statements)
+                return
+            line = 1
+            if isinstance(error, SyntaxError) and error.lineno:
+                line = line_map[error.lineno - 1]
+            msg = "Program nested too deeply for the python engine."
+            ErrorHandler.runtime_error(rt.error(msg, line))
+            return
+        self.line_maps[code.co_filename] = line_map
+        exec(code, self.namespace)
+
+        self.namespace["_depth"] = 0
+        self.namespace["_max_depth"] = self.max_call_depth
+        try:
+            self.namespace["_main"]()
+        except RuntimeErr as error:
+            ErrorHandler.runtime_error(error)
+        except rt.StackOverflow as error:
+            line = self.caller_line(error.__traceback__)
+            ErrorHandler.runtime_error(rt.error("Stack overflow.", line))
+        except (NameError, AttributeError, RecursionError) as error:
+            line, innermost = self.lox_line(error.__traceback__)
+            if line is None or not (
+                innermost or isinstance(error, RecursionError)
+            ):
+                raise
+
+            if isinstance(error, NameError):
+                msg = f"Undefined variable '{rt.lox_name(error.name)}'."
+            elif isinstance(error, AttributeError):
+                msg = f"Undefined property '{rt.lox_name(error.name)}'."
+            else:
+                msg = "Stack overflow."
+            ErrorHandler.runtime_error(rt.error(msg, line))
+
+    def caller_line(self, traceback) -> int:
+        """Finds the Lox line of the call that went past the maximum call
+        depth, made by the transpiled frame before the one that raised,
+        skipping the `__init__` wrappers classes call their `init` from."""
+        frames = []
+        while traceback is not None:
+            code = traceback.tb_frame.f_code
+            line_map = self.line_maps.get(code.co_filename)
+            if line_map is not None and code.co_name != "__init__":
+                frames.append(line_map[traceback.tb_lineno - 1])
+            traceback = traceback.tb_next
+        return frames[-2]
+
+    def lox_line(self, traceback) -> tuple[int | None, bool]:
+        """Finds the Lox line of the innermost transpiled frame of a
+        traceback, and whether that frame is the one that raised."""
+        line, innermost = None, False
+        while traceback is not None:
+            code = traceback.tb_frame.f_code
+            line_map = self.line_maps.get(code.co_filename)
+            innermost = line_map is not None
+            if innermost:
+                line = line_map[traceback.tb_lineno - 1]
+            traceback = traceback.tb_next
+        return line, innermost
@@ -0,0 +1,159 @@
+"""Support code shared by the Python programs the `Transpiler` generates.
+
+Generated code inlines the common, well-typed case of every operation and
+falls back to the helpers below, which either handle the rarer types or
+raise the same `RuntimeErr` the tree-walking interpreter would.
+"""
+
+import keyword
+import types
+
+from error_handler import RuntimeErr
+from interpreter import Interpreter
+from lox_array import ArrayError, LoxArray, get_item, set_item
+from lox_map import LoxMap
+from native_functions import NativeFunction, error_message
+from rope import STRINGS, concat
+from tokens import Token, TokenType
+from vector import Vector
+
+
+def lox_name(name: str) -> str:
+    """Recovers the Lox name of a mangled Python name.
+
+    Lox identifiers never contain underscores, so everything the
+    transpiler appends to them starts with one.
+    """
+    return name.split("_", 1)[0]
+
+
+def attribute_name(name: str) -> str:
+    if keyword.iskeyword(name):
+        return name + "_"
+    return name
+
+
+def error(msg: str, line: int) -> RuntimeErr:
+    return RuntimeErr(msg, token=Token(TokenType.EOF, "", None, line))
+
+
+class LoxClassType(type):
+    """Metaclass of every class a Lox program declares."""
+
+    @property
+    def _lox_arity(cls) -> int:
+        return cls._lox_init_arity
+
+    def __str__(cls) -> str:
+        return f"<{lox_name(cls.__name__)} class>"
+
+
+class LoxObject(metaclass=LoxClassType):
+    _lox_init_arity = 0
+
+    def __str__(self) -> str:
+        return f"<{lox_name(type(self).__name__)} instance>"
+
+
+def stringfy(val) -> str:
+    if isinstance(val, (types.FunctionType, types.MethodType)):
+        return f"<fn {lox_name(val.__name__)}>"
+    if isinstance(val, (LoxArray, LoxMap, Vector)):
+        return val.to_string(stringfy)
+    return Interpreter.stringfy(val)
+
+
+def add(left, right, line: int):
+    if type(left) in STRINGS and type(right) in STRINGS:
+        return concat(left, right)
+    raise error("Operands must be two numbers or two strings.", line)
+
+
+def numbers_error(line: int):
+    raise error("Operands must be numbers.", line)
+
+
+def number_error(line: int):
+    raise error("Operand must be a number.", line)
+
+
+def divide(left, right, line: int):
+    if type(left) is not float or type(right) is not float:
+        numbers_error(line)
+    raise error("Division by zero.", line)
+
+
+def modulo(left, right, line: int):
+    if type(left) is not float or type(right) is not float:
+        numbers_error(line)
+    raise error("Modulo by zero.", line)
+
+
+def not_instance(line: int):
+    raise error("Only instances have properties.", line)
+
+
+def check_instance(obj, line: int):
+    if not isinstance(obj, LoxObject):
+        not_instance(line)
+    return obj
+
+
+def set_property(obj, name: str, val):
+    setattr(obj, name, val)
+    return val
+
+
+def get_index(obj, index, line: int):
+    try:
+        return get_item(obj, index)
+    except ArrayError as e:
+        raise error(e.args[0], line)
+
+
+def set_index(obj, index, val, line: int):
+    try:
+        return set_item(obj, index, val)
+    except ArrayError as e:
+        raise error(e.args[0], line)
+
+
+def set_box(box: list, val):
+    box[0] = val
+    return val
+
+
+def check_superclass(superclass, line: int):
+    if not isinstance(superclass, LoxClassType):
+        raise error("Superclass must be a class", line)
+    return superclass
+
+
+def get_super(klass: type, this: LoxObject, name: str, line: int):
+    try:
+        return getattr(super(klass, this), attribute_name(name))
+    except AttributeError:
+        raise error(f"Undefined property '{name}'.", line)
+
+
+class StackOverflow(Exception):
+    """Raised by a function called past the maximum call depth."""
+
+
+def stack_overflow():
+    raise StackOverflow
+
+
+def call(callee, args: tuple, line: int):
+    """Slow path of calls whose callee is not a Lox function of the right
+    arity: natives, arity mismatches and non-callables."""
+    if callee.__class__ is NativeFunction:
+        try:
+            return callee.invoke(args)
+        except Exception as e:
+            raise error(error_message(e), line)
+
+    arity = getattr(callee, "_lox_arity", None)
+    if arity is None:
+        raise error("Can only call functions and classes.", line)
+    raise error(f"Expected {arity} arguments got {len(args)}.", line)
@@ -0,0 +1,140 @@
+"""Vectors: arrays holding only numbers, stored unboxed in an `array("d")`,
+with operations over all their elements that run outside the interpreter.
+
+If NumPy is installed it runs the operations on vectors long enough to
+make up for the cost of calling it, viewing their storage without copying
+it. Sums can then differ from those made without NumPy in their last bits,
+as NumPy adds the numbers in another order.
+"""
+
+import operator
+from array import array
+from typing import Callable
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Vectors shorter than this are handled without NumPy even if it is
+# installed, as calling it costs more than it saves on them.
+NUMPY_MIN_LENGTH = 1000
+
+# Longest vector a program can ask for, 2 GiB of numbers, so that absurd
+# lengths are runtime errors instead of exhausting memory or running for ever.
+MAX_LENGTH = 2**28
+
+
+class VectorError(Exception):
+    """Raised by vector operations with the message of the runtime error to
+    report."""
+
+
+class Vector:
+    """Vector value. Like arrays, vectors are objects compared by
+    identity."""
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: array) -> None:
+        self.values = values
+
+    def to_string(self, stringfy: Callable[[object], str]) -> str:
+        return "[" + ", ".join(map(stringfy, self.values)) + "]"
+
+
+def uses_numpy(vector: Vector) -> bool:
+    return numpy is not None and len(vector.values) >= NUMPY_MIN_LENGTH
+
+
+def view(vector: Vector):
+    """Returns a NumPy array sharing the storage of `vector`."""
+    return numpy.frombuffer(vector.values, dtype=numpy.float64)
+
+
+def from_numpy(result) -> Vector:
+    return Vector(array("d", result.astype(numpy.float64).tobytes()))
+
+
+def check_lengths(a: Vector, b: Vector) -> None:
+    if len(a.values) != len(b.values):
+        raise VectorError("Vectors must have the same length.")
+
+
+def check_not_empty(vector: Vector) -> None:
+    if not vector.values:
+        raise VectorError("Expect a vector with at least one element.")
+
+
+def add(a: Vector, b: Vector) -> Vector:
+    check_lengths(a, b)
+    if uses_numpy(a):
+        return from_numpy(view(a) + view(b))
+    return Vector(array("d", map(operator.add, a.values, b.values)))
+
+
+def multiply(a: Vector, b: Vector) -> Vector:
+    check_lengths(a, b)
+    if uses_numpy(a):
+        return from_numpy(view(a) * view(b))
+    return Vector(array("d", map(operator.mul, a.values, b.values)))
+
+
+def scale(vector: Vector, factor: float) -> Vector:
+    if uses_numpy(vector):
+        return from_numpy(view(vector) * factor)
+    return Vector(array("d", map(factor.__mul__, vector.values)))
+
+
+def total(vector: Vector) -> float:
+    if uses_numpy(vector):
+        return float(view(vector).sum())
+    return float(sum(vector.values))
+
+
+def minimum(vector: Vector) -> float:
+    check_not_empty(vector)
+    if uses_numpy(vector):
+        return float(view(vector).min())
+    return min(vector.values)
+
+
+def maximum(vector: Vector) -> float:
+    check_not_empty(vector)
+    if uses_numpy(vector):
+        return float(view(vector).max())
+    return max(vector.values)
+
+
+def mean(vector: Vector) -> float:
+    check_not_empty(vector)
+    return total(vector) / len(vector.values)
+
+
+def dot(a: Vector, b: Vector) -> float:
+    check_lengths(a, b)
+    if uses_numpy(a):
+        return float(numpy.dot(view(a), view(b)))
+    return float(sum(map(operator.mul, a.values, b.values)))
+
+
+def arange(start: float, end: float, step: float) -> Vector:
+    """Returns the vector of numbers from `start` up to, but excluding,
+    `end`, `step` apart."""
+    if not step:
+        raise VectorError("Range step can't be zero.")
+    if not (start < end if step > 0 else end < start):
+        return Vector(array("d"))
+    count = -((start - end) // step)
+    if not count <= MAX_LENGTH:
+        raise VectorError(f"Range can't be longer than {MAX_LENGTH}.")
+    count = int(count)
+    if numpy is not None and count >= NUMPY_MIN_LENGTH:
+        return from_numpy(numpy.arange(count) * step + start)
+    return Vector(array("d", [i * step + start for i in range(count)]))
+
+
+def sort(vector: Vector) -> Vector:
+    if uses_numpy(vector):
+        return from_numpy(numpy.sort(view(vector)))
+    return Vector(array("d", sorted(vector.values)))
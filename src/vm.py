@@ -0,0 +1,635 @@
+import stmt as st
+from bytecode import FunctionProto, OpCode
+from compiler import Compiler
+from error_handler import ErrorHandler, RuntimeErr
+from interpreter import Interpreter
+from lox_array import ArrayError, get_item, set_item
+from lox_class import LoxClass
+from lox_function import MAX_CALL_DEPTH
+from lox_instance import LoxInstance
+from native_functions import NativeFunction, built_ins, error_message
+from rope import STRINGS, concat
+from tokens import Token, TokenType
+
+# Returned by `LoxInstance.field` for instances without the field.
+MISSING = object()
+
+# Plain integers compare faster than enum members in the dispatch loop.
+CONSTANT = OpCode.CONSTANT.value
+NIL = OpCode.NIL.value
+TRUE = OpCode.TRUE.value
+FALSE = OpCode.FALSE.value
+POP = OpCode.POP.value
+GET_LOCAL = OpCode.GET_LOCAL.value
+SET_LOCAL = OpCode.SET_LOCAL.value
+GET_GLOBAL = OpCode.GET_GLOBAL.value
+DEFINE_GLOBAL = OpCode.DEFINE_GLOBAL.value
+SET_GLOBAL = OpCode.SET_GLOBAL.value
+GET_UPVALUE = OpCode.GET_UPVALUE.value
+SET_UPVALUE = OpCode.SET_UPVALUE.value
+GET_PROPERTY = OpCode.GET_PROPERTY.value
+SET_PROPERTY = OpCode.SET_PROPERTY.value
+GET_SUPER = OpCode.GET_SUPER.value
+EQUAL = OpCode.EQUAL.value
+NOT_EQUAL = OpCode.NOT_EQUAL.value
+GREATER = OpCode.GREATER.value
+GREATER_EQUAL = OpCode.GREATER_EQUAL.value
+LESS = OpCode.LESS.value
+LESS_EQUAL = OpCode.LESS_EQUAL.value
+ADD = OpCode.ADD.value
+SUBTRACT = OpCode.SUBTRACT.value
+MULTIPLY = OpCode.MULTIPLY.value
+DIVIDE = OpCode.DIVIDE.value
+MODULO = OpCode.MODULO.value
+NOT = OpCode.NOT.value
+NEGATE = OpCode.NEGATE.value
+PRINT = OpCode.PRINT.value
+JUMP = OpCode.JUMP.value
+JUMP_IF_FALSE = OpCode.JUMP_IF_FALSE.value
+JUMP_IF_TRUE = OpCode.JUMP_IF_TRUE.value
+POP_JUMP_IF_FALSE = OpCode.POP_JUMP_IF_FALSE.value
+LOOP = OpCode.LOOP.value
+CALL = OpCode.CALL.value
+INVOKE = OpCode.INVOKE.value
+SUPER_INVOKE = OpCode.SUPER_INVOKE.value
+CLOSURE = OpCode.CLOSURE.value
+CLOSE_UPVALUE = OpCode.CLOSE_UPVALUE.value
+RETURN = OpCode.RETURN.value
+TAIL_CALL = OpCode.TAIL_CALL.value
+GET_INDEX = OpCode.GET_INDEX.value
+SET_INDEX = OpCode.SET_INDEX.value
+CLASS = OpCode.CLASS.value
+INHERIT = OpCode.INHERIT.value
+METHOD = OpCode.METHOD.value
+
+
+class Upvalue:
+    """A variable captured by a closure.
+
+    While open, `cells` is the VM stack and `index` the captured slot; once
+    closed the value moves into a private one-element list.
+    """
+
+    __slots__ = "cells", "index"
+
+    def __init__(self, cells: list, index: int) -> None:
+        self.cells = cells
+        self.index = index
+
+    def close(self) -> None:
+        self.cells = [self.cells[self.index]]
+        self.index = 0
+
+
+class VMClosure:
+    __slots__ = "function", "upvalues"
+
+    def __init__(self, function: FunctionProto, upvalues: list[Upvalue]):
+        self.function = function
+        self.upvalues = upvalues
+
+    def __str__(self) -> str:
+        return str(self.function)
+
+
+class BoundMethod:
+    __slots__ = "receiver", "method"
+
+    def __init__(self, receiver: LoxInstance, method: VMClosure) -> None:
+        self.receiver = receiver
+        self.method = method
+
+    def __str__(self) -> str:
+        return str(self.method)
+
+
+class CallFrame:
+    __slots__ = "closure", "ip", "base"
+
+    def __init__(self, closure: VMClosure, base: int) -> None:
+        self.closure = closure
+        self.ip = 0
+        self.base = base
+
+
+class VM:
+    """Runs programs compiled to bytecode by `Compiler`.
+
+    Values live on one stack shared by all call frames; a frame addresses
+    its locals relative to `base`, the slot holding the callee or receiver.
+    """
+
+    def __init__(self) -> None:
+        self.globals_: dict[str, object] = dict(built_ins)
+        self.stack: list = []
+        self.frames: list[CallFrame] = []
+        self.open_upvalues: dict[int, Upvalue] = {}
+        self.max_call_depth = MAX_CALL_DEPTH
+
+    def interpret(self, statements: list[st.Stmt]):
+        function = Compiler().compile(statements)
+        if ErrorHandler.had_error:
+            return
+
+        closure = VMClosure(function, [])
+        self.stack.append(closure)
+        self.frames.append(CallFrame(closure, 0))
+        try:
+            self.run()
+        except RuntimeErr as error:
+            ErrorHandler.runtime_error(error)
+            self.stack.clear()
+            self.frames.clear()
+            self.open_upvalues.clear()
+
+    @staticmethod
+    def error(msg: str, line: int) -> RuntimeErr:
+        return RuntimeErr(msg, token=Token(TokenType.EOF, "", None, line))
+
+    def capture_upvalue(self, index: int) -> Upvalue:
+        upvalue = self.open_upvalues.get(index)
+        if upvalue is None:
+            upvalue = self.open_upvalues[index] = Upvalue(self.stack, index)
+        return upvalue
+
+    def close_upvalues(self, last: int) -> None:
+        open_upvalues = self.open_upvalues
+        for index in [index for index in open_upvalues if index >= last]:
+            open_upvalues.pop(index).close()
+
+    def call_value(self, callee, argc: int, line: int) -> None:
+        """Calls anything but a plain closure, which `run` handles inline.
+
+        Bound methods and classes push a new frame, natives run to completion
+        and leave their result in place of the callee.
+        """
+        stack = self.stack
+        if type(callee) is BoundMethod:
+            stack[-argc - 1] = callee.receiver
+            callee = callee.method
+
+        elif type(callee) is LoxClass:
+            stack[-argc - 1] = LoxInstance(callee)
+            initializer = callee.initializer()
+            if initializer is None:
+                if argc != 0:
+                    raise self.error(f"Expected 0 arguments got {argc}.", line)
+                return
+            callee = initializer
+
+        elif type(callee) is NativeFunction:
+            args = stack[len(stack) - argc :]
+            del stack[-argc - 1 :]
+            try:
+                stack.append(callee.invoke(args))
+            except Exception as e:
+                raise self.error(error_message(e), line)
+            return
+
+        if type(callee) is not VMClosure:
+            raise self.error("Can only call functions and classes.", line)
+
+        self.push_frame(callee, argc, line)
+
+    def push_frame(self, closure: VMClosure, argc: int, line: int) -> None:
+        if argc != closure.function.arity:
+            raise self.error(
+                f"Expected {closure.function.arity} arguments got {argc}.",
+                line,
+            )
+        if len(self.frames) > self.max_call_depth:
+            raise self.error("Stack overflow.", line)
+        self.frames.append(CallFrame(closure, len(self.stack) - argc - 1))
+
+    def invoke_from_class(
+        self, klass: LoxClass, name: str, argc: int, line: int
+    ) -> None:
+        method = klass.find_method(name)
+        if method is None:
+            raise self.error(f"Undefined property '{name}'.", line)
+        self.push_frame(method, argc, line)
+
+    def run(self) -> None:
+        stack = self.stack
+        frames = self.frames
+        globals_ = self.globals_
+        truthy = Interpreter.truthy
+        stringfy = Interpreter.stringfy
+        error = self.error
+
+        frame = frames[-1]
+        closure = frame.closure
+        chunk = closure.function.chunk
+        code = chunk.code
+        constants = chunk.constants
+        ip = frame.ip
+        base = frame.base
+
+        while True:
+            op = code[ip]
+            ip += 1
+
+            if op == GET_LOCAL:
+                stack.append(stack[base + code[ip]])
+                ip += 1
+
+            elif op == CONSTANT:
+                stack.append(constants[code[ip]])
+                ip += 1
+
+            elif op == SET_LOCAL:
+                stack[base + code[ip]] = stack[-1]
+                ip += 1
+
+            elif op == POP:
+                stack.pop()
+
+            elif op == GET_GLOBAL:
+                name = constants[code[ip]]
+                ip += 1
+                try:
+                    stack.append(globals_[name])
+                except KeyError:
+                    raise error(
+                        f"Undefined variable '{name}'.", chunk.lines[ip - 1]
+                    )
+
+            elif op == ADD:
+                b = stack.pop()
+                a = stack[-1]
+                if type(a) is float and type(b) is float:
+                    stack[-1] = a + b
+                elif type(a) in STRINGS and type(b) in STRINGS:
+                    stack[-1] = concat(a, b)
+                else:
+                    raise error(
+                        "Operands must be two numbers or two strings.",
+                        chunk.lines[ip - 1],
+                    )
+
+            elif op == SUBTRACT:
+                b = stack.pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    raise error(
+                        "Operands must be numbers.", chunk.lines[ip - 1]
+                    )
+                stack[-1] = a - b
+
+            elif op == LESS:
+                b = stack.pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    raise error(
+                        "Operands must be numbers.", chunk.lines[ip - 1]
+                    )
+                stack[-1] = a < b
+
+            elif op == POP_JUMP_IF_FALSE:
+                val = stack.pop()
+                if val is None or val is False:
+                    ip += code[ip]
+                ip += 1
+
+            elif op == JUMP:
+                ip += code[ip] + 1
+
+            elif op == LOOP:
+                ip -= code[ip] - 1
+
+            elif op == GET_UPVALUE:
+                upvalue = closure.upvalues[code[ip]]
+                stack.append(upvalue.cells[upvalue.index])
+                ip += 1
+
+            elif op == SET_UPVALUE:
+                upvalue = closure.upvalues[code[ip]]
+                upvalue.cells[upvalue.index] = stack[-1]
+                ip += 1
+
+            elif op == CALL:
+                argc = code[ip]
+                ip += 1
+                frame.ip = ip
+                callee = stack[-argc - 1]
+                if type(callee) is VMClosure:
+                    self.push_frame(callee, argc, chunk.lines[ip - 1])
+                elif type(callee) is NativeFunction:
+                    args = stack[len(stack) - argc :]
+                    del stack[-argc - 1 :]
+                    try:
+                        stack.append(callee.invoke(args))
+                    except Exception as e:
+                        raise error(error_message(e), chunk.lines[ip - 1])
+                    continue
+                else:
+                    self.call_value(callee, argc, chunk.lines[ip - 1])
+                    if frames[-1] is frame:
+                        continue
+
+                frame = frames[-1]
+                closure = frame.closure
+                chunk = closure.function.chunk
+                code = chunk.code
+                constants = chunk.constants
+                ip = 0
+                base = frame.base
+
+            elif op == RETURN:
+                result = stack.pop()
+                if self.open_upvalues:
+                    self.close_upvalues(base)
+                frames.pop()
+                del stack[base:]
+                if not frames:
+                    return
+
+                stack.append(result)
+                frame = frames[-1]
+                closure = frame.closure
+                chunk = closure.function.chunk
+                code = chunk.code
+                constants = chunk.constants
+                ip = frame.ip
+                base = frame.base
+
+            elif op == TAIL_CALL:
+                argc = code[ip]
+                ip += 1
+                frame.ip = ip
+                callee = stack[-argc - 1]
+                if type(callee) is BoundMethod:
+                    stack[-argc - 1] = callee.receiver
+                    callee = callee.method
+
+                if type(callee) is VMClosure and argc == callee.function.arity:
+                    # The callee takes over the frame of the function
+                    # returning its result, so the RETURN after this one
+                    # is never reached.
+                    if self.open_upvalues:
+                        self.close_upvalues(base)
+                    stack[base:] = stack[-argc - 1 :]
+                    frame.closure = callee
+                elif type(callee) is VMClosure:
+                    self.push_frame(callee, argc, chunk.lines[ip - 1])
+                else:
+                    self.call_value(callee, argc, chunk.lines[ip - 1])
+                    if frames[-1] is frame:
+                        continue
+
+                frame = frames[-1]
+                closure = frame.closure
+                chunk = closure.function.chunk
+                code = chunk.code
+                constants = chunk.constants
+                ip = 0
+                base = frame.base
+
+            elif op == GET_PROPERTY:
+                instance = stack[-1]
+                name = constants[code[ip]]
+                ip += 1
+                if not isinstance(instance, LoxInstance):
+                    raise error(
+                        "Only instances have properties.", chunk.lines[ip - 1]
+                    )
+
+                val = instance.field(name, MISSING)
+                if val is not MISSING:
+                    stack[-1] = val
+                else:
+                    method = instance.klass.find_method(name)
+                    if method is None:
+                        raise error(
+                            f"Undefined property '{name}'.",
+                            chunk.lines[ip - 1],
+                        )
+                    stack[-1] = BoundMethod(instance, method)
+
+            elif op == SET_PROPERTY:
+                val = stack.pop()
+                instance = stack[-1]
+                name = constants[code[ip]]
+                ip += 1
+                if not isinstance(instance, LoxInstance):
+                    raise error(
+                        "Only instances have properties.", chunk.lines[ip - 1]
+                    )
+                instance.set(name, val)
+                stack[-1] = val
+
+            elif op == GET_INDEX:
+                index = stack.pop()
+                try:
+                    stack[-1] = get_item(stack[-1], index)
+                except ArrayError as e:
+                    raise error(e.args[0], chunk.lines[ip - 1])
+
+            elif op == SET_INDEX:
+                val = stack.pop()
+                index = stack.pop()
+                try:
+                    stack[-1] = set_item(stack[-1], index, val)
+                except ArrayError as e:
+                    raise error(e.args[0], chunk.lines[ip - 1])
+
+            elif op == INVOKE:
+                name = constants[code[ip]]
+                argc = code[ip + 1]
+                ip += 2
+                frame.ip = ip
+                line = chunk.lines[ip - 1]
+                receiver = stack[-argc - 1]
+                if not isinstance(receiver, LoxInstance):
+                    raise error("Only instances have properties.", line)
+
+                field = receiver.field(name, MISSING)
+                if field is not MISSING:
+                    callee = stack[-argc - 1] = field
+                    self.call_value(callee, argc, line)
+                    if frames[-1] is frame:
+                        continue
+                else:
+                    self.invoke_from_class(receiver.klass, name, argc, line)
+
+                frame = frames[-1]
+                closure = frame.closure
+                chunk = closure.function.chunk
+                code = chunk.code
+                constants = chunk.constants
+                ip = 0
+                base = frame.base
+
+            elif op == SUPER_INVOKE:
+                name = constants[code[ip]]
+                argc = code[ip + 1]
+                ip += 2
+                frame.ip = ip
+                superclass = stack.pop()
+                self.invoke_from_class(
+                    superclass, name, argc, chunk.lines[ip - 1]
+                )
+
+                frame = frames[-1]
+                closure = frame.closure
+                chunk = closure.function.chunk
+                code = chunk.code
+                constants = chunk.constants
+                ip = 0
+                base = frame.base
+
+            elif op == MULTIPLY:
+                b = stack.pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    raise error(
+                        "Operands must be numbers.", chunk.lines[ip - 1]
+                    )
+                stack[-1] = a * b
+
+            elif op == DIVIDE or op == MODULO:
+                b = stack.pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    raise error(
+                        "Operands must be numbers.", chunk.lines[ip - 1]
+                    )
+                if b == 0.0:
+                    msg = "Division by zero."
+                    if op == MODULO:
+                        msg = "Modulo by zero."
+                    raise error(msg, chunk.lines[ip - 1])
+                stack[-1] = a / b if op == DIVIDE else a % b
+
+            elif op == GREATER:
+                b = stack.pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    raise error(
+                        "Operands must be numbers.", chunk.lines[ip - 1]
+                    )
+                stack[-1] = a > b
+
+            elif op == GREATER_EQUAL:
+                b = stack.pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    raise error(
+                        "Operands must be numbers.", chunk.lines[ip - 1]
+                    )
+                stack[-1] = a >= b
+
+            elif op == LESS_EQUAL:
+                b = stack.pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    raise error(
+                        "Operands must be numbers.", chunk.lines[ip - 1]
+                    )
+                stack[-1] = a <= b
+
+            elif op == EQUAL:
+                b = stack.pop()
+                stack[-1] = stack[-1] == b
+
+            elif op == NOT_EQUAL:
+                b = stack.pop()
+                stack[-1] = stack[-1] != b
+
+            elif op == NIL:
+                stack.append(None)
+
+            elif op == TRUE:
+                stack.append(True)
+
+            elif op == FALSE:
+                stack.append(False)
+
+            elif op == NOT:
+                stack[-1] = not truthy(stack[-1])
+
+            elif op == NEGATE:
+                val = stack[-1]
+                if type(val) is not float:
+                    raise error(
+                        "Operand must be a number.", chunk.lines[ip - 1]
+                    )
+                stack[-1] = -val
+
+            elif op == JUMP_IF_FALSE:
+                val = stack[-1]
+                if val is None or val is False:
+                    ip += code[ip]
+                ip += 1
+
+            elif op == JUMP_IF_TRUE:
+                val = stack[-1]
+                if val is not None and val is not False:
+                    ip += code[ip]
+                ip += 1
+
+            elif op == PRINT:
+                print(stringfy(stack.pop()))
+
+            elif op == DEFINE_GLOBAL:
+                globals_[constants[code[ip]]] = stack.pop()
+                ip += 1
+
+            elif op == SET_GLOBAL:
+                name = constants[code[ip]]
+                ip += 1
+                if name not in globals_:
+                    raise error(
+                        f"Undefined variable '{name}'.", chunk.lines[ip - 1]
+                    )
+                globals_[name] = stack[-1]
+
+            elif op == CLOSURE:
+                function = constants[code[ip]]
+                ip += 1
+                upvalues = []
+                for _ in range(function.upvalue_count):
+                    if code[ip]:
+                        upvalues.append(
+                            self.capture_upvalue(base + code[ip + 1])
+                        )
+                    else:
+                        upvalues.append(closure.upvalues[code[ip + 1]])
+                    ip += 2
+                stack.append(VMClosure(function, upvalues))
+
+            elif op == CLOSE_UPVALUE:
+                self.close_upvalues(len(stack) - 1)
+                stack.pop()
+
+            elif op == GET_SUPER:
+                name = constants[code[ip]]
+                ip += 1
+                superclass = stack.pop()
+                method = superclass.find_method(name)
+                if method is None:
+                    raise error(
+                        f"Undefined property '{name}'.", chunk.lines[ip - 1]
+                    )
+                stack[-1] = BoundMethod(stack[-1], method)
+
+            elif op == CLASS:
+                stack.append(LoxClass(constants[code[ip]], None, {}))
+                ip += 1
+
+            elif op == INHERIT:
+                subclass = stack.pop()
+                superclass = stack[-1]
+                if not isinstance(superclass, LoxClass):
+                    raise error(
+                        "Superclass must be a class", chunk.lines[ip - 1]
+                    )
+                subclass.superclass = superclass
+
+            elif op == METHOD:
+                method = stack.pop()
+                stack[-1].methods[constants[code[ip]]] = method
+                ip += 1
+
+            else:
+                raise error(f"Unknown opcode {op}.", chunk.lines[ip - 1])
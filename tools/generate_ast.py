@@ -12,18 +12,23 @@ def main(args):
         output_dir,
         "Expr",
         [
-            "Assign   | name: Token, value: Expr",
-            "Binary   | left: Expr, operator: Token, right: Expr",
-            "Call     | callee: Expr, paren: Token, args: list[Expr]",
-            "Get      | obj: Expr, name: Token",
+            "Assign   | name: Token, value: Expr; depth, slot",
+            "Binary   | left: Expr, operator: Token, right: Expr; deopts",
+            "Call     | callee: Expr, paren: Token, args: list[Expr]; tail",
+            "Get      | obj: Expr, name: Token"
+            + "; cache_key, cache_value, cache_entries",
             "Grouping | expression: Expr",
+            "Index    | obj: Expr, bracket: Token, index: Expr",
             "Literal  | value",
             "Logical  | left: Expr, operator: Token, right: Expr",
-            "Set      | obj: Expr, name: Token, value: Expr",
-            "Super    | keyword: Token, method: Token",
-            "This     | keyword: Token",
-            "Unary    | operator: Token, right: Expr",
-            "Variable | name: Token",
+            "Set      | obj: Expr, name: Token, value: Expr"
+            + "; cache_key, cache_value, cache_entries",
+            "SetIndex | obj: Expr, bracket: Token, index: Expr, value: Expr",
+            "Super    | keyword: Token, method: Token"
+            + "; depth, slot, cache_key, cache_value, cache_entries",
+            "This     | keyword: Token; depth, slot",
+            "Unary    | operator: Token, right: Expr; deopts",
+            "Variable | name: Token; depth, slot",
         ],
         ["from tokens import Token"],
     )
@@ -36,7 +41,8 @@ def main(args):
             "Class      | name: Token, superclass: Variable | None,"
             + ' methods: list["Function"]',
             "Expression | expression: Expr",
-            "Function   | name: Token, params: list[Token], body: list[Stmt]",
+            "Function   | name: Token, params: list[Token], body: list[Stmt]"
+            + "; lazy",
             "If         | condition: Expr, then_branch: Stmt,"
             + " else_branch: Stmt | None",
             "Print      | expression: Expr",
@@ -67,6 +73,7 @@ def define_ast(output_dir, base_name, types, extra_imports=None):
 
 def define_base_class(output_file, base_name):
     output_file.write(f"class {base_name}(ABC):\n")
+    output_file.write("    __slots__ = ()\n\n")
     output_file.write("    @abstractmethod\n")
     output_file.write("    def accept(self, visitor: Visitor[V]) -> V:\n")
     output_file.write("        ...\n")
@@ -96,9 +103,34 @@ def define_visitor(output_file, base_name, types):
     output_file.write("\n")
 
 
+def define_slots(output_file, field_list, runtime_fields):
+    # Nodes get no per-instance dict, which keeps large trees small.
+    names = [field.split(":")[0].strip() for field in field_list.split(", ")]
+    names += [field.strip() for field in runtime_fields.split(",") if field]
+    quoted = [f'"{name}"' for name in names]
+
+    if len(quoted) == 1:
+        line = f"    __slots__ = ({quoted[0]},)"
+    else:
+        line = "    __slots__ = " + ", ".join(quoted)
+
+    if len(line) <= 80:
+        output_file.write(line + "\n\n")
+    else:
+        output_file.write("    __slots__ = (\n")
+        for name in quoted:
+            output_file.write(f"        {name},\n")
+        output_file.write("    )\n\n")
+
+
 def define_type(output_file, base_name, class_name, field_list):
+    # Fields after a ";" are not parameters, engines fill them at runtime.
+    field_list, _, runtime_fields = field_list.partition(";")
+    field_list = field_list.strip()
+
     output_file.write("\n\n")
     output_file.write(f"class {class_name}({base_name}):\n")
+    define_slots(output_file, field_list, runtime_fields)
 
     # Follow 80 char limit
     if len(field_list) < 55:
@@ -117,6 +149,8 @@ def define_type(output_file, base_name, class_name, field_list):
     for field in fields:
         name = field.strip()
         output_file.write(f"        self.{name} = {name.split(':')[0]}\n")
+    for field in filter(None, runtime_fields.split(",")):
+        output_file.write(f"        self.{field.strip()} = None\n")
     output_file.write("\n")
 
     # Visitor Pattern